@@ -4,29 +4,13 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from bson import ObjectId
-from pymongo import MongoClient
 import plotly.express as px
 import plotly.graph_objects as go
 from dotenv import load_dotenv
+import io
 import os
-import re
-
-def validar_cpf(cpf):
-    cpf = re.sub(r'[^0-9]', '', cpf)
-    if len(cpf) != 11 or cpf == cpf[0] * 11:
-        return False
-    soma = sum(int(cpf[i]) * (10 - i) for i in range(9))
-    dig1 = (soma * 10 % 11) % 10
-    soma = sum(int(cpf[i]) * (11 - i) for i in range(10))
-    dig2 = (soma * 10 % 11) % 10
-    return cpf[-2:] == f"{dig1}{dig2}"
-
-def validar_email(email):
-    return re.match(r"[^@]+@[^@]+\.[^@]+", email)
-
-def validar_telefone(telefone):
-    return re.match(r"^\(?\d{2}\)?\s?\d{4,5}\-?\d{4}$", telefone)
 
+from validacao import validar_cpf, validar_email, validar_telefone
 
 # Carrega variáveis do .env
 load_dotenv()
@@ -34,15 +18,20 @@ load_dotenv()
 # Pega a URI do ambiente
 uri = os.getenv("MONGO_URI")
 
-# Função para conectar ao MongoDB
-@st.cache_resource
-def get_database_connection():
-    client = MongoClient(uri)
-    return client["Varejo_Python"]
-
 # Importar os módulos do sistema
 # Assumindo que todas as classes estão no arquivo sistema_varejo.py
-from sistema_varejo import GerenciadorProdutos, GestaoEstoque, Cliente, Vendas, Relatorios
+from sistema_varejo import GerenciadorProdutos, GestaoEstoque, Cliente, Vendas, Relatorios, Dashboard, obter_banco, registro_conexoes
+from sistema_varejo import itens_da_venda
+from importacao import importar_clientes, importar_produtos, resumir_importacao
+from exportacao import FORMATOS_EXPORTACAO, arquivo_temporario, exportar_arquivo
+from indice_busca import IndicesSistema
+from notas_fiscais import EmissorNotasFiscais
+from monitor_alteracoes import MonitorAlteracoes
+
+# Função para conectar ao MongoDB (usa o mesmo pool das classes do sistema)
+@st.cache_resource
+def get_database_connection():
+    return obter_banco(uri)
 
 # Configuração da página
 st.set_page_config(
@@ -56,23 +45,39 @@ st.set_page_config(
 # Função para inicializar as classes do sistema
 @st.cache_resource
 def inicializar_sistema():
-    gerenciador_produtos = GerenciadorProdutos()
-    gerenciador_clientes = Cliente()
-    gestor_estoque = GestaoEstoque(gerenciador_produtos)
-    vendas = Vendas(gerenciador_produtos, gerenciador_clientes, gestor_estoque)
-    relatorios = Relatorios()
+    gerenciador_produtos = GerenciadorProdutos(uri)
+    gerenciador_clientes = Cliente(uri)
+    gestor_estoque = GestaoEstoque(gerenciador_produtos, uri)
+    vendas = Vendas(gerenciador_produtos, gerenciador_clientes, gestor_estoque, uri)
+    relatorios = Relatorios(uri)
+    dashboard = Dashboard(uri)
+    indices = IndicesSistema(gerenciador_produtos, gerenciador_clientes)
+    notas_fiscais = EmissorNotasFiscais(uri)
     
     return {
         "produtos": gerenciador_produtos,
         "clientes": gerenciador_clientes,
         "estoque": gestor_estoque,
         "vendas": vendas,
-        "relatorios": relatorios
+        "relatorios": relatorios,
+        "dashboard": dashboard,
+        "indices": indices,
+        "notas_fiscais": notas_fiscais
     }
 
+# Monitor de alterações (change streams) compartilhado por todas as sessões
+@st.cache_resource
+def iniciar_monitor():
+    return MonitorAlteracoes(get_database_connection()).iniciar()
+
+# Com o monitor ativo as telas ao vivo se redesenham a partir da memória a cada intervalo;
+# sem ele, o estado é recarregado do banco a cada exibição
+INTERVALO_ATUALIZACAO_S = 2
+
 # Inicializar sistema
 sistema = inicializar_sistema()
 db = get_database_connection()
+monitor = iniciar_monitor()
 
 # CSS personalizado
 st.markdown("""
@@ -140,6 +145,22 @@ st.sidebar.info(
     """
 )
 
+# Uso do pool de conexões com o MongoDB
+with st.sidebar.expander("Conexões com o banco"):
+    for pool in registro_conexoes.estatisticas():
+        st.markdown(f"**{pool['uri']}** (máx. {pool['max_pool_size']} conexões por servidor)")
+        for servidor, contadores in pool["servidores"].items():
+            st.caption(f"{servidor}: {contadores['em_uso']} em uso / {contadores['abertas']} abertas")
+
+# Acertos do cache de leituras (cada acerto é uma consulta a menos no banco)
+with st.sidebar.expander("Cache de leituras"):
+    for nome, gerenciador in (("Produtos", sistema["produtos"]), ("Clientes", sistema["clientes"])):
+        cache = gerenciador.estatisticas_cache()
+        st.caption(
+            f"{nome}: {cache['acertos']} acertos / {cache['falhas']} falhas "
+            f"({cache['taxa_acerto']:.0%}), {cache['itens']} de {cache['max_itens']} itens, TTL {cache['ttl_s']:.0f} s"
+        )
+
 # Função para formatar mensagens de sucesso
 def show_success(message):
     st.markdown(f"<p class='success-message'>{message}</p>", unsafe_allow_html=True)
@@ -152,6 +173,69 @@ def show_error(message):
 def show_instructions(instructions):
     st.markdown(f"<div class='instruction-box'>{instructions}</div>", unsafe_allow_html=True)
 
+# Seletores com autocompletar: só as melhores opções para o texto digitado vão para a tela
+def seletor_busca(rotulo, buscar, chave, opcao_todos=None):
+    texto = st.text_input(f"Buscar {rotulo.rstrip(' *').lower()} (digite parte do nome ou do código)", key=f"busca_{chave}")
+    opcoes = dict(buscar(texto)) if texto else {}
+    if opcao_todos:
+        opcoes = {"": opcao_todos, **opcoes}
+    elif not opcoes:
+        st.caption("Digite para ver as opções." if not texto else "Nenhum resultado para a busca.")
+
+    return st.selectbox(
+        rotulo,
+        options=list(opcoes.keys()),
+        format_func=lambda x: opcoes.get(x, x),
+        key=chave
+    )
+
+def seletor_produto(rotulo, chave, opcao_todos=None):
+    return seletor_busca(rotulo, sistema["indices"].buscar_produtos, chave, opcao_todos)
+
+def seletor_cliente(rotulo, chave, opcao_todos=None):
+    return seletor_busca(rotulo, sistema["indices"].buscar_clientes, chave, opcao_todos)
+
+# Exportação de relatórios: o arquivo é gravado em blocos, direto do cursor, em um arquivo
+# temporário; a tela guarda só o caminho e o download é servido a partir do arquivo
+ROTULOS_FORMATOS = {"csv": "CSV", "csv.gz": "CSV compactado (gzip)", "xlsx": "Excel (XLSX)"}
+
+# Formatos de exibição das colunas (a formatação é feita pela tabela, sem cópia do DataFrame)
+COLUNA_MOEDA = st.column_config.NumberColumn(format="R$ %.2f")
+COLUNA_DATA_HORA = st.column_config.DatetimeColumn(format="DD/MM/YYYY HH:mm")
+
+def exportar_relatorio(chave, gerar_relatorio, nome_arquivo):
+    st.subheader("Exportar Relatório")
+    formato = st.radio("Formato", list(FORMATOS_EXPORTACAO), format_func=ROTULOS_FORMATOS.get,
+                       horizontal=True, key=f"formato_{chave}")
+    chave_estado = f"exportacao_{chave}"
+
+    if st.button("Preparar Arquivo", key=f"preparar_{chave}"):
+        anterior = st.session_state.pop(chave_estado, None)
+        if anterior and os.path.exists(anterior["caminho"]):
+            os.remove(anterior["caminho"])
+        try:
+            caminho, linhas = exportar_arquivo(gerar_relatorio(), formato, arquivo_temporario(formato))
+            st.session_state[chave_estado] = {
+                "caminho": caminho, "formato": formato, "nome_arquivo": nome_arquivo, "linhas": linhas
+            }
+        except Exception as e:
+            show_error(f"Erro ao exportar relatório: {str(e)}")
+
+    # O arquivo só é oferecido se ainda corresponde aos filtros da tela
+    exportacao = st.session_state.get(chave_estado)
+    if (exportacao and exportacao["nome_arquivo"] == nome_arquivo and exportacao["formato"] == formato
+            and os.path.exists(exportacao["caminho"])):
+        extensao, mime = FORMATOS_EXPORTACAO[formato]
+        st.caption(f"{exportacao['linhas']} linha(s) exportada(s).")
+        with open(exportacao["caminho"], "rb") as arquivo:
+            st.download_button(
+                label=f"Baixar Relatório ({ROTULOS_FORMATOS[formato]})",
+                data=arquivo,
+                file_name=nome_arquivo + extensao,
+                mime=mime,
+                key=f"baixar_{chave}"
+            )
+
 # Função para criar cards do dashboard
 def dashboard_card(title, value, description=""):
     st.markdown(
@@ -177,138 +261,137 @@ if selected_menu == "Dashboard":
     Bem-vindo ao Dashboard! Aqui você pode visualizar um resumo das principais métricas do sistema.
     """)
     
-    # Obter dados para o dashboard
-    total_produtos = len(list(db["estoque_produtos"].find()))
-    total_clientes = len(list(db["clientes"].find()))
-    total_vendas = len(list(db["vendas"].find()))
+    if monitor.ativo:
+        st.caption("🟢 Atualizado ao vivo")
+    else:
+        st.caption(monitor.erro or "Monitor de alterações inativo; os dados são lidos a cada exibição.")
+        monitor.recarregar_estado()
+
+    @st.fragment(run_every=INTERVALO_ATUALIZACAO_S if monitor.ativo else None)
+    def painel_dashboard():
+        # Métricas do estado em memória, mantido pelo monitor de alterações
+        metricas = monitor.estado.metricas()
     
-    # Calcular valor total em estoque
-    produtos = list(db["estoque_produtos"].find())
-    valor_estoque = sum(p.get("qnt_estoque", 0) * p.get("preco", 0) for p in produtos)
+        total_produtos = metricas["produtos"]
+        total_clientes = metricas["clientes"]
+        total_vendas = metricas["vendas"]
+        valor_estoque = metricas["valor_estoque"]
     
-    # Criar layout em colunas para os cards
-    col1, col2 = st.columns(2)
+        # Criar layout em colunas para os cards
+        col1, col2 = st.columns(2)
     
-    with col1:
-        st.metric(label="Total de Produtos", value=total_produtos)
-        st.metric(label="Total de Vendas", value=total_vendas)
+        with col1:
+            st.metric(label="Total de Produtos", value=total_produtos)
+            st.metric(label="Total de Vendas", value=total_vendas)
     
-    with col2:
-        st.metric(label="Total de Clientes", value=total_clientes)
-        st.metric(label="Valor em Estoque", value=f"R$ {valor_estoque:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
+        with col2:
+            st.metric(label="Total de Clientes", value=total_clientes)
+            st.metric(label="Valor em Estoque", value=f"R$ {valor_estoque:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
 
-    # Gráfico de produtos por categoria
-    st.subheader("Produtos por Categoria")
-    
-    # Contar produtos por categoria
-    categorias = {}
-    for p in produtos:
-        categoria = p.get("categoria", "Sem categoria")
-        categorias[categoria] = categorias.get(categoria, 0) + 1
+        # Gráfico de produtos por categoria
+        st.subheader("Produtos por Categoria")
     
-    # Criar DataFrame para o gráfico
-    df_categorias = pd.DataFrame({
-        "Categoria": list(categorias.keys()),
-        "Quantidade": list(categorias.values())
-    })
+        # Criar DataFrame para o gráfico
+        df_categorias = pd.DataFrame({
+            "Categoria": [c["categoria"] for c in metricas["categorias"]],
+            "Quantidade": [c["quantidade"] for c in metricas["categorias"]]
+        })
     
-    if not df_categorias.empty:
-        # Gráfico melhorado de pizza com valores e porcentagens
-        fig = px.pie(
-            df_categorias, 
-            values="Quantidade", 
-            names="Categoria",
-            color_discrete_sequence=px.colors.qualitative.Bold,
-            hole=0.4,  # Donut chart
-            title="Distribuição de Produtos por Categoria"
-        )
-        fig.update_traces(
-            textposition='inside', 
-            textinfo='percent+label+value',
-            hoverinfo='label+percent+value'
-        )
-        fig.update_layout(
-            legend=dict(orientation="h", yanchor="bottom", y=-0.3),
-            margin=dict(t=60, b=60, l=20, r=20)
-        )
-        st.plotly_chart(fig, use_container_width=True)
-    else:
-        st.info("Não há produtos cadastrados para exibir no gráfico.")
+        if not df_categorias.empty:
+            # Gráfico melhorado de pizza com valores e porcentagens
+            fig = px.pie(
+                df_categorias, 
+                values="Quantidade", 
+                names="Categoria",
+                color_discrete_sequence=px.colors.qualitative.Bold,
+                hole=0.4,  # Donut chart
+                title="Distribuição de Produtos por Categoria"
+            )
+            fig.update_traces(
+                textposition='inside', 
+                textinfo='percent+label+value',
+                hoverinfo='label+percent+value'
+            )
+            fig.update_layout(
+                legend=dict(orientation="h", yanchor="bottom", y=-0.3),
+                margin=dict(t=60, b=60, l=20, r=20)
+            )
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("Não há produtos cadastrados para exibir no gráfico.")
     
-    # Gráfico de produtos com estoque baixo
-    st.subheader("Produtos com Estoque Baixo")
-    produtos_baixo_estoque = [p for p in produtos if p.get("qnt_estoque", 0) < 20]
+        # Gráfico de produtos com estoque baixo
+        st.subheader("Produtos com Estoque Baixo")
+        produtos_baixo_estoque = metricas["estoque_baixo"]
     
-    if produtos_baixo_estoque:
-        df_baixo_estoque = pd.DataFrame([
-            {
-                "Produto": p.get("nome", ""),
-                "Código": p.get("cod_produto", ""),
-                "Estoque": p.get("qnt_estoque", 0),
-                "Nível de Alerta": "Crítico" if p.get("qnt_estoque", 0) < 5 else "Baixo"
-            }
-            for p in produtos_baixo_estoque
-        ])
-        
-        # Gráfico de barras horizontais com cores
-        fig = px.bar(
-            df_baixo_estoque.sort_values("Estoque"), 
-            y="Produto",
-            x="Estoque",
-            color="Nível de Alerta",
-            color_discrete_map={"Crítico": "#FF4136", "Baixo": "#FFDC00"},
-            title="Produtos com Estoque Baixo",
-            orientation='h',
-            text="Estoque"
-        )
-        fig.update_traces(textposition="outside")
-        fig.update_layout(
-            xaxis_title="Quantidade em Estoque",
-            yaxis_title="",
-            legend_title="Nível de Alerta",
-            legend=dict(orientation="h", yanchor="bottom", y=-0.3),
-            margin=dict(l=20, r=20, t=60, b=60)
-        )
-        st.plotly_chart(fig, use_container_width=True)
+        if produtos_baixo_estoque:
+            if metricas["total_estoque_baixo"] > len(produtos_baixo_estoque):
+                st.caption(f"Mostrando os {len(produtos_baixo_estoque)} produtos com menor estoque de {metricas['total_estoque_baixo']}.")
+
+            df_baixo_estoque = pd.DataFrame([
+                {
+                    "Produto": p.get("nome", ""),
+                    "Código": p.get("cod_produto", ""),
+                    "Estoque": p.get("qnt_estoque", 0),
+                    "Nível de Alerta": "Crítico" if p.get("qnt_estoque", 0) < 5 else "Baixo"
+                }
+                for p in produtos_baixo_estoque
+            ])
         
-        # Tabela complementar
-        st.dataframe(df_baixo_estoque.sort_values("Estoque"), use_container_width=True)
-    else:
-        st.info("Não há produtos com estoque baixo.")
-    
-    # Adicionar um novo gráfico de valor em estoque por categoria
-    st.subheader("Valor em Estoque por Categoria")
+            # Gráfico de barras horizontais com cores
+            fig = px.bar(
+                df_baixo_estoque.sort_values("Estoque"), 
+                y="Produto",
+                x="Estoque",
+                color="Nível de Alerta",
+                color_discrete_map={"Crítico": "#FF4136", "Baixo": "#FFDC00"},
+                title="Produtos com Estoque Baixo",
+                orientation='h',
+                text="Estoque"
+            )
+            fig.update_traces(textposition="outside")
+            fig.update_layout(
+                xaxis_title="Quantidade em Estoque",
+                yaxis_title="",
+                legend_title="Nível de Alerta",
+                legend=dict(orientation="h", yanchor="bottom", y=-0.3),
+                margin=dict(l=20, r=20, t=60, b=60)
+            )
+            st.plotly_chart(fig, use_container_width=True)
+        
+            # Tabela complementar
+            st.dataframe(df_baixo_estoque.sort_values("Estoque"), use_container_width=True)
+        else:
+            st.info("Não há produtos com estoque baixo.")
     
-    # Calcular valor em estoque por categoria
-    valor_por_categoria = {}
-    for p in produtos:
-        categoria = p.get("categoria", "Sem categoria")
-        valor = p.get("qnt_estoque", 0) * p.get("preco", 0)
-        valor_por_categoria[categoria] = valor_por_categoria.get(categoria, 0) + valor
+        # Adicionar um novo gráfico de valor em estoque por categoria
+        st.subheader("Valor em Estoque por Categoria")
     
-    df_valor_categoria = pd.DataFrame({
-        "Categoria": list(valor_por_categoria.keys()),
-        "Valor": list(valor_por_categoria.values())
-    })
+        df_valor_categoria = pd.DataFrame({
+            "Categoria": [c["categoria"] for c in metricas["categorias"]],
+            "Valor": [c["valor"] for c in metricas["categorias"]]
+        })
     
-    if not df_valor_categoria.empty:
-        fig = px.bar(
-            df_valor_categoria.sort_values("Valor", ascending=False),
-            x="Categoria",
-            y="Valor",
-            color="Categoria",
-            title="Valor Total em Estoque por Categoria",
-            text_auto='.2s'
-        )
-        fig.update_layout(
-            xaxis_title="Categoria",
-            yaxis_title="Valor em Estoque (R$)",
-            yaxis=dict(tickprefix="R$ "),
-            showlegend=False
-        )
-        st.plotly_chart(fig, use_container_width=True)
-    else:
-        st.info("Não há produtos cadastrados para exibir no gráfico.")
+        if not df_valor_categoria.empty:
+            fig = px.bar(
+                df_valor_categoria.sort_values("Valor", ascending=False),
+                x="Categoria",
+                y="Valor",
+                color="Categoria",
+                title="Valor Total em Estoque por Categoria",
+                text_auto='.2s'
+            )
+            fig.update_layout(
+                xaxis_title="Categoria",
+                yaxis_title="Valor em Estoque (R$)",
+                yaxis=dict(tickprefix="R$ "),
+                showlegend=False
+            )
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("Não há produtos cadastrados para exibir no gráfico.")
+
+    painel_dashboard()
 
 # =========== PRODUTOS ===========
 elif selected_menu == "Produtos":
@@ -317,7 +400,7 @@ elif selected_menu == "Produtos":
     # Submenu para Produtos
     produto_submenu = st.radio(
         "Selecione a operação",
-        ["Cadastrar Produto", "Listar Produtos", "Buscar Produto"]
+        ["Cadastrar Produto", "Importar Produtos", "Listar Produtos", "Buscar Produto"]
     )
     
     if produto_submenu == "Cadastrar Produto":
@@ -355,21 +438,82 @@ elif selected_menu == "Produtos":
                 except ValueError as e:
                     show_error(f"Erro ao cadastrar produto: {str(e)}")
     
+    elif produto_submenu == "Importar Produtos":
+        st.subheader("Importar Produtos em Lote")
+        
+        show_instructions("""
+        Envie um arquivo CSV ou Excel (XLSX) com as colunas:
+        nome, cod_produto, categoria, qnt_estoque, preco, descricao, fornecedor.
+        Produtos com código já cadastrado ou dados inválidos são listados como erro e não interrompem a importação.
+        """)
+        
+        arquivo = st.file_uploader("Arquivo de produtos", type=["csv", "xlsx"])
+        
+        if arquivo is not None and st.button("Importar"):
+            try:
+                with st.spinner("Importando produtos..."):
+                    importados, erros = resumir_importacao(
+                        importar_produtos(sistema["produtos"], arquivo, arquivo.name)
+                    )
+                
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.metric("Produtos Importados", importados)
+                with col2:
+                    st.metric("Linhas com Erro", len(erros))
+                
+                if importados:
+                    show_success(f"{importados} produtos cadastrados com sucesso!")
+                if erros:
+                    st.dataframe(pd.DataFrame(erros), use_container_width=True)
+            except ValueError as e:
+                show_error(f"Erro ao importar produtos: {str(e)}")
+    
     elif produto_submenu == "Listar Produtos":
         st.subheader("Lista de Produtos")
         
         show_instructions("""
-        Aqui você pode visualizar todos os produtos cadastrados no sistema.
-        Use o filtro para encontrar produtos específicos.
+        Aqui você pode visualizar os produtos cadastrados no sistema, uma página por vez.
+        Digite o início do nome ou do código para encontrar produtos específicos.
         """)
         
-        # Buscar produtos do banco
-        produtos = sistema["produtos"].obter_todos_produtos()
-        
-        # Opções de filtro
+        # Opções de filtro e ordenação
         filtro = st.text_input("Filtrar por nome ou código:")
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            ordenacoes = {"Nome": "nome", "Código": "cod_produto", "Estoque": "qnt_estoque", "Preço": "preco"}
+            ordenar_por = st.selectbox("Ordenar por", list(ordenacoes.keys()))
+        with col2:
+            ordem = st.selectbox("Ordem", ["Crescente", "Decrescente"])
+        with col3:
+            tamanho_pagina = st.selectbox("Produtos por página", [25, 50, 100], index=1)
+
+        busca = {
+            "termo": filtro,
+            "ordenar_por": ordenacoes[ordenar_por],
+            "ordem": "asc" if ordem == "Crescente" else "desc",
+            "tamanho_pagina": tamanho_pagina
+        }
+
+        # Voltar à primeira página sempre que a busca mudar
+        if st.session_state.get("busca_produtos") != busca:
+            st.session_state.busca_produtos = busca
+            st.session_state.busca_produtos_cursores = [None]
+        cursores = st.session_state.busca_produtos_cursores
+
+        # Buscar só a página atual no banco
+        pagina = sistema["produtos"].buscar_produtos(
+            **busca,
+            cursor=cursores[-1],
+            projecao={"nome": 1, "cod_produto": 1, "categoria": 1, "qnt_estoque": 1, "preco": 1, "fornecedor": 1}
+        )
+        produtos = pagina["produtos"]
         
         if produtos:
+            total_paginas = max(1, -(-pagina["total"] // tamanho_pagina))
+            st.caption(f"Página {len(cursores)} de {total_paginas} ({pagina['total']} produtos encontrados)")
+
             # Converter para DataFrame
             df_produtos = pd.DataFrame([
                 {
@@ -382,21 +526,37 @@ elif selected_menu == "Produtos":
                 }
                 for p in produtos
             ])
+            st.dataframe(df_produtos, use_container_width=True)
+
+            # Navegação entre páginas
+            col_anterior, col_proxima = st.columns(2)
+            with col_anterior:
+                if len(cursores) > 1 and st.button("Página anterior"):
+                    cursores.pop()
+                    st.rerun()
+            with col_proxima:
+                if pagina["proximo_cursor"] is not None and st.button("Próxima página"):
+                    cursores.append(pagina["proximo_cursor"])
+                    st.rerun()
             
-            # Aplicar filtro se existir
-            if filtro:
-                df_filtrado = df_produtos[
-                    df_produtos["Nome"].str.contains(filtro, case=False) | 
-                    df_produtos["Código"].str.contains(filtro, case=False)
-                ]
-                st.dataframe(df_filtrado, use_container_width=True)
-            else:
-                st.dataframe(df_produtos, use_container_width=True)
-            
-            # Gráfico de estoque por produto
-            st.subheader("Estoque por Produto")
-            fig = px.bar(df_produtos, x="Nome", y="Estoque", color="Categoria")
+            # Gráfico de estoque: só os produtos com maior estoque entre os encontrados
+            st.subheader("Produtos com Maior Estoque")
+            maiores_estoques = sistema["produtos"].buscar_produtos(
+                termo=filtro,
+                ordenar_por="qnt_estoque",
+                ordem="desc",
+                tamanho_pagina=20,
+                projecao={"nome": 1, "categoria": 1, "qnt_estoque": 1},
+                contar=False
+            )["produtos"]
+            df_grafico = pd.DataFrame([
+                {"Nome": p.get("nome", ""), "Estoque": p.get("qnt_estoque", 0), "Categoria": p.get("categoria", "")}
+                for p in maiores_estoques
+            ])
+            fig = px.bar(df_grafico, x="Nome", y="Estoque", color="Categoria")
             st.plotly_chart(fig, use_container_width=True)
+        elif filtro:
+            st.info("Nenhum produto encontrado com esse filtro.")
         else:
             st.info("Não há produtos cadastrados no sistema.")
     
@@ -445,7 +605,7 @@ elif selected_menu == "Clientes":
     # Submenu para Clientes
     cliente_submenu = st.radio(
         "Selecione a operação",
-        ["Cadastrar Cliente", "Listar Clientes", "Buscar Cliente"]
+        ["Cadastrar Cliente", "Importar Clientes", "Listar Clientes", "Buscar Cliente"]
     )
 
     if cliente_submenu == "Cadastrar Cliente":
@@ -483,6 +643,36 @@ elif selected_menu == "Clientes":
                     except ValueError as e:
                         show_error(f"Erro ao cadastrar cliente: {str(e)}")
 
+    elif cliente_submenu == "Importar Clientes":
+        st.subheader("Importar Clientes em Lote")
+
+        show_instructions("""
+        Envie um arquivo CSV ou Excel (XLSX) com as colunas: nome, cpf, email, telefone.
+        CPF, e-mail e telefone são validados para todas as linhas; linhas inválidas ou com CPF já cadastrado são listadas como erro.
+        """)
+
+        arquivo = st.file_uploader("Arquivo de clientes", type=["csv", "xlsx"])
+
+        if arquivo is not None and st.button("Importar"):
+            try:
+                with st.spinner("Importando clientes..."):
+                    importados, erros = resumir_importacao(
+                        importar_clientes(sistema["clientes"], arquivo, arquivo.name)
+                    )
+
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.metric("Clientes Importados", importados)
+                with col2:
+                    st.metric("Linhas com Erro", len(erros))
+
+                if importados:
+                    show_success(f"{importados} clientes cadastrados com sucesso!")
+                if erros:
+                    st.dataframe(pd.DataFrame(erros), use_container_width=True)
+            except ValueError as e:
+                show_error(f"Erro ao importar clientes: {str(e)}")
+
     elif cliente_submenu == "Listar Clientes":
         st.subheader("Lista de Clientes")
 
@@ -557,12 +747,12 @@ elif selected_menu == "Clientes":
                         # Converter para DataFrame
                         df_vendas = pd.DataFrame([
                             {
-                                "Data": v.get("data_venda", "").strftime("%d/%m/%Y %H:%M"),
-                                "Produto": sistema["produtos"].obter_produto(v.get("cod_produto", "")).get("nome", ""),
-                                "Quantidade": v.get("qnt_vendida", 0),
-                                "Valor Total": f"R$ {v.get('valor_total', 0):.2f}"
+                                "Data": linha["data_venda"].strftime("%d/%m/%Y %H:%M"),
+                                "Produto": linha["nome_produto"],
+                                "Quantidade": linha["qnt_vendida"],
+                                "Valor Total": f"R$ {linha['valor_total']:.2f}"
                             }
-                            for v in vendas_cliente
+                            for linha in sistema["vendas"].linhas_itens(vendas_cliente)
                         ])
 
                         st.dataframe(df_vendas, use_container_width=True)
@@ -704,12 +894,18 @@ elif selected_menu == "Estoque":
         Aqui você pode visualizar produtos com estoque abaixo do mínimo recomendado.
         """)
 
-        qnt_minimo = st.slider("Quantidade Mínima", min_value=1, max_value=100, value=20)
+        qnt_minimo = st.slider("Quantidade Mínima", min_value=1, max_value=monitor.estado.limite_estoque, value=20)
 
-        if st.button("Verificar Estoque Baixo"):
-            # Buscar produtos com estoque baixo
-            produtos = sistema["produtos"].obter_todos_produtos()
-            produtos_baixo_estoque = [p for p in produtos if p.get("qnt_estoque", 0) < qnt_minimo]
+        if not monitor.ativo:
+            monitor.recarregar_estado()
+
+        # Lista ao vivo: lida do estado em memória, atualizado pelo monitor de alterações
+        @st.fragment(run_every=INTERVALO_ATUALIZACAO_S if monitor.ativo else None)
+        def alerta_estoque_baixo():
+            produtos_baixo_estoque = monitor.estado.metricas(
+                limite_estoque_baixo=qnt_minimo,
+                max_itens_estoque_baixo=None
+            )["estoque_baixo"]
 
             if produtos_baixo_estoque:
                 st.warning(f"⚠️ {len(produtos_baixo_estoque)} produtos com estoque abaixo do mínimo!")
@@ -762,6 +958,7 @@ elif selected_menu == "Estoque":
             else:
                 st.success("Não há produtos com estoque abaixo do mínimo.")
 
+        alerta_estoque_baixo()
 
 # =========== VENDAS ===========
 elif selected_menu == "Vendas":
@@ -777,8 +974,8 @@ elif selected_menu == "Vendas":
         st.subheader("Registrar Nova Venda")
         
         show_instructions("""
-        Preencha todos os campos para registrar uma venda.
-        O sistema verifica automaticamente a disponibilidade de estoque.
+        Adicione os produtos ao carrinho e selecione o cliente para registrar uma venda.
+        O sistema verifica automaticamente a disponibilidade de estoque de todos os itens.
         Você pode aplicar promoções e descontos antes de finalizar a venda.
         """)
         
@@ -793,8 +990,10 @@ elif selected_menu == "Vendas":
             st.session_state.valor_desconto = 0.0
         if 'tipo_desconto' not in st.session_state:
             st.session_state.tipo_desconto = "Valor (R$)"
-        if 'codigo_promocional' not in st.session_state:
-            st.session_state.codigo_promocional = "PRIMEIRA_COMPRA"
+        if 'codigos_promocionais' not in st.session_state:
+            st.session_state.codigos_promocionais = []
+        if 'carrinho' not in st.session_state:
+            st.session_state.carrinho = {}
             
         # Callbacks simplificados para evitar conflitos
         def toggle_desconto():
@@ -808,48 +1007,67 @@ elif selected_menu == "Vendas":
                 st.session_state.desconto_ativo = False
         
         # Campo para selecionar o produto
-        produtos = sistema["produtos"].obter_todos_produtos()
-        opcoes_produtos = {p.get("cod_produto"): f"{p.get('nome')} (Código: {p.get('cod_produto')}, Estoque: {p.get('qnt_estoque')})" for p in produtos}
-        
-        cod_produto = st.selectbox(
-            "Selecione o Produto *",
-            options=list(opcoes_produtos.keys()),
-            format_func=lambda x: opcoes_produtos.get(x, x)
-        )
-        
-        # Campo para selecionar o cliente
-        clientes = sistema["clientes"].obter_todos_clientes()
-        opcoes_clientes = {c.get("cpf"): f"{c.get('nome')} (CPF: {c.get('cpf')})" for c in clientes}
+        cod_produto = seletor_produto("Selecione o Produto *", "venda_produto")
         
-        cpf_cliente = st.selectbox(
-            "Selecione o Cliente *",
-            options=list(opcoes_clientes.keys()),
-            format_func=lambda x: opcoes_clientes.get(x, x)
-        )
-        
-        # Quantidade a vender
+        # Quantidade a vender (descontando o que já está no carrinho)
         produto_selecionado = sistema["produtos"].obter_produto(cod_produto) if cod_produto else None
         estoque_disponivel = produto_selecionado.get("qnt_estoque", 0) if produto_selecionado else 0
+        estoque_disponivel -= st.session_state.carrinho.get(cod_produto, 0)
+        if produto_selecionado:
+            st.caption(f"Estoque disponível: {estoque_disponivel} | Preço: R$ {produto_selecionado.get('preco', 0):.2f}")
         
         qnt_vendida = st.number_input(
             "Quantidade", 
             min_value=1, 
-            max_value=estoque_disponivel, 
+            max_value=max(estoque_disponivel, 1), 
             value=1,
             key="quantidade_venda"
         )
         
-        # Calcular valores baseados na quantidade e descontos
-        if produto_selecionado:
-            preco_unitario = produto_selecionado.get("preco", 0)
-            valor_total_original = preco_unitario * qnt_vendida
+        if st.button("Adicionar ao Carrinho", disabled=not cod_produto or estoque_disponivel < 1):
+            st.session_state.carrinho[cod_produto] = st.session_state.carrinho.get(cod_produto, 0) + qnt_vendida
+        
+        # Campo para selecionar o cliente
+        cpf_cliente = seletor_cliente("Selecione o Cliente *", "venda_cliente")
+        
+        # Calcular valores baseados no carrinho e descontos
+        carrinho = st.session_state.carrinho
+        if carrinho:
+            # Uma única consulta para todos os produtos do carrinho
+            produtos_carrinho = sistema["produtos"].obter_produtos(list(carrinho.keys()))
+            
+            df_carrinho = pd.DataFrame([
+                {
+                    "Produto": produtos_carrinho.get(cod, {}).get("nome", cod),
+                    "Código": cod,
+                    "Quantidade": qnt,
+                    "Preço Unitário": produtos_carrinho.get(cod, {}).get("preco", 0),
+                    "Subtotal": produtos_carrinho.get(cod, {}).get("preco", 0) * qnt
+                }
+                for cod, qnt in carrinho.items()
+            ])
+            valor_total_original = float(df_carrinho["Subtotal"].sum())
+            
+            st.markdown("### Carrinho")
+            st.dataframe(
+                df_carrinho,
+                use_container_width=True,
+                column_config={
+                    "Preço Unitário": st.column_config.NumberColumn(format="R$ %.2f"),
+                    "Subtotal": st.column_config.NumberColumn(format="R$ %.2f")
+                }
+            )
+            
+            if st.button("Esvaziar Carrinho"):
+                st.session_state.carrinho = {}
+                st.rerun()
             
             st.markdown("### Detalhes da Venda")
             
             col1, col2 = st.columns(2)
             
             with col1:
-                st.info(f"Preço Unitário: R$ {preco_unitario:.2f}")
+                st.info(f"Itens no carrinho: {int(df_carrinho['Quantidade'].sum())}")
             
             # Adicionar opções de desconto/promoção
             st.subheader("Descontos e Promoções")
@@ -907,33 +1125,28 @@ elif selected_menu == "Vendas":
                 aplicar_promocao = st.checkbox("Usar código promocional", 
                                             value=st.session_state.promocao_ativa, on_change=toggle_promocao)
                 
-                promocoes = {
-                    "PRIMEIRA_COMPRA": "15% na primeira compra",
-                    "CLIENTE_VIP": "R$ 50,00 de desconto VIP",
-                    "BLACK_FRIDAY": "25% na Black Friday",
-                    "FRETE_GRATIS": "R$ 20,00 de desconto no frete"
-                }
+                promocoes = {p["codigo"]: p for p in sistema["vendas"].promocoes_disponiveis()}
                 
-                codigo_promocional = st.selectbox(
-                    "Selecione o código promocional",
+                codigos_promocionais = st.multiselect(
+                    "Selecione os códigos promocionais",
                     options=list(promocoes.keys()),
-                    format_func=lambda x: f"{x} - {promocoes.get(x, '')}",
+                    format_func=lambda x: f"{x} - {promocoes[x]['descricao']}" + (" (cumulativa)" if promocoes[x].get("cumulativa") else ""),
                     disabled=not aplicar_promocao,
-                    index=list(promocoes.keys()).index(st.session_state.codigo_promocional) if st.session_state.codigo_promocional in promocoes else 0
+                    default=[c for c in st.session_state.codigos_promocionais if c in promocoes],
+                    help="Promoções cumulativas se somam; das demais vale a de maior desconto."
                 )
-                
-                # Calcular desconto promocional
-                if aplicar_promocao:
-                    if codigo_promocional == "PRIMEIRA_COMPRA":
-                        desconto_aplicado = valor_total_original * 0.15
-                    elif codigo_promocional == "CLIENTE_VIP":
-                        desconto_aplicado = 50.0 if valor_total_original >= 50.0 else valor_total_original
-                    elif codigo_promocional == "BLACK_FRIDAY":
-                        desconto_aplicado = valor_total_original * 0.25
-                    elif codigo_promocional == "FRETE_GRATIS":
-                        desconto_aplicado = 20.0 if valor_total_original >= 20.0 else valor_total_original
-                    
-                    valor_final = valor_total_original - desconto_aplicado
+                st.session_state.codigos_promocionais = codigos_promocionais
+                
+                # Calcular desconto promocional com as regras de cada promoção (validade, categorias, acúmulo)
+                promocao_carrinho = None
+                if aplicar_promocao and codigos_promocionais:
+                    promocao_carrinho = sistema["vendas"].avaliar_carrinho(carrinho, produtos_carrinho, codigos_promocionais)
+                    desconto_aplicado = promocao_carrinho["desconto_aplicado"]
+                    valor_final = promocao_carrinho["valor_final"]
+                    if promocao_carrinho["promocoes"]:
+                        st.caption(f"Aplicadas: {promocao_carrinho['promocao']['descricao']}")
+                    else:
+                        st.warning("Nenhuma das promoções selecionadas se aplica a este carrinho.")
             
             # Mostrar resumo atualizado com desconto (se aplicável) antes de submeter
             with col2:
@@ -950,12 +1163,13 @@ elif selected_menu == "Vendas":
             
             # Botão para registrar a venda
             if st.button("Registrar Venda"):
-                if not cod_produto or not cpf_cliente:
-                    show_error("Por favor, selecione o produto e o cliente.")
+                if not cpf_cliente:
+                    show_error("Por favor, selecione o cliente.")
                 else:
                     try:
-                        # Registrar a venda
-                        venda = sistema["vendas"].registrar_venda(cod_produto, cpf_cliente, qnt_vendida)
+                        # Registrar a venda com todos os itens do carrinho
+                        venda = sistema["vendas"].registrar_venda_carrinho(list(carrinho.items()), cpf_cliente)
+                        st.session_state.carrinho = {}
                         
                         # Aplicar desconto/promoção se selecionado
                         if aplicar_desconto:
@@ -965,10 +1179,10 @@ elif selected_menu == "Vendas":
                                 valor_desconto, 
                                 tipo_desconto=tipo_desc
                             )
-                        elif aplicar_promocao:
+                        elif promocao_carrinho and promocao_carrinho["promocoes"]:
                             desconto_info = sistema["vendas"].aplicar_promocao(
                                 venda["_id"], 
-                                codigo_promocional
+                                [p["codigo"] for p in promocao_carrinho["promocoes"]]
                             )
                         
                         show_success("Venda registrada com sucesso!")
@@ -976,14 +1190,14 @@ elif selected_menu == "Vendas":
                         # Mostrar detalhes da venda
                         st.subheader("Detalhes da Venda")
                         
-                        produto = sistema["produtos"].obter_produto(cod_produto)
                         cliente = sistema["clientes"].obter_cliente(cpf_cliente)
                         
                         col1, col2 = st.columns(2)
                         
                         with col1:
-                            st.markdown(f"**Produto:** {produto.get('nome', '')}")
-                            st.markdown(f"**Quantidade:** {qnt_vendida}")
+                            for item in venda.get("itens", []):
+                                st.markdown(f"**Produto:** {item.get('nome_produto', '')} - {item.get('qnt_vendida', 0)} un.")
+                            st.markdown(f"**Quantidade:** {venda.get('qnt_vendida', 0)}")
                         
                         with col2:
                             st.markdown(f"**Cliente:** {cliente.get('nome', '')}")
@@ -1006,10 +1220,10 @@ elif selected_menu == "Vendas":
                             nota_fiscal = sistema["vendas"].emissao_nota_fiscal(venda.get("_id"), desconto=desconto_info)
                             st.code(nota_fiscal, language=None)
                             
-                    except ValueError as e:
+                    except (ValueError, RuntimeError) as e:
                         show_error(f"Erro ao registrar venda: {str(e)}")
         else:
-            st.warning("Selecione um produto para continuar.")
+            st.warning("Adicione produtos ao carrinho para continuar.")
     
     elif vendas_submenu == "Consultar Vendas":
         st.subheader("Consultar Vendas")
@@ -1041,60 +1255,81 @@ elif selected_menu == "Vendas":
         filtro_tipo = st.radio("Filtrar por:", ["Todos", "Cliente", "Produto"])
         
         if filtro_tipo == "Cliente":
-            clientes = sistema["clientes"].obter_todos_clientes()
-            opcoes_clientes = {c.get("cpf"): f"{c.get('nome')} (CPF: {c.get('cpf')})" for c in clientes}
-            
-            cpf_cliente = st.selectbox(
-                "Selecione o Cliente",
-                options=list(opcoes_clientes.keys()),
-                format_func=lambda x: opcoes_clientes.get(x, x)
-            )
+            cpf_cliente = seletor_cliente("Selecione o Cliente", "consulta_cliente")
         elif filtro_tipo == "Produto":
-            produtos = sistema["produtos"].obter_todos_produtos()
-            opcoes_produtos = {p.get("cod_produto"): f"{p.get('nome')} (Código: {p.get('cod_produto')})" for p in produtos}
-            
-            cod_produto = st.selectbox(
-                "Selecione o Produto",
-                options=list(opcoes_produtos.keys()),
-                format_func=lambda x: opcoes_produtos.get(x, x)
-            )
+            cod_produto = seletor_produto("Selecione o Produto", "consulta_produto")
         
+        ordem = st.radio("Ordenar por data:", ["Mais recentes primeiro", "Mais antigas primeiro"], horizontal=True)
+        tamanho_pagina = st.selectbox("Vendas por página", [25, 50, 100], index=1)
+
         if st.button("Consultar"):
-            # Buscar vendas do banco conforme filtros
-            if filtro_tipo == "Todos":
-                vendas_filtradas = [v for v in sistema["vendas"].obter_todas_vendas() 
-                                   if data_inicio <= v.get("data_venda", dt.datetime.min) <= data_fim]
-            elif filtro_tipo == "Cliente":
-                vendas_filtradas = [v for v in sistema["vendas"].obter_venda_por_cliente(cpf_cliente)
-                                   if data_inicio <= v.get("data_venda", dt.datetime.min) <= data_fim]
-            else:  # Produto
-                vendas_filtradas = [v for v in sistema["vendas"].obter_todas_vendas()
-                                   if v.get("cod_produto") == cod_produto and
-                                   data_inicio <= v.get("data_venda", dt.datetime.min) <= data_fim]
+            if (filtro_tipo == "Cliente" and not cpf_cliente) or (filtro_tipo == "Produto" and not cod_produto):
+                show_error(f"Por favor, selecione o {filtro_tipo.lower()}.")
+                st.stop()
+
+            # Os filtros vão para o banco; as páginas são lidas conforme a navegação
+            st.session_state.consulta_vendas = {
+                "data_inicio": data_inicio,
+                "data_fim": data_fim,
+                "cpf_cliente": cpf_cliente if filtro_tipo == "Cliente" else None,
+                "cod_produto": cod_produto if filtro_tipo == "Produto" else None
+            }
+            st.session_state.consulta_vendas_ordem = "desc" if ordem == "Mais recentes primeiro" else "asc"
+            st.session_state.consulta_vendas_tamanho = tamanho_pagina
+            # Cursores do início de cada página já visitada (a primeira começa sem cursor)
+            st.session_state.consulta_vendas_cursores = [None]
+
+        if st.session_state.get("consulta_vendas"):
+            filtros = st.session_state.consulta_vendas
+            cursores = st.session_state.consulta_vendas_cursores
+
+            pagina = sistema["vendas"].consultar_vendas(
+                **filtros,
+                ordem=st.session_state.consulta_vendas_ordem,
+                tamanho_pagina=st.session_state.consulta_vendas_tamanho,
+                cursor=cursores[-1]
+            )
             
-            if vendas_filtradas:
-                # Converter para DataFrame
+            if pagina["vendas"]:
+                numero_pagina = len(cursores)
+                total_paginas = max(1, -(-pagina["total"] // st.session_state.consulta_vendas_tamanho))
+                st.caption(f"Página {numero_pagina} de {total_paginas} ({pagina['total']} vendas encontradas)")
+
+                # Nomes de produtos e clientes resolvidos com uma consulta de cada
                 df_vendas = pd.DataFrame([
                     {
-                        "Data": v.get("data_venda", "").strftime("%d/%m/%Y %H:%M"),
-                        "Produto": db["estoque_produtos"].find_one({"cod_produto": v.get("cod_produto", "")}).get("nome", ""),
-                        "Cliente": db["clientes"].find_one({"cpf": v.get("cpf_cliente", "")}).get("nome", ""),
-                        "Quantidade": v.get("qnt_vendida", 0),
-                        "Valor Total": v.get("valor_total", 0)
+                        "Data": linha["data_venda"].strftime("%d/%m/%Y %H:%M"),
+                        "Produto": linha["nome_produto"],
+                        "Cliente": linha["nome_cliente"],
+                        "Quantidade": linha["qnt_vendida"],
+                        "Valor Total": linha["valor_total"]
                     }
-                    for v in vendas_filtradas
+                    for linha in sistema["vendas"].linhas_itens(pagina["vendas"])
                 ])
                 
                 # Exibir tabela
                 df_vendas_display = df_vendas.copy()
                 df_vendas_display["Valor Total"] = df_vendas_display["Valor Total"].apply(lambda x: f"R$ {x:.2f}")
                 st.dataframe(df_vendas_display, use_container_width=True)
-                
-                # Resumo das vendas
+
+                # Navegação entre páginas
+                col_anterior, col_proxima = st.columns(2)
+                with col_anterior:
+                    if numero_pagina > 1 and st.button("Página anterior"):
+                        cursores.pop()
+                        st.rerun()
+                with col_proxima:
+                    if pagina["proximo_cursor"] is not None and st.button("Próxima página"):
+                        cursores.append(pagina["proximo_cursor"])
+                        st.rerun()
+                
+                # Resumo das vendas (de todo o resultado, agregado no banco)
                 st.subheader("Resumo")
                 
-                qtd_vendas = len(df_vendas)
-                valor_total = df_vendas["Valor Total"].sum()
+                vendas_por_dia = pd.DataFrame(sistema["vendas"].totais_por_dia(**filtros))
+                vendas_por_dia = vendas_por_dia.rename(columns={"dia": "Data_Dia", "valor_total": "Valor Total"})
+                qtd_vendas = pagina["total"]
+                valor_total = vendas_por_dia["Valor Total"].sum()
                 
                 col1, col2 = st.columns(2)
                 
@@ -1104,13 +1339,8 @@ elif selected_menu == "Vendas":
                 with col2:
                     st.metric("Valor Total", f"R$ {valor_total:.2f}")
                 
-                # Agrupar vendas por dia
-                df_vendas["Data_Dia"] = pd.to_datetime(df_vendas["Data"]).dt.date
-                vendas_por_dia = df_vendas.groupby("Data_Dia")["Valor Total"].sum().reset_index()
-                
                 fig = px.line(vendas_por_dia, x="Data_Dia", y="Valor Total", markers=True)
                 fig.update_layout(yaxis_title="Valor Total (R$)")
-                st.plotly_chart(fig, use_container_width=True)
                 
                 # Adicionar área sob a curva
                 fig.add_traces(
@@ -1166,7 +1396,8 @@ elif selected_menu == "Vendas":
                 
                 if venda:
                     # Mostrar detalhes da venda
-                    produto = sistema["produtos"].obter_produto(venda.get("cod_produto", ""))
+                    itens = itens_da_venda(venda)
+                    produtos_venda = sistema["produtos"].obter_produtos([item.get("cod_produto") for item in itens])
                     cliente = sistema["clientes"].obter_cliente(venda.get("cpf_cliente", ""))
                     
                     st.subheader("Detalhes da Venda")
@@ -1174,7 +1405,9 @@ elif selected_menu == "Vendas":
                     col1, col2 = st.columns(2)
                     
                     with col1:
-                        st.markdown(f"**Produto:** {produto.get('nome', '')}")
+                        for item in itens:
+                            produto = produtos_venda.get(item.get("cod_produto"), {})
+                            st.markdown(f"**Produto:** {produto.get('nome', '')} - {item.get('qnt_vendida', 0)} un.")
                         st.markdown(f"**Quantidade:** {venda.get('qnt_vendida', 0)}")
                     
                     with col2:
@@ -1218,12 +1451,15 @@ elif selected_menu == "Vendas":
                             desconto = sistema["vendas"].descontos(id_venda, perc_desconto, "porcentagem")
                     
                     elif desconto_option == "Código Promocional":
-                        codigo_promocao = st.selectbox(
-                            "Selecione o código promocional",
-                            ["PRIMEIRA_COMPRA", "CLIENTE_VIP", "BLACK_FRIDAY", "FRETE_GRATIS"]
+                        promocoes = {p["codigo"]: p["descricao"] for p in sistema["vendas"].promocoes_disponiveis(venda["data_venda"])}
+                        codigos_promocao = st.multiselect(
+                            "Selecione os códigos promocionais",
+                            options=list(promocoes.keys()),
+                            format_func=lambda x: f"{x} - {promocoes[x]}"
                         )
                         
-                        desconto = sistema["vendas"].aplicar_promocao(id_venda, codigo_promocao)
+                        if codigos_promocao:
+                            desconto = sistema["vendas"].aplicar_promocao(id_venda, codigos_promocao)
                     
                     # Botão para emitir nota fiscal
                     if st.button("Emitir Nota Fiscal"):
@@ -1242,6 +1478,61 @@ elif selected_menu == "Vendas":
                     st.warning(f"Venda com ID '{id_venda}' não encontrada.")
             except Exception as e:
                 show_error(f"Erro ao obter venda: {str(e)}")
+        
+        # Emissão em lote: as notas do período ficam no GridFS (cada nota é gerada uma só vez,
+        # mesmo em emissões repetidas) e são baixadas em um zip montado em memória
+        with st.expander("Emissão em Lote"):
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                lote_inicio = st.date_input(
+                    "Data Inicial",
+                    value=dt.datetime.now() - dt.timedelta(days=30),
+                    key="notas_lote_inicio"
+                )
+            
+            with col2:
+                lote_fim = st.date_input("Data Final", value=dt.datetime.now(), key="notas_lote_fim")
+            
+            nome_zip = f"notas_fiscais_{lote_inicio.strftime('%Y%m%d')}_{lote_fim.strftime('%Y%m%d')}.zip"
+            
+            if st.button("Gerar Notas do Período"):
+                st.session_state.pop("notas_lote", None)
+                try:
+                    with st.spinner("Gerando notas fiscais..."), sistema["notas_fiscais"].destino_gridfs() as destino:
+                        # processos=1: nada de pool de processos dentro do servidor do Streamlit
+                        resultado = sistema["notas_fiscais"].emitir(
+                            destino,
+                            data_inicio=dt.datetime.combine(lote_inicio, dt.time.min),
+                            data_fim=dt.datetime.combine(lote_fim, dt.time.max),
+                            processos=1
+                        )
+                        arquivo = io.BytesIO()
+                        destino.compactar(arquivo, resultado["chaves"])
+                    st.session_state.notas_lote = {
+                        "nome": nome_zip,
+                        "dados": arquivo.getvalue(),
+                        "emitidas": resultado["emitidas"],
+                        "existentes": resultado["existentes"]
+                    }
+                except Exception as e:
+                    show_error(f"Erro ao gerar notas fiscais: {str(e)}")
+            
+            notas_lote = st.session_state.get("notas_lote")
+            if notas_lote and notas_lote["nome"] == nome_zip:
+                if notas_lote["emitidas"] or notas_lote["existentes"]:
+                    st.caption(
+                        f"{notas_lote['emitidas']} nota(s) fiscal(is) gerada(s), "
+                        f"{notas_lote['existentes']} já emitida(s) anteriormente."
+                    )
+                    st.download_button(
+                        label="Baixar Notas Fiscais (ZIP)",
+                        data=notas_lote["dados"],
+                        file_name=nome_zip,
+                        mime="application/zip"
+                    )
+                else:
+                    st.info("Não há vendas no período selecionado.")
 
 # =========== RELATÓRIOS ===========
 elif selected_menu == "Relatórios":
@@ -1279,90 +1570,76 @@ elif selected_menu == "Relatórios":
         data_fim = dt.datetime.combine(data_fim, dt.time.max)
         
         if st.button("Gerar Relatório"):
-            # Usar a função de relatório do backend
-            # Como a função só imprime, vamos capturar o resultado em um DataFrame para exibir
-            vendas = db["vendas"].find({
-                "data_venda": {
-                    "$gte": data_inicio,
-                    "$lte": data_fim
-                }
-            })
-
-            vendas_lista = list(vendas)
+            resultado = sistema["relatorios"].relatorio_vendas_periodo(data_inicio, data_fim)
+            df_vendas = resultado.para_dataframe()
             
-            if vendas_lista:
-                # Converter para DataFrame
-                df_vendas = pd.DataFrame([
-                    {
-                        "Data": v.get("data_venda", "").strftime("%d/%m/%Y %H:%M"),
-                        "Produto": db["estoque_produtos"].find_one({"cod_produto": v.get("cod_produto", "")}).get("nome", ""),
-                        "Cliente": db["clientes"].find_one({"cpf": v.get("cpf_cliente", "")}).get("nome", ""),
-                        "Quantidade": v.get("qnt_vendida", 0),
-                        "Valor Total": v.get("valor_total", 0)
-                    }
-                    for v in vendas_lista
-                ])
+            if not df_vendas.empty:
+                df_vendas = df_vendas.rename(columns={
+                    "data_venda": "Data",
+                    "nome_produto": "Produto",
+                    "nome_cliente": "Cliente",
+                    "qnt_vendida": "Quantidade",
+                    "valor_total": "Valor Total"
+                })[["Data", "Produto", "Cliente", "Quantidade", "Valor Total"]]
                 
                 # Exibir tabela
-                df_vendas_display = df_vendas.copy()
-                df_vendas_display["Valor Total"] = df_vendas_display["Valor Total"].apply(lambda x: f"R$ {x:.2f}")
-                st.dataframe(df_vendas_display, use_container_width=True)
+                st.dataframe(df_vendas, use_container_width=True,
+                             column_config={"Data": COLUNA_DATA_HORA, "Valor Total": COLUNA_MOEDA})
                 
-                # Resumo
-                total_vendas = len(vendas_lista)
-                valor_total = sum(v.get("valor_total", 0) for v in vendas_lista)
-                ticket_medio = valor_total / total_vendas if total_vendas > 0 else 0
+                # Resumo (calculado no banco)
+                resumo = resultado.resumo
                 
                 col1, col2, col3 = st.columns(3)
                 
                 with col1:
-                    st.metric("Total de Vendas", f"{total_vendas}")
+                    st.metric("Total de Vendas", f"{resumo['total_vendas']}")
                 
                 with col2:
-                    st.metric("Valor Total", f"R$ {valor_total:.2f}")
+                    st.metric("Valor Total", f"R$ {resumo['valor_total']:.2f}")
                 
                 with col3:
-                    st.metric("Ticket Médio", f"R$ {ticket_medio:.2f}")
+                    st.metric("Ticket Médio", f"R$ {resumo['ticket_medio']:.2f}")
                 
-                # Gráficos
-                st.subheader("Valor de Vendas por Dia")
+                # Gráficos (lidos dos totais pré-agregados de vendas)
+                tendencia = sistema["relatorios"].relatorio_vendas_tendencia(data_inicio, data_fim)
+                rotulo_intervalo = {"hora": "Hora", "dia": "Dia", "mes": "Mês"}[tendencia.resumo["granularidade"]]
+                st.subheader(f"Valor de Vendas por {rotulo_intervalo}")
                 
-                # Agrupar vendas por dia
-                df_vendas["Data_Dia"] = pd.to_datetime(df_vendas["Data"]).dt.date
-                vendas_por_dia = df_vendas.groupby("Data_Dia")["Valor Total"].sum().reset_index()
+                vendas_por_intervalo = tendencia.para_dataframe().rename(
+                    columns={"inicio": rotulo_intervalo, "valor_total": "Valor Total"}
+                )
                 
-                fig = px.line(vendas_por_dia, x="Data_Dia", y="Valor Total", markers=True)
+                fig = px.line(vendas_por_intervalo, x=rotulo_intervalo, y="Valor Total", markers=True)
                 fig.update_layout(yaxis_title="Valor Total (R$)")
                 st.plotly_chart(fig, use_container_width=True)
                 
                 # Vendas por produto
                 st.subheader("Vendas por Produto")
                 
-                vendas_por_produto = df_vendas.groupby("Produto").agg({
-                    "Quantidade": "sum",
-                    "Valor Total": "sum"
-                }).reset_index()
+                vendas_por_produto = sistema["relatorios"].relatorio_vendas_por_produto(data_inicio, data_fim).para_dataframe()
+                vendas_por_produto = vendas_por_produto.rename(columns={
+                    "nome_produto": "Produto",
+                    "qnt_vendida": "Quantidade",
+                    "valor_total": "Valor Total"
+                })
                 
                 fig = px.bar(vendas_por_produto, x="Produto", y="Valor Total", color="Produto")
                 st.plotly_chart(fig, use_container_width=True)
-                
-                # Opção para exportar
-                csv = df_vendas.to_csv(index=False)
-                
-                st.download_button(
-                    label="Exportar Relatório (CSV)",
-                    data=csv,
-                    file_name=f"relatorio_vendas_{data_inicio.strftime('%Y%m%d')}_{data_fim.strftime('%Y%m%d')}.csv",
-                    mime="text/csv"
-                )
             else:
                 st.info("Não há vendas no período selecionado.")
+        
+        exportar_relatorio(
+            "vendas",
+            lambda: sistema["relatorios"].relatorio_vendas_periodo(data_inicio, data_fim),
+            f"relatorio_vendas_{data_inicio.strftime('%Y%m%d')}_{data_fim.strftime('%Y%m%d')}"
+        )
     
     elif relatorio_submenu == "Estoque Atual":
         st.subheader("Relatório de Estoque Atual")
         
         show_instructions("""
         Visualize a situação atual do estoque, ordenado por quantidade ou valor.
+        Para o fechamento de um período, marque a opção de data e veja o estoque no fim do dia escolhido.
         """)
         
         ordenar_por = st.radio(
@@ -1370,71 +1647,57 @@ elif selected_menu == "Relatórios":
             ["Quantidade", "Valor em Estoque"]
         )
         
+        em_data = st.checkbox("Estoque em uma data (fechamento)")
+        if em_data:
+            data_estoque = st.date_input("Data", value=dt.date.today() - dt.timedelta(days=1))
+        
+        campo_ordenacao = "qnt_estoque" if ordenar_por == "Quantidade" else "valor_estoque"
+        
+        def gerar_relatorio_estoque():
+            if em_data:
+                # Fotografia do estoque mais próxima mais as movimentações seguintes
+                return sistema["relatorios"].relatorio_estoque_em(
+                    dt.datetime.combine(data_estoque, dt.time.max), campo_ordenacao, decrescente=True
+                )
+            # Ordenação e valor em estoque calculados no banco
+            return sistema["relatorios"].relatorio_estoque(campo_ordenacao, decrescente=True)
+        
         if st.button("Gerar Relatório"):
-            # Buscar produtos do banco
-            produtos = sistema["produtos"].obter_todos_produtos()
+            resultado = gerar_relatorio_estoque()
+            df_relatorio = resultado.para_dataframe()
             
-            if produtos:
-                # Ordenar conforme seleção
-                if ordenar_por == "Quantidade":
-                    produtos_ordenados = sorted(produtos, key=lambda x: x.get("qnt_estoque", 0), reverse=True)
-                else:  # Valor em Estoque
-                    produtos_ordenados = sorted(
-                        produtos, 
-                        key=lambda x: x.get("qnt_estoque", 0) * x.get("preco", 0), 
-                        reverse=True
-                    )
-                
-                # Converter para DataFrame
-                df_estoque = pd.DataFrame([
-                    {
-                        "Produto": p.get("nome", ""),
-                        "Código": p.get("cod_produto", ""),
-                        "Categoria": p.get("categoria", ""),
-                        "Quantidade": p.get("qnt_estoque", 0),
-                        "Preço Unitário": p.get("preco", 0),
-                        "Valor em Estoque": p.get("qnt_estoque", 0) * p.get("preco", 0)
-                    }
-                    for p in produtos_ordenados
-                ])
-                
-                # Formatar valores monetários
-                df_estoque_display = df_estoque.copy()
-                df_estoque_display["Preço Unitário"] = df_estoque_display["Preço Unitário"].apply(lambda x: f"R$ {x:.2f}")
-                df_estoque_display["Valor em Estoque"] = df_estoque_display["Valor em Estoque"].apply(lambda x: f"R$ {x:.2f}")
+            if not df_relatorio.empty:
+                df_estoque = df_relatorio.rename(columns={
+                    "nome": "Produto",
+                    "cod_produto": "Código",
+                    "categoria": "Categoria",
+                    "qnt_estoque": "Quantidade",
+                    "preco": "Preço Unitário",
+                    "valor_estoque": "Valor em Estoque"
+                })[["Produto", "Código", "Categoria", "Quantidade", "Preço Unitário", "Valor em Estoque"]]
                 
                 # Exibir tabela
-                st.dataframe(df_estoque_display, use_container_width=True)
+                st.dataframe(df_estoque, use_container_width=True,
+                             column_config={"Preço Unitário": COLUNA_MOEDA, "Valor em Estoque": COLUNA_MOEDA})
                 
-                # Resumo
-                total_produtos = len(produtos)
-                total_itens = sum(p.get("qnt_estoque", 0) for p in produtos)
-                valor_total_estoque = sum(p.get("qnt_estoque", 0) * p.get("preco", 0) for p in produtos)
+                # Resumo (calculado no banco)
+                resumo = resultado.resumo
                 
                 col1, col2, col3 = st.columns(3)
                 
                 with col1:
-                    st.metric("Total de Produtos", f"{total_produtos}")
+                    st.metric("Total de Produtos", f"{resumo['total_produtos']}")
                 
                 with col2:
-                    st.metric("Total de Itens", f"{total_itens}")
+                    st.metric("Total de Itens", f"{resumo['total_itens']}")
                 
                 with col3:
-                    st.metric("Valor Total em Estoque", f"R$ {valor_total_estoque:.2f}")
+                    st.metric("Valor Total em Estoque", f"R$ {resumo['valor_total_estoque']:.2f}")
                 
                 # Gráficos
                 st.subheader("Quantidade por Produto")
                 
-                # Remover formatação para gráficos
-                df_grafico = pd.DataFrame([
-                    {
-                        "Produto": p.get("nome", ""),
-                        "Quantidade": p.get("qnt_estoque", 0),
-                        "Valor em Estoque": p.get("qnt_estoque", 0) * p.get("preco", 0),
-                        "Categoria": p.get("categoria", "")
-                    }
-                    for p in produtos_ordenados
-                ])
+                df_grafico = df_estoque[["Produto", "Quantidade", "Valor em Estoque", "Categoria"]]
                 
                 # Top 10 produtos por quantidade
                 df_top10_qtd = df_grafico.sort_values("Quantidade", ascending=False).head(10)
@@ -1463,18 +1726,14 @@ elif selected_menu == "Relatórios":
                 )
                 
                 st.plotly_chart(fig, use_container_width=True)
-                
-                # Opção para exportar
-                csv = df_estoque.to_csv(index=False)
-                
-                st.download_button(
-                    label="Exportar Relatório (CSV)",
-                    data=csv,
-                    file_name="relatorio_estoque.csv",
-                    mime="text/csv"
-                )
             else:
                 st.info("Não há produtos cadastrados no sistema.")
+        
+        exportar_relatorio(
+            "estoque",
+            gerar_relatorio_estoque,
+            f"relatorio_estoque_{data_estoque.strftime('%Y%m%d') if em_data else 'atual'}_{campo_ordenacao}"
+        )
     
     elif relatorio_submenu == "Produtos Mais Vendidos":
         st.subheader("Relatório de Produtos Mais Vendidos")
@@ -1501,69 +1760,31 @@ elif selected_menu == "Relatórios":
         
         data_inicio = dt.datetime.combine(data_inicio, dt.time.min)
         
+        ordenacao = "quantidade" if ordenar_por == "Quantidade Vendida" else "valor"
+        
         if st.button("Gerar Relatório"):
-            # Usar agregação do MongoDB para obter produtos mais vendidos
-            pipeline = []
-            
-            # Filtro de data
-            pipeline.append({
-                "$match": {
-                    "data_venda": {"$gte": data_inicio}
-                }
-            })
-            
-            # Agrupamento
-            pipeline.append({
-                "$group": {
-                    "_id": "$cod_produto",
-                    "total_vendas": {"$sum": "$qnt_vendida"},
-                    "valor_total": {"$sum": "$valor_total"}
-                }
-            })
-            
-            # Ordenação
-            sort_field = "total_vendas" if ordenar_por == "Quantidade Vendida" else "valor_total"
-            pipeline.append({
-                "$sort": {sort_field: -1}
-            })
-            
-            # Limite
-            pipeline.append({
-                "$limit": limite
-            })
-            
-            # Executar pipeline
-            produtos_mais_vendidos = list(db["vendas"].aggregate(pipeline))
+            resultado = sistema["relatorios"].relatorio_produtos_mais_vendidos(
+                limite,
+                data_inicio=data_inicio,
+                ordenar_por=ordenacao
+            )
+            df_relatorio = resultado.para_dataframe()
             
-            if produtos_mais_vendidos:
-                # Buscar informações adicionais dos produtos
-                produtos_info = []
-                for p in produtos_mais_vendidos:
-                    produto = db["estoque_produtos"].find_one({"cod_produto": p["_id"]})
-                    if produto:
-                        produtos_info.append({
-                            "Produto": produto.get("nome", ""),
-                            "Código": p["_id"],
-                            "Categoria": produto.get("categoria", ""),
-                            "Quantidade Vendida": p["total_vendas"],
-                            "Valor Total": p["valor_total"],
-                            "Preço Médio": p["valor_total"] / p["total_vendas"]
-                        })
-                
-                # Converter para DataFrame
-                df_produtos_vendidos = pd.DataFrame(produtos_info)
-                
-                # Formatar valores monetários
-                df_produtos_vendidos_display = df_produtos_vendidos.copy()
-                df_produtos_vendidos_display["Valor Total"] = df_produtos_vendidos_display["Valor Total"].apply(lambda x: f"R$ {x:.2f}")
-                df_produtos_vendidos_display["Preço Médio"] = df_produtos_vendidos_display["Preço Médio"].apply(lambda x: f"R$ {x:.2f}")
+            if not df_relatorio.empty:
+                df_produtos_vendidos = df_relatorio.rename(columns={
+                    "nome_produto": "Produto",
+                    "cod_produto": "Código",
+                    "categoria": "Categoria",
+                    "qnt_vendida": "Quantidade Vendida",
+                    "valor_total": "Valor Total",
+                    "preco_medio": "Preço Médio"
+                })[["Produto", "Código", "Categoria", "Quantidade Vendida", "Valor Total", "Preço Médio"]]
                 
                 # Exibir tabela
-                st.dataframe(df_produtos_vendidos_display, use_container_width=True)
+                st.dataframe(df_produtos_vendidos, use_container_width=True,
+                             column_config={"Valor Total": COLUNA_MOEDA, "Preço Médio": COLUNA_MOEDA})
                 
                 # Gráficos
-                df_grafico = pd.DataFrame(produtos_info)
-                
                 if ordenar_por == "Quantidade Vendida":
                     st.subheader("Produtos por Quantidade Vendida")
                     
@@ -1641,18 +1862,16 @@ elif selected_menu == "Relatórios":
                 )
                 
                 st.plotly_chart(fig2, use_container_width=True)
-                
-                # Opção para exportar
-                csv = df_produtos_vendidos.to_csv(index=False)
-                
-                st.download_button(
-                    label="Exportar Relatório (CSV)",
-                    data=csv,
-                    file_name="relatorio_produtos_mais_vendidos.csv",
-                    mime="text/csv"
-                )
             else:
                 st.info("Não há vendas registradas no período selecionado.")
+        
+        exportar_relatorio(
+            "mais_vendidos",
+            lambda: sistema["relatorios"].relatorio_produtos_mais_vendidos(
+                limite, data_inicio=data_inicio, ordenar_por=ordenacao
+            ),
+            f"relatorio_produtos_mais_vendidos_{limite}_{ordenacao}_{data_inicio.strftime('%Y%m%d')}"
+        )
     
     elif relatorio_submenu == "Clientes Top":
         st.subheader("Relatório de Clientes Top")
@@ -1679,70 +1898,31 @@ elif selected_menu == "Relatórios":
         
         data_inicio = dt.datetime.combine(data_inicio, dt.time.min)
         
+        ordenacao = "valor" if ordenar_por == "Valor Total" else "compras"
+        
         if st.button("Gerar Relatório"):
-            # Usar agregação do MongoDB para obter clientes top
-            pipeline = []
-            
-            # Filtro de data
-            pipeline.append({
-                "$match": {
-                    "data_venda": {"$gte": data_inicio}
-                }
-            })
-            
-            # Agrupamento
-            pipeline.append({
-                "$group": {
-                    "_id": "$cpf_cliente",
-                    "total_compras": {"$sum": 1},
-                    "valor_total": {"$sum": "$valor_total"},
-                    "quantidade_produtos": {"$sum": "$qnt_vendida"}
-                }
-            })
-            
-            # Ordenação
-            sort_field = "valor_total" if ordenar_por == "Valor Total" else "total_compras"
-            pipeline.append({
-                "$sort": {sort_field: -1}
-            })
-            
-            # Limite
-            pipeline.append({
-                "$limit": limite
-            })
-            
-            # Executar pipeline
-            clientes_top = list(db["vendas"].aggregate(pipeline))
+            resultado = sistema["relatorios"].relatorio_clientes_top(
+                limite,
+                data_inicio=data_inicio,
+                ordenar_por=ordenacao
+            )
+            df_relatorio = resultado.para_dataframe()
             
-            if clientes_top:
-                # Buscar informações adicionais dos clientes
-                clientes_info = []
-                for c in clientes_top:
-                    cliente = db["clientes"].find_one({"cpf": c["_id"]})
-                    if cliente:
-                        clientes_info.append({
-                            "Cliente": cliente.get("nome", ""),
-                            "CPF": c["_id"],
-                            "Total de Compras": c["total_compras"],
-                            "Quantidade de Produtos": c["quantidade_produtos"],
-                            "Valor Total": c["valor_total"],
-                            "Ticket Médio": c["valor_total"] / c["total_compras"]
-                        })
-                
-                # Converter para DataFrame
-                df_clientes_top = pd.DataFrame(clientes_info)
-                
-                # Formatar valores monetários
-                df_clientes_top_display = df_clientes_top.copy()
-                df_clientes_top_display["Valor Total"] = df_clientes_top_display["Valor Total"].apply(lambda x: f"R$ {x:.2f}")
-                df_clientes_top_display["Ticket Médio"] = df_clientes_top_display["Ticket Médio"].apply(lambda x: f"R$ {x:.2f}")
+            if not df_relatorio.empty:
+                df_clientes_top = df_relatorio.rename(columns={
+                    "nome_cliente": "Cliente",
+                    "cpf_cliente": "CPF",
+                    "total_compras": "Total de Compras",
+                    "qnt_produtos": "Quantidade de Produtos",
+                    "valor_total": "Valor Total",
+                    "ticket_medio": "Ticket Médio"
+                })[["Cliente", "CPF", "Total de Compras", "Quantidade de Produtos", "Valor Total", "Ticket Médio"]]
                 
                 # Exibir tabela
-                st.dataframe(df_clientes_top_display, use_container_width=True)
+                st.dataframe(df_clientes_top, use_container_width=True,
+                             column_config={"Valor Total": COLUNA_MOEDA, "Ticket Médio": COLUNA_MOEDA})
                 
                 # Gráficos
-                df_grafico = pd.DataFrame(clientes_info)
-                
                 if ordenar_por == "Valor Total":
                     st.subheader("Clientes por Valor Total Gasto")
                     
@@ -1814,18 +1994,14 @@ elif selected_menu == "Relatórios":
                 fig2.update_layout(margin=dict(t=50, l=25, r=25, b=25))
                 
                 st.plotly_chart(fig2, use_container_width=True)
-                
-                # Opção para exportar
-                csv = df_clientes_top.to_csv(index=False)
-                
-                st.download_button(
-                    label="Exportar Relatório (CSV)",
-                    data=csv,
-                    file_name="relatorio_clientes_top.csv",
-                    mime="text/csv"
-                )
             else:
                 st.info("Não há vendas registradas no período selecionado.")
+        
+        exportar_relatorio(
+            "clientes_top",
+            lambda: sistema["relatorios"].relatorio_clientes_top(limite, data_inicio=data_inicio, ordenar_por=ordenacao),
+            f"relatorio_clientes_top_{limite}_{ordenacao}_{data_inicio.strftime('%Y%m%d')}"
+        )
     
     elif relatorio_submenu == "Movimentações de Estoque":
         st.subheader("Relatório de Movimentações de Estoque")
@@ -1858,59 +2034,34 @@ elif selected_menu == "Relatórios":
             ["Todos", "Entrada", "Saída", "Ajuste"]
         )
         
-        tipo_movimentacao = None if filtro_tipo == "Todos" else filtro_tipo.lower()
+        tipo_movimentacao = {"Entrada": "entrada", "Saída": "saida", "Ajuste": "ajuste"}.get(filtro_tipo)
         
         # Filtro por produto
-        produtos = sistema["produtos"].obter_todos_produtos()
-        opcoes_produtos = {"": "Todos os Produtos"}
-        opcoes_produtos.update({p.get("cod_produto"): f"{p.get('nome')} (Código: {p.get('cod_produto')})" for p in produtos})
-        
-        cod_produto = st.selectbox(
-            "Produto",
-            options=list(opcoes_produtos.keys()),
-            format_func=lambda x: opcoes_produtos.get(x, x)
-        )
+        cod_produto = seletor_produto("Produto", "movimentacoes_produto", opcao_todos="Todos os Produtos")
         
         if cod_produto == "":
             cod_produto = None
         
         if st.button("Gerar Relatório"):
             try:
-                # Chamar a função do relatório, mas vamos capturar o resultado em um DataFrame para exibir
-                # Construir filtro para consulta ao MongoDB
-                filtro = {}
-                
-                if data_inicio and data_fim:
-                    filtro["data_movimentacao"] = {
-                        "$gte": data_inicio,
-                        "$lte": data_fim
-                    }
-                
-                if cod_produto:
-                    filtro["cod_produto"] = cod_produto
-                    
-                if tipo_movimentacao:
-                    filtro["tipo_movimentacao"] = tipo_movimentacao
-                
-                # Buscar movimentações
-                movimentacoes = db["movimentacoes_estoque"].find(filtro).sort("data_movimentacao", -1)
-                
-                lista_movimentacoes = list(movimentacoes)
-                
-                if lista_movimentacoes:
-                    # Converter para DataFrame
-                    df_movimentacoes = pd.DataFrame([
-                        {
-                            "Data": mov.get("data_movimentacao", "").strftime("%d/%m/%Y %H:%M"),
-                            "Produto": mov.get("nome_produto", ""),
-                            "Código": mov.get("cod_produto", ""),
-                            "Tipo": mov.get("tipo_movimentacao", "").capitalize(),
-                            "Quantidade": mov.get("quantidade", 0),
-                            "Estoque Final": mov.get("estoque_resultante", 0),
-                            "Motivo": mov.get("motivo", "")
-                        }
-                        for mov in lista_movimentacoes
-                    ])
+                resultado = sistema["relatorios"].relatorio_movimentacoes(
+                    data_inicio, data_fim, cod_produto, tipo_movimentacao
+                )
+                df_relatorio = resultado.para_dataframe()
+                
+                if not df_relatorio.empty:
+                    df_movimentacoes = df_relatorio.rename(columns={
+                        "data_movimentacao": "Data",
+                        "nome_produto": "Produto",
+                        "cod_produto": "Código",
+                        "tipo_movimentacao": "Tipo",
+                        "quantidade": "Quantidade",
+                        "estoque_resultante": "Estoque Final",
+                        "motivo": "Motivo"
+                    })[["Data", "Produto", "Código", "Tipo", "Quantidade", "Estoque Final", "Motivo"]]
+                    df_movimentacoes["Data_Dia"] = df_movimentacoes["Data"].dt.date
+                    df_movimentacoes["Data"] = df_movimentacoes["Data"].dt.strftime("%d/%m/%Y %H:%M")
+                    df_movimentacoes["Tipo"] = df_movimentacoes["Tipo"].str.capitalize()
                     
                     # Formatar quantidade com sinal
                     def formatar_quantidade(row):
@@ -1929,10 +2080,11 @@ elif selected_menu == "Relatórios":
                     # Exibir tabela
                     st.dataframe(df_movimentacoes[["Data", "Produto", "Tipo", "Quantidade Formatada", "Estoque Final", "Motivo"]], use_container_width=True)
                     
-                    # Resumo
-                    total_movimentacoes = len(lista_movimentacoes)
-                    total_entradas = sum(mov.get("quantidade", 0) for mov in lista_movimentacoes if mov.get("tipo_movimentacao") == "entrada")
-                    total_saidas = sum(abs(mov.get("quantidade", 0)) for mov in lista_movimentacoes if mov.get("tipo_movimentacao") == "saida")
+                    # Resumo (calculado no banco)
+                    resumo = resultado.resumo
+                    total_movimentacoes = resumo["total_movimentacoes"]
+                    total_entradas = resumo["total_entradas"]
+                    total_saidas = resumo["total_saidas"]
                     
                     col1, col2, col3 = st.columns(3)
                     
@@ -1964,8 +2116,6 @@ elif selected_menu == "Relatórios":
                     # Movimentações por data
                     st.subheader("Movimentações por Data")
                     
-                    df_movimentacoes["Data_Dia"] = pd.to_datetime(df_movimentacoes["Data"]).dt.date
-                    
                     # Separar por tipo
                     df_pivot = df_movimentacoes.pivot_table(
                         index="Data_Dia",
@@ -1994,20 +2144,17 @@ elif selected_menu == "Relatórios":
                     )
                     
                     st.plotly_chart(fig, use_container_width=True)
-                    
-                    # Opção para exportar
-                    csv = df_movimentacoes.to_csv(index=False)
-                    
-                    st.download_button(
-                        label="Exportar Relatório (CSV)",
-                        data=csv,
-                        file_name=f"relatorio_movimentacoes_{data_inicio.strftime('%Y%m%d')}_{data_fim.strftime('%Y%m%d')}.csv",
-                        mime="text/csv"
-                    )
                 else:
                     st.info("Nenhuma movimentação encontrada com os filtros especificados.")
             except Exception as e:
                 show_error(f"Erro ao gerar relatório de movimentações: {str(e)}")
+        
+        exportar_relatorio(
+            "movimentacoes",
+            lambda: sistema["relatorios"].relatorio_movimentacoes(data_inicio, data_fim, cod_produto, tipo_movimentacao),
+            f"relatorio_movimentacoes_{data_inicio.strftime('%Y%m%d')}_{data_fim.strftime('%Y%m%d')}"
+            f"_{cod_produto or 'todos'}_{tipo_movimentacao or 'todos'}"
+        )
 
 # Rodapé
 st.markdown("---")
@@ -0,0 +1,539 @@
+"""
+Benchmarks do sistema de varejo
+
+Uso:
+    python benchmark_varejo.py importacao [--repeticoes 5] [--limite-ms 500]
+    python benchmark_varejo.py venda --uri URI [--vendas 200]
+    python benchmark_varejo.py autocompletar [--itens 50000] [--limite-ms 1]
+    python benchmark_varejo.py relatorios --uri URI [--vendas 20000] [--limite 1000]
+    python benchmark_varejo.py tendencia --uri URI [--vendas 100000] [--fator 3]
+    python benchmark_varejo.py movimentacoes --uri URI [--movimentacoes 200000]
+    python benchmark_varejo.py exportacao [--linhas 10000 100000] [--formatos csv csv.gz xlsx] [--tolerancia-mb 16]
+
+Os benchmarks que acessam o MongoDB usam o banco "Varejo_Python_benchmark",
+que é apagado no início e no fim. Por isso a URI precisa ser informada com
+--uri (um servidor descartável): o MONGO_URI do .env nunca é usado.
+As verificações de idas ao banco também rodam sem servidor nos testes
+(python -m pytest).
+
+Cada benchmark imprime as medições e termina com código de saída 1 quando
+algum limite é ultrapassado, para poder ser usado em pipelines de CI.
+"""
+
+import argparse
+import datetime as dt
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from dotenv import load_dotenv
+from pymongo import monitoring
+
+DIRETORIO = os.path.dirname(os.path.abspath(__file__))
+BANCO_BENCHMARK = "Varejo_Python_benchmark"
+
+
+class ContadorComandos(monitoring.CommandListener):
+    """Conta os comandos enviados ao servidor (cada um é uma ida e volta)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.comandos = []
+
+    def started(self, event):
+        with self._lock:
+            self.comandos.append(event.command_name)
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    def zerar(self):
+        with self._lock:
+            self.comandos = []
+
+    def total(self):
+        with self._lock:
+            return len(self.comandos)
+
+
+# Registrado antes de qualquer cliente ser criado, vale para todos os clientes do processo
+contador_comandos = ContadorComandos()
+monitoring.register(contador_comandos)
+
+
+def _banco_benchmark(uri):
+    """Aponta o sistema para o banco de benchmark e o devolve limpo"""
+    import sistema_varejo
+
+    if not uri:
+        raise ValueError("Informe a URI de um servidor descartável: o banco de benchmark é apagado")
+
+    os.environ["MONGO_BANCO"] = BANCO_BENCHMARK
+    cliente = sistema_varejo.registro_conexoes.obter_cliente(uri)
+    cliente.drop_database(BANCO_BENCHMARK)
+    db = sistema_varejo.obter_banco(uri)
+    sistema_varejo.garantir_indices(db)
+    return db
+
+
+# Importa o módulo em um processo novo e informa o tempo e quantos clientes foram criados
+
+_SCRIPT_IMPORTACAO = """
+import time
+inicio = time.perf_counter()
+import sistema_varejo
+duracao = time.perf_counter() - inicio
+print(duracao, len(sistema_varejo.registro_conexoes.estatisticas()))
+"""
+
+
+def bench_importacao(repeticoes=5, limite_ms=500):
+    """Mede o tempo de importação de sistema_varejo e garante que nenhuma conexão é aberta"""
+    duracoes = []
+    clientes_criados = 0
+
+    for _ in range(repeticoes):
+        saida = subprocess.run(
+            [sys.executable, "-c", _SCRIPT_IMPORTACAO],
+            cwd=DIRETORIO,
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout.split()
+        duracoes.append(float(saida[0]) * 1000)
+        clientes_criados = max(clientes_criados, int(saida[1]))
+
+    mediana = statistics.median(duracoes)
+
+    print("\n=== IMPORTAÇÃO DE sistema_varejo ===")
+    print(f"Repetições: {repeticoes}")
+    print(f"Mediana: {mediana:.1f} ms (mín. {min(duracoes):.1f} ms, máx. {max(duracoes):.1f} ms)")
+    print(f"Clientes MongoDB criados na importação: {clientes_criados}")
+
+    ok = mediana <= limite_ms and clientes_criados == 0
+    print("OK" if ok else f"FALHOU (limite: {limite_ms} ms, nenhum cliente)")
+    return ok
+
+
+def bench_venda(uri, vendas=200):
+    """Latência e idas ao banco por venda em Vendas.registrar_venda"""
+    import sistema_varejo
+
+    db = _banco_benchmark(uri)
+    produtos = sistema_varejo.GerenciadorProdutos(uri)
+    clientes = sistema_varejo.Cliente(uri)
+    estoque = sistema_varejo.GestaoEstoque(produtos, uri)
+    vendas_manager = sistema_varejo.Vendas(produtos, clientes, estoque, uri)
+
+    produtos.cadastrar_produto("Produto benchmark", "BENCH-1", "Outros", vendas, 10.0, "", "")
+    clientes.cadastro("Cliente benchmark", "52998224725", "bench@exemplo.com", "(11) 91234-5678")
+
+    latencias = []
+    idas_ao_banco = []
+    for _ in range(vendas):
+        contador_comandos.zerar()
+        inicio = time.perf_counter()
+        vendas_manager.registrar_venda("BENCH-1", "52998224725", 1)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        idas_ao_banco.append(contador_comandos.total())
+
+    estoque_final = produtos.obter_produto("BENCH-1")["qnt_estoque"]
+    db.client.drop_database(db.name)
+
+    latencias.sort()
+    print("\n=== REGISTRO DE VENDA ===")
+    print(f"Vendas: {vendas}")
+    print(f"Latência mediana: {statistics.median(latencias):.2f} ms")
+    print(f"Latência p95: {latencias[int(len(latencias) * 0.95) - 1]:.2f} ms")
+    print(f"Idas ao banco por venda: {statistics.mean(idas_ao_banco):.1f} (máx. {max(idas_ao_banco)})")
+    print(f"Estoque final: {estoque_final} (esperado 0)")
+
+    ok = estoque_final == 0
+    print("OK" if ok else "FALHOU")
+    return ok
+
+
+def bench_autocompletar(itens=50000, limite_ms=1.0):
+    """Latência da busca do índice de autocompletar com um catálogo sintético (sem banco)"""
+    import random
+
+    from indice_busca import IndiceBusca
+
+    palavras = ["hamburguer", "batata", "refrigerante", "cafe", "suco", "queijo", "bacon", "salada",
+                "molho", "pao", "frango", "milkshake", "sorvete", "agua", "cebola", "picanha"]
+    gerador = random.Random(42)
+
+    indice = IndiceBusca()
+    inicio = time.perf_counter()
+    indice.carregar(
+        (f"P{i:06d}", f"Produto {i}", [" ".join(gerador.sample(palavras, 3)) + f" {i}", f"P{i:06d}"])
+        for i in range(itens)
+    )
+    carga_ms = (time.perf_counter() - inicio) * 1000
+
+    consultas = [gerador.choice(palavras)[:gerador.randint(2, 5)] for _ in range(500)]
+    consultas += [f"P{gerador.randrange(itens):06d}"[:gerador.randint(3, 7)] for _ in range(500)]
+    consultas += [f"{gerador.choice(palavras)[:3]} {gerador.choice(palavras)[:3]}" for _ in range(500)]
+
+    latencias = []
+    for consulta in consultas:
+        inicio = time.perf_counter()
+        indice.buscar(consulta)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+
+    # Importação em lote: todos os itens novos chegam em uma notificação
+    inicio = time.perf_counter()
+    indice.adicionar_varios(
+        (f"N{i:06d}", f"Novo {i}", [" ".join(gerador.sample(palavras, 3)) + f" {i}", f"N{i:06d}"])
+        for i in range(itens)
+    )
+    lote_ms = (time.perf_counter() - inicio) * 1000
+
+    latencias.sort()
+    mediana = statistics.median(latencias)
+    print("\n=== AUTOCOMPLETAR ===")
+    print(f"Itens indexados: {itens} (carga em {carga_ms:.0f} ms)")
+    print(f"Lote de {itens} itens novos (importação): {lote_ms:.0f} ms")
+    print(f"Buscas: {len(consultas)}")
+    print(f"Latência mediana: {mediana:.3f} ms")
+    print(f"Latência p95: {latencias[int(len(latencias) * 0.95) - 1]:.3f} ms")
+
+    ok = mediana <= limite_ms
+    print("OK" if ok else f"FALHOU (limite: {limite_ms} ms)")
+    return ok
+
+
+# Idas ao banco esperadas por relatório de ranking: uma agregação, sem consultas por linha
+IDAS_RELATORIOS_RANKING = {
+    "relatorio_produtos_mais_vendidos": 1,
+    "relatorio_clientes_top": 1,
+}
+
+
+def bench_relatorios(uri, vendas=20000, limite=1000):
+    """Latência e idas ao banco dos relatórios de ranking (produtos mais vendidos e clientes top)"""
+    import random
+
+    import sistema_varejo
+
+    db = _banco_benchmark(uri)
+    gerador = random.Random(42)
+    total_produtos = limite * 2
+    total_clientes = limite * 2
+    agora = dt.datetime.now()
+
+    db["estoque_produtos"].insert_many([
+        sistema_varejo.GerenciadorProdutos.montar_produto(f"Produto {i}", f"BENCH-{i}", "Outros", 100, 10.0, "", "")
+        for i in range(total_produtos)
+    ])
+    db["clientes"].insert_many([
+        {"nome": f"Cliente {i}", "cpf": f"{i:011d}", "email": "", "telefone": ""} for i in range(total_clientes)
+    ])
+    db["vendas"].insert_many([
+        {
+            "cod_produto": f"BENCH-{gerador.randrange(total_produtos)}",
+            "cpf_cliente": f"{gerador.randrange(total_clientes):011d}",
+            "qnt_vendida": 1,
+            "valor_total": 10.0,
+            "data_venda": agora - dt.timedelta(minutes=gerador.randrange(60 * 24 * 365))
+        }
+        for _ in range(vendas)
+    ])
+
+    relatorios = sistema_varejo.Relatorios(uri)
+    inicio_periodo = agora - dt.timedelta(days=180)
+
+    print("\n=== RELATÓRIOS DE RANKING ===")
+    print(f"Vendas: {vendas} | limite: {limite}")
+    ok = True
+    for metodo, idas_esperadas in IDAS_RELATORIOS_RANKING.items():
+        contador_comandos.zerar()
+        inicio = time.perf_counter()
+        resultado = getattr(relatorios, metodo)(limite, data_inicio=inicio_periodo, data_fim=agora)
+        linhas = sum(1 for _ in resultado)
+        duracao_ms = (time.perf_counter() - inicio) * 1000
+        idas = contador_comandos.total()
+
+        print(f"{metodo}: {linhas} linhas em {duracao_ms:.1f} ms, {idas} ida(s) ao banco (esperado {idas_esperadas})")
+        ok = ok and idas == idas_esperadas and linhas == limite
+
+    db.client.drop_database(db.name)
+    print("OK" if ok else "FALHOU")
+    return ok
+
+
+def bench_tendencia(uri, vendas=100000, fator=3.0, repeticoes=20):
+    """Compara o custo da tendência de vendas de uma semana e de cinco anos (totais pré-agregados)"""
+    import random
+
+    import sistema_varejo
+
+    db = _banco_benchmark(uri)
+    gerador = random.Random(42)
+    agora = dt.datetime.now()
+    minutos_5_anos = 5 * 365 * 24 * 60
+
+    for inicio_lote in range(0, vendas, 10000):
+        db["vendas"].insert_many([
+            {
+                "cod_produto": f"BENCH-{gerador.randrange(200)}",
+                "cpf_cliente": f"{gerador.randrange(1000):011d}",
+                "qnt_vendida": 1,
+                "valor_total": 10.0,
+                "data_venda": agora - dt.timedelta(minutes=gerador.randrange(minutos_5_anos))
+            }
+            for _ in range(min(10000, vendas - inicio_lote))
+        ])
+
+    agregados = sistema_varejo.AgregadosVendas(db)
+    inicio = time.perf_counter()
+    documentos = agregados.reconstruir()
+    reconstrucao_s = time.perf_counter() - inicio
+
+    relatorios = sistema_varejo.Relatorios(uri)
+    periodos = {
+        "1 semana": agora - dt.timedelta(days=7),
+        "5 anos": agora - dt.timedelta(days=5 * 365),
+    }
+
+    print("\n=== TENDÊNCIA DE VENDAS ===")
+    print(f"Vendas: {vendas} | documentos agregados: {documentos} (reconstrução em {reconstrucao_s:.1f} s)")
+
+    medianas = {}
+    for nome, data_inicio in periodos.items():
+        latencias = []
+        for _ in range(repeticoes):
+            contador_comandos.zerar()
+            inicio = time.perf_counter()
+            pontos = sum(1 for _ in relatorios.relatorio_vendas_tendencia(data_inicio, agora))
+            latencias.append((time.perf_counter() - inicio) * 1000)
+        medianas[nome] = statistics.median(latencias)
+        print(f"{nome}: {pontos} pontos, mediana {medianas[nome]:.1f} ms, {contador_comandos.total()} ida(s) ao banco")
+
+    diferencas = agregados.verificar_consistencia(periodos["5 anos"], agora)
+    for campo, valor_agregados, valor_vendas in diferencas:
+        print(f"Divergência em {campo}: agregados {valor_agregados}, vendas {valor_vendas}")
+
+    db.client.drop_database(db.name)
+
+    ok = not diferencas and medianas["5 anos"] <= medianas["1 semana"] * fator
+    print("OK" if ok else f"FALHOU (limite: {fator}x o custo de uma semana, totais iguais às vendas)")
+    return ok
+
+
+def _tamanho_colecao(colecao):
+    """(espaço em disco dos dados, espaço dos índices) em bytes; funciona também com séries temporais"""
+    estatisticas = next(colecao.aggregate([{"$collStats": {"storageStats": {}}}]))["storageStats"]
+    return estatisticas.get("storageSize", 0), estatisticas.get("totalIndexSize", 0)
+
+
+def bench_movimentacoes(uri, movimentacoes=200000, repeticoes=20):
+    """Espaço ocupado e latência de consultas por período: coleção comum x série temporal"""
+    import random
+
+    import sistema_varejo
+
+    db = _banco_benchmark(uri)
+    if not sistema_varejo.colecao_serie_temporal(db, sistema_varejo.COLECAO_MOVIMENTACOES):
+        print("O servidor não criou a coleção de movimentações como série temporal (MongoDB 5.0+ necessário)")
+        return False
+
+    gerador = random.Random(42)
+    agora = dt.datetime.now()
+    inicio_historico = agora - dt.timedelta(days=365)
+    passo = dt.timedelta(days=365) / movimentacoes
+    tipos = ["saida"] * 8 + ["entrada"] + ["ajuste"]
+
+    comum = db["movimentacoes_comum"]
+    comum.create_index([("data_movimentacao", 1)])
+    comum.create_index([("cod_produto", 1), ("data_movimentacao", 1)])
+    comum.create_index([("tipo_movimentacao", 1), ("data_movimentacao", 1)])
+    serie = db[sistema_varejo.COLECAO_MOVIMENTACOES]
+
+    # Gravadas em ordem de tempo, como acontece no sistema
+    for inicio_lote in range(0, movimentacoes, 10000):
+        lote = []
+        for i in range(inicio_lote, min(inicio_lote + 10000, movimentacoes)):
+            tipo = gerador.choice(tipos)
+            quantidade = gerador.randint(1, 10)
+            lote.append({
+                "cod_produto": f"BENCH-{gerador.randrange(500)}",
+                "nome_produto": "Produto benchmark",
+                "quantidade": -quantidade if tipo == "saida" else quantidade,
+                "tipo_movimentacao": tipo,
+                "estoque_resultante": gerador.randint(0, 500),
+                "data_movimentacao": inicio_historico + passo * i,
+                "motivo": "Venda" if tipo == "saida" else "Benchmark"
+            })
+        comum.insert_many([dict(m) for m in lote], ordered=False)
+        serie.insert_many([sistema_varejo.documento_movimentacao(m) for m in lote], ordered=False)
+
+    consultas = {
+        "1 produto, 30 dias": ({"cod_produto": "BENCH-7"}, agora - dt.timedelta(days=30)),
+        "todos, 1 dia": ({}, agora - dt.timedelta(days=1)),
+    }
+
+    def medir(colecao, filtro, projecao):
+        latencias = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            linhas = sum(1 for _ in colecao.find(filtro, projecao).sort("data_movimentacao", -1))
+            latencias.append((time.perf_counter() - inicio) * 1000)
+        return statistics.median(latencias), linhas
+
+    print("\n=== MOVIMENTAÇÕES: COLEÇÃO COMUM x SÉRIE TEMPORAL ===")
+    print(f"Movimentações: {movimentacoes}")
+    for nome, colecao in (("Comum", comum), ("Série temporal", serie)):
+        dados, indices = _tamanho_colecao(colecao)
+        print(f"{nome}: dados {dados / 2**20:.1f} MiB, índices {indices / 2**20:.1f} MiB")
+
+    ok = True
+    for nome, (filtro_produto, desde) in consultas.items():
+        filtro_comum = dict(filtro_produto, data_movimentacao={"$gte": desde})
+        filtro_serie = {f"meta.{campo}": valor for campo, valor in filtro_produto.items()}
+        filtro_serie["data_movimentacao"] = {"$gte": desde}
+
+        latencia_comum, linhas_comum = medir(comum, filtro_comum, {"_id": 0})
+        latencia_serie, linhas_serie = medir(serie, filtro_serie, sistema_varejo.PROJECAO_MOVIMENTACAO)
+        print(f"{nome}: comum {latencia_comum:.1f} ms, série temporal {latencia_serie:.1f} ms ({linhas_serie} linhas)")
+        ok = ok and linhas_comum == linhas_serie
+
+    db.client.drop_database(db.name)
+    print("OK" if ok else "FALHOU (as duas coleções devolveram resultados diferentes)")
+    return ok
+
+
+# Exporta um relatório sintético em um processo novo e informa o pico de memória
+# (alocações do Python pelo tracemalloc mais o pool de memória do pyarrow)
+
+_SCRIPT_EXPORTACAO = """
+import datetime as dt, json, os, sys, time, tracemalloc
+import pyarrow as pa
+import exportacao
+from sistema_varejo import ResultadoRelatorio
+
+formato, total = sys.argv[1], int(sys.argv[2])
+colunas = ["data_venda", "id_venda", "cod_produto", "nome_produto", "cpf_cliente", "nome_cliente",
+           "qnt_vendida", "valor_total"]
+inicio = dt.datetime(2025, 1, 1)
+
+def linhas():
+    for i in range(total):
+        yield {
+            "data_venda": inicio + dt.timedelta(minutes=i), "id_venda": f"{i:024x}",
+            "cod_produto": f"P{i % 500:06d}", "nome_produto": f"Produto {i % 500}",
+            "cpf_cliente": f"{i % 2000:011d}", "nome_cliente": f"Cliente {i % 2000}",
+            "qnt_vendida": i % 7 + 1, "valor_total": (i % 7 + 1) * 9.9
+        }
+
+resultado = ResultadoRelatorio("Relatório de vendas", colunas, linhas(), {"total_vendas": total})
+tracemalloc.start()
+comeco = time.perf_counter()
+caminho, exportadas = exportacao.exportar_arquivo(resultado, formato)
+duracao = time.perf_counter() - comeco
+pico_python = tracemalloc.get_traced_memory()[1]
+print(json.dumps({
+    "linhas": exportadas,
+    "segundos": duracao,
+    "pico_mb": (pico_python + pa.default_memory_pool().max_memory()) / 2 ** 20,
+    "arquivo_mb": os.path.getsize(caminho) / 2 ** 20
+}))
+os.remove(caminho)
+"""
+
+
+def bench_exportacao(linhas=(10000, 100000), formatos=("csv", "csv.gz", "xlsx"), tolerancia_mb=16):
+    """Pico de memória das exportações de relatório: deve ficar estável quando o número de linhas cresce"""
+    print("\n=== EXPORTAÇÃO DE RELATÓRIOS ===")
+    ok = True
+    for formato in formatos:
+        medicoes = []
+        for total in sorted(linhas):
+            saida = subprocess.run(
+                [sys.executable, "-c", _SCRIPT_EXPORTACAO, formato, str(total)],
+                cwd=DIRETORIO,
+                capture_output=True,
+                text=True,
+                check=True
+            ).stdout
+            medicao = json.loads(saida)
+            medicoes.append(medicao)
+            print(f"{formato}: {medicao['linhas']} linhas em {medicao['segundos']:.2f} s, "
+                  f"pico de memória {medicao['pico_mb']:.1f} MB, arquivo {medicao['arquivo_mb']:.1f} MB")
+
+        crescimento = medicoes[-1]["pico_mb"] - medicoes[0]["pico_mb"]
+        print(f"{formato}: crescimento do pico {crescimento:+.1f} MB "
+              f"({medicoes[0]['linhas']} -> {medicoes[-1]['linhas']} linhas)")
+        ok = ok and crescimento <= tolerancia_mb and all(m["linhas"] == t for m, t in zip(medicoes, sorted(linhas)))
+
+    print("OK" if ok else f"FALHOU (tolerância: {tolerancia_mb} MB de crescimento)")
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do sistema de varejo")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    parser_importacao = subparsers.add_parser("importacao", help="Tempo de importação do módulo")
+    parser_importacao.add_argument("--repeticoes", type=int, default=5)
+    parser_importacao.add_argument("--limite-ms", type=float, default=500)
+
+    parser_venda = subparsers.add_parser("venda", help="Latência e idas ao banco por venda")
+    parser_venda.add_argument("--uri", required=True, help="URI de um servidor descartável (o MONGO_URI do .env não é usado)")
+    parser_venda.add_argument("--vendas", type=int, default=200)
+
+    parser_autocompletar = subparsers.add_parser("autocompletar", help="Latência do índice de autocompletar")
+    parser_autocompletar.add_argument("--itens", type=int, default=50000)
+    parser_autocompletar.add_argument("--limite-ms", type=float, default=1.0)
+
+    parser_relatorios = subparsers.add_parser("relatorios", help="Idas ao banco dos relatórios de ranking")
+    parser_relatorios.add_argument("--uri", required=True, help="URI de um servidor descartável (o MONGO_URI do .env não é usado)")
+    parser_relatorios.add_argument("--vendas", type=int, default=20000)
+    parser_relatorios.add_argument("--limite", type=int, default=1000)
+
+    parser_tendencia = subparsers.add_parser("tendencia", help="Custo da tendência de vendas: uma semana x cinco anos")
+    parser_tendencia.add_argument("--uri", required=True, help="URI de um servidor descartável (o MONGO_URI do .env não é usado)")
+    parser_tendencia.add_argument("--vendas", type=int, default=100000)
+    parser_tendencia.add_argument("--fator", type=float, default=3.0)
+
+    parser_movimentacoes = subparsers.add_parser("movimentacoes", help="Coleção comum x série temporal de movimentações")
+    parser_movimentacoes.add_argument("--uri", required=True, help="URI de um servidor descartável (o MONGO_URI do .env não é usado)")
+    parser_movimentacoes.add_argument("--movimentacoes", type=int, default=200000)
+
+    parser_exportacao = subparsers.add_parser("exportacao", help="Memória das exportações CSV/XLSX de relatórios")
+    parser_exportacao.add_argument("--linhas", type=int, nargs="+", default=[10000, 100000])
+    parser_exportacao.add_argument("--formatos", nargs="+", default=["csv", "csv.gz", "xlsx"],
+                                   choices=["csv", "csv.gz", "xlsx"])
+    parser_exportacao.add_argument("--tolerancia-mb", type=float, default=16)
+
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+
+    if args.benchmark == "importacao":
+        ok = bench_importacao(args.repeticoes, args.limite_ms)
+    elif args.benchmark == "venda":
+        ok = bench_venda(args.uri, args.vendas)
+    elif args.benchmark == "autocompletar":
+        ok = bench_autocompletar(args.itens, args.limite_ms)
+    elif args.benchmark == "relatorios":
+        ok = bench_relatorios(args.uri, args.vendas, args.limite)
+    elif args.benchmark == "tendencia":
+        ok = bench_tendencia(args.uri, args.vendas, args.fator)
+    elif args.benchmark == "movimentacoes":
+        ok = bench_movimentacoes(args.uri, args.movimentacoes)
+    elif args.benchmark == "exportacao":
+        ok = bench_exportacao(args.linhas, args.formatos, args.tolerancia_mb)
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,500 @@
+"""
+Exportação das vendas e das movimentações de estoque para Parquet
+
+As coleções são lidas por um cursor ordenado por (data, _id) e convertidas em
+lotes pyarrow.RecordBatch com esquema fixo: datas como timestamp, valores como
+float64 e quantidades como int64, sem formatação linha a linha em Python. Cada
+lote é dividido pelo mês da data e gravado na partição correspondente, no
+formato de partições do Hive (lido diretamente por pandas, DuckDB, Spark...):
+
+    destino/vendas/ano_mes=2025-01/part-20250201T030000-1a2b3c4d.parquet
+    destino/movimentacoes_estoque/ano_mes=2025-01/...
+
+A exportação é incremental: a data e o _id do último documento exportado ficam
+em _estado.json, na pasta da coleção, e a execução seguinte continua desse
+ponto gravando arquivos novos nas partições, sem reescrever os existentes.
+Os arquivos de uma execução são gravados ocultos e só aparecem depois que o
+estado registra a execução; se o processo parar no meio, a execução seguinte
+publica os arquivos já registrados e apaga os que não chegaram a ser, então
+nenhuma linha fica duplicada nem perdida.
+Documentos mais recentes que ATRASO_EXPORTACAO ficam para a próxima execução,
+para que uma gravação ainda em andamento (com data um pouco anterior à de uma
+já exportada) não seja pulada.
+
+Os relatórios (ResultadoRelatorio) são exportados em CSV, compactado ou não,
+ou em XLSX (openpyxl em modo write-only): as linhas vão do cursor para o
+arquivo em lotes de tamanho fixo, então a memória usada não cresce com o
+tamanho do relatório.
+
+Uso:
+    python exportacao.py parquet --destino exportacao [--colecao vendas|movimentacoes_estoque] [--uri URI]
+"""
+
+import argparse
+import datetime as dt
+import json
+import os
+import sys
+import tempfile
+import uuid
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from bson import ObjectId
+from dotenv import load_dotenv
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from openpyxl.utils import get_column_letter
+
+from sistema_varejo import (
+    COLECAO_MOVIMENTACOES,
+    ESTAGIOS_ITENS_VENDA,
+    PROJECAO_MOVIMENTACAO,
+    TAMANHO_LOTE_RELATORIO,
+    TIPOS_COLUNAS_RELATORIO,
+    filtro_pagina,
+    obter_banco,
+)
+
+TAMANHO_LOTE_EXPORTACAO = 50000
+ATRASO_EXPORTACAO = dt.timedelta(minutes=5)
+ARQUIVO_ESTADO = "_estado.json"
+COLUNA_PARTICAO = "ano_mes"
+
+ESQUEMA_VENDAS = pa.schema([
+    ("id_venda", pa.string()),
+    ("data_venda", pa.timestamp("ms")),
+    ("cpf_cliente", pa.string()),
+    ("cod_produto", pa.string()),
+    ("qnt_vendida", pa.int64()),
+    ("preco_unitario", pa.float64()),
+    ("valor_total", pa.float64()),
+])
+
+ESQUEMA_MOVIMENTACOES = pa.schema([
+    ("data_movimentacao", pa.timestamp("ms")),
+    ("cod_produto", pa.string()),
+    ("nome_produto", pa.string()),
+    ("tipo_movimentacao", pa.string()),
+    ("quantidade", pa.int64()),
+    ("estoque_resultante", pa.int64()),
+    ("motivo", pa.string()),
+    ("id_venda", pa.string()),
+])
+
+# Para cada coleção: campo de data (ordenação e partição), esquema e estágios que
+# transformam os documentos nas linhas exportadas. O _id segue nas linhas apenas
+# para marcar até onde a exportação chegou; ele não faz parte do esquema.
+EXPORTACOES = {
+    "vendas": {
+        "campo_data": "data_venda",
+        "esquema": ESQUEMA_VENDAS,
+        "estagios": ESTAGIOS_ITENS_VENDA + [
+            {"$project": {
+                "_id": 1,
+                "id_venda": {"$toString": "$_id"},
+                "data_venda": 1,
+                "cpf_cliente": 1,
+                "cod_produto": 1,
+                "qnt_vendida": 1,
+                "preco_unitario": "$itens.preco_unitario",
+                "valor_total": 1
+            }}
+        ]
+    },
+    COLECAO_MOVIMENTACOES: {
+        "campo_data": "data_movimentacao",
+        "esquema": ESQUEMA_MOVIMENTACOES,
+        "estagios": [
+            {"$project": dict(PROJECAO_MOVIMENTACAO, _id=1, id_venda={"$toString": "$id_venda"})}
+        ]
+    },
+}
+
+
+# Estado da exportação incremental
+
+def ler_estado(pasta):
+    """Último ponto exportado de uma coleção: {"data", "_id", ...} ou None na primeira exportação"""
+    caminho = os.path.join(pasta, ARQUIVO_ESTADO)
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, encoding="utf-8") as arquivo:
+        estado = json.load(arquivo)
+    estado["data"] = dt.datetime.fromisoformat(estado["data"])
+    estado["_id"] = ObjectId(estado["_id"])
+    return estado
+
+
+def _temporarios(pasta):
+    """Arquivos ocultos (ainda não publicados) das partições: (execução, caminho temporário, caminho final)"""
+    for nome_particao in os.listdir(pasta):
+        pasta_mes = os.path.join(pasta, nome_particao)
+        if not nome_particao.startswith(f"{COLUNA_PARTICAO}=") or not os.path.isdir(pasta_mes):
+            continue
+        for nome in os.listdir(pasta_mes):
+            if nome.startswith(".part-") and nome.endswith(".parquet.tmp"):
+                final = nome[1:-len(".tmp")]
+                yield final[len("part-"):-len(".parquet")], os.path.join(pasta_mes, nome), os.path.join(pasta_mes, final)
+
+
+def _concluir_execucao_anterior(pasta, estado):
+    """
+    Termina uma execução interrompida: os arquivos da execução registrada no estado são
+    publicados e os de execuções que não chegaram ao estado são apagados.
+    """
+    registrada = (estado or {}).get("execucao")
+    for execucao, temporario, caminho in _temporarios(pasta):
+        if execucao == registrada:
+            os.replace(temporario, caminho)
+        else:
+            os.remove(temporario)
+
+
+def _gravar_estado(pasta, estado):
+    # Gravado em um arquivo temporário e renomeado, para nunca ficar pela metade
+    caminho = os.path.join(pasta, ARQUIVO_ESTADO)
+    with open(caminho + ".tmp", "w", encoding="utf-8") as arquivo:
+        json.dump(
+            dict(estado, data=estado["data"].isoformat(), _id=str(estado["_id"])),
+            arquivo, ensure_ascii=False, indent=2
+        )
+    os.replace(caminho + ".tmp", caminho)
+
+
+# Exportação
+
+def _lotes(cursor, tamanho):
+    lote = []
+    for documento in cursor:
+        lote.append(documento)
+        if len(lote) >= tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _registros(lote, esquema):
+    """
+    Converte um lote de documentos em RecordBatch no esquema. As colunas inteiras são lidas
+    como float64 e convertidas com verificação: from_pylist direto no int64 truncaria uma
+    quantidade fracionária (2.5 viraria 2) sem aviso.
+    """
+    leitura = pa.schema([
+        pa.field(campo.name, pa.float64()) if pa.types.is_integer(campo.type) else campo for campo in esquema
+    ])
+    registros = pa.RecordBatch.from_pylist(lote, schema=leitura)
+    colunas = []
+    for campo, coluna in zip(esquema, registros.columns):
+        if coluna.type != campo.type:
+            fracionarias = pc.not_equal(coluna, pc.floor(coluna))
+            if pc.any(fracionarias).as_py():
+                posicao = pc.index(fracionarias, True).as_py()
+                raise ValueError(
+                    f"{campo.name} não inteiro ({coluna[posicao].as_py()}) no documento {lote[posicao].get('_id')}"
+                )
+            coluna = pc.cast(coluna, campo.type)
+        colunas.append(coluna)
+    return pa.RecordBatch.from_arrays(colunas, schema=esquema)
+
+
+def _por_mes(registros, campo_data):
+    """Divide um RecordBatch em (ano_mes, RecordBatch) pelo mês da data, sem percorrer as linhas em Python"""
+    meses = pc.strftime(registros[campo_data], format="%Y-%m")
+    for mes in pc.unique(meses).to_pylist():
+        yield mes, registros.filter(pc.equal(meses, mes))
+
+
+def exportar_parquet(db, colecao, destino, tamanho_lote=TAMANHO_LOTE_EXPORTACAO, atraso=ATRASO_EXPORTACAO):
+    """
+    Exporta para destino/<colecao> os documentos gravados desde a última exportação.
+    Retorna {"colecao", "linhas", "arquivos", "ate"} (ate: data do último documento exportado).
+    """
+    config = EXPORTACOES[colecao]
+    campo_data = config["campo_data"]
+    esquema = config["esquema"]
+    pasta = os.path.join(destino, colecao)
+    os.makedirs(pasta, exist_ok=True)
+
+    estado = ler_estado(pasta)
+    _concluir_execucao_anterior(pasta, estado)
+    limite = dt.datetime.now() - atraso
+    filtro = {campo_data: {"$lt": limite}}
+    if estado:
+        filtro = {"$and": [filtro, filtro_pagina([campo_data, "_id"], [estado["data"], estado["_id"]], "asc")]}
+
+    cursor = db[colecao].aggregate(
+        [{"$match": filtro}, {"$sort": {campo_data: 1, "_id": 1}}] + config["estagios"],
+        allowDiskUse=True,
+        batchSize=min(tamanho_lote, 10000)
+    )
+
+    # Os arquivos são gravados com nome oculto (ignorado por leitores de Parquet) e
+    # renomeados só depois que o estado registra a execução (ver _concluir_execucao_anterior)
+    execucao = f"{dt.datetime.now():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+    escritores = {}
+    linhas = 0
+    ultimo = None
+    try:
+        with cursor:
+            for lote in _lotes(cursor, tamanho_lote):
+                registros = _registros(lote, esquema)
+                for mes, parte in _por_mes(registros, campo_data):
+                    if mes not in escritores:
+                        pasta_mes = os.path.join(pasta, f"{COLUNA_PARTICAO}={mes}")
+                        os.makedirs(pasta_mes, exist_ok=True)
+                        caminho = os.path.join(pasta_mes, f"part-{execucao}.parquet")
+                        temporario = os.path.join(pasta_mes, f".part-{execucao}.parquet.tmp")
+                        escritores[mes] = (pq.ParquetWriter(temporario, esquema), temporario, caminho)
+                    escritores[mes][0].write_batch(parte)
+                linhas += len(lote)
+                ultimo = lote[-1]
+    except BaseException:
+        for escritor, temporario, _ in escritores.values():
+            escritor.close()
+            os.remove(temporario)
+        raise
+
+    for escritor, _, _ in escritores.values():
+        escritor.close()
+
+    if ultimo is not None:
+        _gravar_estado(pasta, {
+            "data": ultimo[campo_data],
+            "_id": ultimo["_id"],
+            "linhas": linhas + (estado or {}).get("linhas", 0),
+            "execucao": execucao,
+            "exportado_em": dt.datetime.now().isoformat()
+        })
+
+    for _, temporario, caminho in escritores.values():
+        os.replace(temporario, caminho)
+
+    return {
+        "colecao": colecao,
+        "linhas": linhas,
+        "arquivos": len(escritores),
+        "ate": ultimo[campo_data] if ultimo else (estado or {}).get("data")
+    }
+
+
+# Relatórios
+
+# Cabeçalhos das colunas dos relatórios nos arquivos exportados
+ROTULOS_COLUNAS = {
+    "data_venda": "Data",
+    "data_movimentacao": "Data",
+    "inicio": "Início",
+    "id_venda": "ID da Venda",
+    "posicao": "Posição",
+    "cod_produto": "Código",
+    "nome": "Produto",
+    "nome_produto": "Produto",
+    "categoria": "Categoria",
+    "cpf_cliente": "CPF",
+    "nome_cliente": "Cliente",
+    "qnt_vendida": "Quantidade",
+    "qnt_estoque": "Quantidade",
+    "qnt_produtos": "Quantidade de Produtos",
+    "quantidade": "Quantidade",
+    "total_vendas": "Total de Vendas",
+    "total_compras": "Total de Compras",
+    "valor_total": "Valor Total",
+    "valor_estoque": "Valor em Estoque",
+    "preco": "Preço Unitário",
+    "preco_medio": "Preço Médio",
+    "ticket_medio": "Ticket Médio",
+    "tipo_movimentacao": "Tipo",
+    "estoque_resultante": "Estoque Final",
+    "motivo": "Motivo",
+    "total_produtos": "Total de Produtos",
+    "total_clientes": "Total de Clientes",
+    "total_itens": "Total de Itens",
+    "valor_total_estoque": "Valor Total em Estoque",
+    "total_movimentacoes": "Total de Movimentações",
+    "total_entradas": "Total de Entradas",
+    "total_saidas": "Total de Saídas",
+    "granularidade": "Granularidade",
+}
+
+# formato -> (extensão, tipo MIME)
+FORMATOS_EXPORTACAO = {
+    "csv": (".csv", "text/csv"),
+    "csv.gz": (".csv.gz", "application/gzip"),
+    "xlsx": (".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+FORMATO_DATA_CSV = "%d/%m/%Y %H:%M"
+BOM_UTF8 = b"\xef\xbb\xbf"
+
+
+def arquivo_temporario(formato, prefixo="relatorio_"):
+    """Cria um arquivo temporário vazio com a extensão do formato e retorna o caminho"""
+    descritor, caminho = tempfile.mkstemp(prefix=prefixo, suffix=FORMATOS_EXPORTACAO[formato][0])
+    os.close(descritor)
+    return caminho
+
+
+def exportar_csv(resultado, destino=None, compactar=False, tamanho_lote=TAMANHO_LOTE_RELATORIO):
+    """
+    Grava as linhas de um ResultadoRelatorio em CSV (gzip se compactar=True), um lote por vez.
+    Os lotes são convertidos pelo esquema do relatório e escritos pelo pyarrow; datas saem
+    como dd/mm/aaaa hh:mm. destino: caminho do arquivo (padrão: um arquivo temporário).
+    Retorna (caminho, número de linhas).
+    """
+    caminho = destino or arquivo_temporario("csv.gz" if compactar else "csv")
+    esquema = resultado.esquema_arrow()
+    datas = [i for i, campo in enumerate(esquema) if pa.types.is_timestamp(campo.type)]
+    rotulos = [ROTULOS_COLUNAS.get(coluna, coluna) for coluna in resultado.colunas]
+
+    def _converter(registros):
+        colunas = list(registros.columns)
+        for i in datas:
+            colunas[i] = pc.strftime(colunas[i], format=FORMATO_DATA_CSV)
+        return pa.RecordBatch.from_arrays(colunas, names=rotulos)
+
+    linhas = 0
+    with (pa.CompressedOutputStream(caminho, "gzip") if compactar else pa.OSFile(caminho, "wb")) as saida:
+        # BOM para o Excel reconhecer o UTF-8 (a importação lê o arquivo como utf-8-sig)
+        saida.write(BOM_UTF8)
+        # O cabeçalho sai mesmo quando o relatório não tem linhas
+        esquema_csv = _converter(pa.RecordBatch.from_pylist([], schema=esquema)).schema
+        with pacsv.CSVWriter(saida, esquema_csv) as escritor:
+            for registros in resultado.lotes_arrow(tamanho_lote, esquema):
+                escritor.write_batch(_converter(registros))
+                linhas += registros.num_rows
+    return caminho, linhas
+
+
+# Limite de linhas de uma planilha do Excel (a primeira é o cabeçalho)
+MAX_LINHAS_PLANILHA = 1048576
+FORMATOS_CELULA = {
+    "data": "DD/MM/YYYY HH:MM",
+    "inteiro": "#,##0",
+    "moeda": '"R$" #,##0.00',
+}
+LARGURAS_COLUNA = {"data": 17, "inteiro": 12, "moeda": 15, "texto": 24}
+CARACTERES_INVALIDOS_PLANILHA = str.maketrans({c: " " for c in "[]:*?/\\"})
+
+
+def _nome_planilha(titulo, numero):
+    nome = titulo.translate(CARACTERES_INVALIDOS_PLANILHA).strip() or "Relatório"
+    sufixo = f" ({numero})" if numero > 1 else ""
+    return nome[:31 - len(sufixo)] + sufixo
+
+
+def exportar_xlsx(resultado, destino=None, tamanho_lote=TAMANHO_LOTE_RELATORIO, linhas_por_planilha=MAX_LINHAS_PLANILHA - 1):
+    """
+    Grava as linhas de um ResultadoRelatorio em XLSX, um lote por vez.
+    A pasta de trabalho é criada em modo write-only: cada linha vai direto para o arquivo
+    da planilha, sem ficar em memória. Datas, quantidades e valores são células numéricas
+    com formato (valores em R$). Acima de `linhas_por_planilha` as linhas continuam em
+    uma nova planilha; o resumo do relatório vai para a planilha "Resumo".
+    Retorna (caminho, número de linhas).
+    """
+    caminho = destino or arquivo_temporario("xlsx")
+    tipos = list(resultado.tipos.values())
+    formatos = [FORMATOS_CELULA.get(tipo) for tipo in tipos]
+    pasta_trabalho = Workbook(write_only=True)
+
+    def _nova_planilha(numero):
+        planilha = pasta_trabalho.create_sheet(_nome_planilha(resultado.titulo, numero))
+        # Larguras precisam ser definidas antes da primeira linha no modo write-only
+        for i, tipo in enumerate(tipos, start=1):
+            planilha.column_dimensions[get_column_letter(i)].width = LARGURAS_COLUNA[tipo]
+        planilha.freeze_panes = "A2"
+        cabecalho = []
+        for coluna in resultado.colunas:
+            celula = WriteOnlyCell(planilha, ROTULOS_COLUNAS.get(coluna, coluna))
+            celula.font = Font(bold=True)
+            cabecalho.append(celula)
+        planilha.append(cabecalho)
+        return planilha
+
+    def _linha(planilha, linha):
+        valores = []
+        for coluna, formato in zip(resultado.colunas, formatos):
+            valor = linha.get(coluna)
+            if formato and valor is not None:
+                valor = WriteOnlyCell(planilha, valor)
+                valor.number_format = formato
+            valores.append(valor)
+        return valores
+
+    numero_planilha = 1
+    planilha = _nova_planilha(numero_planilha)
+    na_planilha = 0
+    linhas = 0
+    for lote in resultado.em_lotes(tamanho_lote):
+        for linha in lote:
+            if na_planilha >= linhas_por_planilha:
+                numero_planilha += 1
+                planilha = _nova_planilha(numero_planilha)
+                na_planilha = 0
+            planilha.append(_linha(planilha, linha))
+            na_planilha += 1
+        linhas += len(lote)
+
+    # Resumo depois das linhas: o relatório já foi percorrido e os totais vêm do banco
+    resumo = pasta_trabalho.create_sheet("Resumo")
+    resumo.column_dimensions["A"].width = 28
+    resumo.column_dimensions["B"].width = 18
+    for campo, valor in resultado.resumo.items():
+        if isinstance(valor, (dict, list)):
+            continue
+        celula = WriteOnlyCell(resumo, valor)
+        tipo = TIPOS_COLUNAS_RELATORIO.get(campo)
+        if tipo in FORMATOS_CELULA and isinstance(valor, (int, float, dt.datetime)):
+            celula.number_format = FORMATOS_CELULA[tipo]
+        resumo.append([ROTULOS_COLUNAS.get(campo, campo), celula])
+
+    pasta_trabalho.save(caminho)
+    return caminho, linhas
+
+
+def exportar_arquivo(resultado, formato, destino=None):
+    """Exporta um ResultadoRelatorio no formato informado ("csv", "csv.gz" ou "xlsx"); retorna (caminho, linhas)"""
+    if formato == "xlsx":
+        return exportar_xlsx(resultado, destino)
+    if formato in ("csv", "csv.gz"):
+        return exportar_csv(resultado, destino, compactar=formato == "csv.gz")
+    raise ValueError(f"Formato de exportação não suportado: {formato}")
+
+
+def formato_do_arquivo(caminho):
+    """Formato de exportação pela extensão do arquivo"""
+    for formato, (extensao, _) in sorted(FORMATOS_EXPORTACAO.items(), key=lambda item: -len(item[1][0])):
+        if caminho.lower().endswith(extensao):
+            return formato
+    raise ValueError(f"Extensão não suportada: {caminho} (use .csv, .csv.gz ou .xlsx)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exportação de dados do sistema de varejo")
+    parser.add_argument("--uri", default=None, help="URI do MongoDB (padrão: MONGO_URI do .env)")
+    subparsers = parser.add_subparsers(dest="formato", required=True)
+
+    parquet = subparsers.add_parser("parquet", help="Vendas e movimentações em Parquet particionado por mês")
+    parquet.add_argument("--destino", required=True, help="Pasta de destino")
+    parquet.add_argument("--colecao", action="append", choices=list(EXPORTACOES),
+                         help="Coleção a exportar (padrão: todas; pode ser repetido)")
+    parquet.add_argument("--tamanho-lote", type=int, default=TAMANHO_LOTE_EXPORTACAO)
+
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    db = obter_banco(args.uri)
+
+    for colecao in args.colecao or list(EXPORTACOES):
+        resultado = exportar_parquet(db, colecao, args.destino, args.tamanho_lote)
+        ate = resultado["ate"].strftime("%d/%m/%Y %H:%M:%S") if resultado["ate"] else "-"
+        print(f"{colecao}: {resultado['linhas']} linha(s) em {resultado['arquivos']} arquivo(s); exportado até {ate}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""
+Importação em lote de produtos e clientes a partir de arquivos CSV ou Excel (XLSX)
+
+Os arquivos são lidos em streaming, em blocos de linhas. Cada bloco é validado,
+os códigos (ou CPFs) já cadastrados são encontrados com uma única consulta e os
+registros novos são gravados com insert_many não ordenado. Cada linha do
+arquivo recebe um resultado de sucesso ou erro.
+"""
+
+import csv
+import io
+import itertools
+import os
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from sistema_varejo import Cliente, GerenciadorProdutos
+from validacao import normalizar_cpfs, validar_clientes
+
+COLUNAS_PRODUTO = ["nome", "cod_produto", "categoria", "qnt_estoque", "preco", "descricao", "fornecedor"]
+COLUNAS_CLIENTE = ["nome", "cpf", "email", "telefone"]
+TAMANHO_BLOCO = 1000
+
+
+# Leitura dos arquivos
+
+def _normalizar_cabecalho(cabecalho):
+    return [str(coluna).strip().lower() if coluna is not None else "" for coluna in cabecalho]
+
+
+def ler_linhas_csv(arquivo, encoding="utf-8-sig"):
+    """
+    Gera (número da linha, dicionário) para cada linha de um CSV.
+    Aceita arquivos abertos em modo texto ou binário; o separador (, ou ;) é detectado.
+    """
+    if isinstance(arquivo, io.TextIOBase):
+        texto = arquivo
+    else:
+        texto = io.TextIOWrapper(arquivo, encoding=encoding, newline="")
+
+    amostra = texto.read(4096)
+    texto.seek(0)
+    try:
+        dialeto = csv.Sniffer().sniff(amostra, delimiters=",;")
+    except csv.Error:
+        dialeto = csv.excel
+
+    leitor = csv.reader(texto, dialeto)
+    cabecalho = _normalizar_cabecalho(next(leitor, []))
+
+    for numero, valores in enumerate(leitor, start=2):
+        if not any(valor.strip() for valor in valores):
+            continue
+        yield numero, dict(zip(cabecalho, valores))
+
+
+def ler_linhas_xlsx(arquivo):
+    """Gera (número da linha, dicionário) para cada linha da primeira planilha de um XLSX"""
+    # read_only lê as linhas sob demanda, sem montar a planilha inteira em memória
+    planilha = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        linhas = planilha.active.iter_rows(values_only=True)
+        cabecalho = _normalizar_cabecalho(next(linhas, []))
+
+        for numero, valores in enumerate(linhas, start=2):
+            if all(valor is None or str(valor).strip() == "" for valor in valores):
+                continue
+            yield numero, dict(zip(cabecalho, valores))
+    finally:
+        planilha.close()
+
+
+def ler_linhas(arquivo, nome_arquivo):
+    """Escolhe o leitor pela extensão do arquivo"""
+    extensao = os.path.splitext(nome_arquivo)[1].lower()
+    if extensao == ".csv":
+        return ler_linhas_csv(arquivo)
+    if extensao in (".xlsx", ".xlsm"):
+        return ler_linhas_xlsx(arquivo)
+    raise ValueError(f"Formato de arquivo não suportado: {extensao or nome_arquivo}")
+
+
+def em_blocos(itens, tamanho=TAMANHO_BLOCO):
+    """Agrupa um iterável em listas de até `tamanho` itens, sem ler tudo de uma vez"""
+    iterador = iter(itens)
+    while True:
+        bloco = list(itertools.islice(iterador, tamanho))
+        if not bloco:
+            return
+        yield bloco
+
+
+# Conversão de valores
+
+def _texto(valor):
+    return "" if valor is None else str(valor).strip()
+
+
+def converter_numero(valor, inteiro=False):
+    """Converte números de planilhas ou textos como '1.234,56' e '1234.56'"""
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        numero = valor
+    else:
+        texto = _texto(valor).replace("R$", "").replace(" ", "")
+        if not texto:
+            raise ValueError("valor vazio")
+        if "," in texto:
+            texto = texto.replace(".", "").replace(",", ".")
+        numero = float(texto)
+
+    if inteiro:
+        if numero != int(numero):
+            raise ValueError(f"{valor} não é um número inteiro")
+        return int(numero)
+    return float(numero)
+
+
+def converter_produto(dados):
+    """Converte uma linha do arquivo em um produto validado (lança ValueError se inválida)"""
+    try:
+        qnt_estoque = converter_numero(dados.get("qnt_estoque"), inteiro=True)
+    except ValueError as e:
+        raise ValueError(f"Quantidade inválida: {e}")
+
+    try:
+        preco = converter_numero(dados.get("preco"))
+    except ValueError as e:
+        raise ValueError(f"Preço inválido: {e}")
+
+    return GerenciadorProdutos.montar_produto(
+        _texto(dados.get("nome")),
+        _texto(dados.get("cod_produto")),
+        _texto(dados.get("categoria")) or "Outros",
+        qnt_estoque,
+        preco,
+        _texto(dados.get("descricao")),
+        _texto(dados.get("fornecedor"))
+    )
+
+
+# Importação
+
+def _resultado(numero, cod_produto, erro=None):
+    return {
+        "linha": numero,
+        "cod_produto": cod_produto,
+        "status": "erro" if erro else "ok",
+        "mensagem": erro or "Produto cadastrado"
+    }
+
+
+def _resultado_cliente(numero, cpf, erro=None):
+    return {
+        "linha": numero,
+        "cpf": cpf,
+        "status": "erro" if erro else "ok",
+        "mensagem": erro or "Cliente cadastrado"
+    }
+
+
+def importar_produtos(gerenciador_produtos, arquivo, nome_arquivo, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Importa os produtos de um arquivo CSV ou XLSX.
+    Gera um resultado por linha: {"linha", "cod_produto", "status" ("ok" ou "erro"), "mensagem"}
+    """
+    codigos_no_arquivo = set()
+
+    for bloco in em_blocos(ler_linhas(arquivo, nome_arquivo), tamanho_bloco):
+        resultados = []
+        validos = []
+
+        # Validar o bloco e barrar códigos repetidos dentro do próprio arquivo
+
+        for numero, dados in bloco:
+            cod_produto = _texto(dados.get("cod_produto"))
+            try:
+                produto = converter_produto(dados)
+            except ValueError as e:
+                resultados.append(_resultado(numero, cod_produto, str(e)))
+                continue
+
+            if cod_produto in codigos_no_arquivo:
+                resultados.append(_resultado(numero, cod_produto, f"Código {cod_produto} repetido no arquivo"))
+                continue
+
+            codigos_no_arquivo.add(cod_produto)
+            resultados.append(None)
+            validos.append((len(resultados) - 1, numero, produto))
+
+        # Gravar o bloco: uma consulta de duplicados e um insert_many
+
+        erros = gerenciador_produtos.cadastrar_produtos_lote([produto for _, _, produto in validos])
+        for (posicao, numero, produto), erro in zip(validos, erros):
+            resultados[posicao] = _resultado(numero, produto["cod_produto"], erro)
+
+        yield from resultados
+
+
+def importar_clientes(gerenciador_clientes, arquivo, nome_arquivo, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Importa os clientes de um arquivo CSV ou XLSX.
+    Cada bloco é validado de uma vez (CPF, e-mail e telefone vetorizados) e gravado com um insert_many.
+    Gera um resultado por linha: {"linha", "cpf", "status" ("ok" ou "erro"), "mensagem"}
+    """
+    cpfs_no_arquivo = set()
+
+    for bloco in em_blocos(ler_linhas(arquivo, nome_arquivo), tamanho_bloco):
+        df = pd.DataFrame(
+            [[dados.get(coluna) for coluna in COLUNAS_CLIENTE] for _, dados in bloco],
+            columns=COLUNAS_CLIENTE
+        )
+        df = df.fillna("").astype(str).apply(lambda coluna: coluna.str.strip())
+        df["cpf"] = normalizar_cpfs(df["cpf"])
+        erros_validacao = validar_clientes(df)
+
+        resultados = []
+        validos = []
+
+        for (numero, _), cliente, erro in zip(bloco, df.itertuples(index=False), erros_validacao):
+            if erro:
+                resultados.append(_resultado_cliente(numero, cliente.cpf, erro))
+                continue
+
+            if cliente.cpf in cpfs_no_arquivo:
+                resultados.append(_resultado_cliente(numero, cliente.cpf, f"CPF {cliente.cpf} repetido no arquivo"))
+                continue
+
+            cpfs_no_arquivo.add(cliente.cpf)
+            resultados.append(None)
+            validos.append((
+                len(resultados) - 1,
+                numero,
+                Cliente.montar_cliente(cliente.nome, cliente.cpf, cliente.email, cliente.telefone)
+            ))
+
+        # Gravar o bloco: uma consulta de duplicados e um insert_many
+
+        erros = gerenciador_clientes.cadastro_lote([cliente for _, _, cliente in validos])
+        for (posicao, numero, cliente), erro in zip(validos, erros):
+            resultados[posicao] = _resultado_cliente(numero, cliente["cpf"], erro)
+
+        yield from resultados
+
+
+def resumir_importacao(resultados):
+    """Consome os resultados e devolve (total importado, lista de erros)"""
+    importados = 0
+    erros = []
+    for resultado in resultados:
+        if resultado["status"] == "ok":
+            importados += 1
+        else:
+            erros.append(resultado)
+    return importados, erros
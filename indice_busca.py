@@ -0,0 +1,220 @@
+"""
+Índice de busca em memória para os seletores de produto e cliente (autocompletar)
+
+O índice guarda, em uma lista ordenada, os prefixos de busca de cada item: as
+palavras do nome (minúsculas e sem acentos) e o código ou CPF. Uma busca
+localiza com bisect a faixa de entradas que começam com o termo digitado, sem
+percorrer o catálogo, e devolve só as melhores opções. É montado uma vez por
+processo e acompanha as gravações pelas notificações de sistema_varejo.
+"""
+
+import bisect
+import threading
+import time
+
+from sistema_varejo import normalizar_busca, registrar_ouvinte
+
+LIMITE_SUGESTOES = 10
+IDADE_MAXIMA_S = 600
+
+# Acima disso, adicionar_varios intercala um lote ordenado em vez de inserir entrada por entrada
+LIMITE_INSERCAO_INDIVIDUAL = 64
+
+
+class IndiceBusca:
+    """
+    Índice de prefixos de um conjunto de itens (chave -> rótulo).
+    É seguro para várias threads: buscas e atualizações usam o mesmo lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._itens = {}       # chave -> (rótulo, termos indexados)
+        self._entradas = []    # lista ordenada de (termo, chave)
+
+    def __len__(self):
+        return len(self._itens)
+
+    @staticmethod
+    def _termos(textos):
+        termos = set()
+        for texto in textos:
+            texto = normalizar_busca(texto)
+            if texto:
+                termos.add(texto)
+                termos.update(texto.split())
+        return termos
+
+    def adicionar(self, chave, rotulo, textos):
+        """Indexa (ou reindexa) um item pelos textos informados"""
+        with self._lock:
+            self.remover(chave)
+            termos = self._termos(textos)
+            self._itens[chave] = (rotulo, termos)
+            for termo in termos:
+                bisect.insort(self._entradas, (termo, chave))
+
+    def adicionar_varios(self, itens):
+        """
+        Indexa (ou reindexa) vários itens; itens: iterável de (chave, rótulo, textos).
+        Lotes grandes (ex.: importação de produtos) são ordenados e intercalados com as
+        entradas atuais de uma vez, em vez de uma inserção O(n) por termo: o sort de duas
+        sequências já ordenadas é uma intercalação linear.
+        """
+        itens = list(itens)
+        if len(itens) <= LIMITE_INSERCAO_INDIVIDUAL:
+            with self._lock:
+                for chave, rotulo, textos in itens:
+                    self.adicionar(chave, rotulo, textos)
+            return
+
+        novos_itens = {chave: (rotulo, self._termos(textos)) for chave, rotulo, textos in itens}
+        novas_entradas = sorted((termo, chave) for chave, (_, termos) in novos_itens.items() for termo in termos)
+
+        with self._lock:
+            entradas = self._entradas
+            # Itens já indexados perdem os termos antigos (uma passada, só se houver algum)
+            if any(chave in self._itens for chave in novos_itens):
+                entradas = [entrada for entrada in entradas if entrada[1] not in novos_itens]
+            entradas = entradas + novas_entradas
+            entradas.sort()
+            self._entradas = entradas
+            self._itens.update(novos_itens)
+
+    def remover(self, chave):
+        with self._lock:
+            item = self._itens.pop(chave, None)
+            if item is None:
+                return
+            for termo in item[1]:
+                posicao = bisect.bisect_left(self._entradas, (termo, chave))
+                if posicao < len(self._entradas) and self._entradas[posicao] == (termo, chave):
+                    del self._entradas[posicao]
+
+    def carregar(self, itens):
+        """Substitui o conteúdo do índice; itens: iterável de (chave, rótulo, textos)"""
+        novos_itens = {}
+        entradas = []
+        for chave, rotulo, textos in itens:
+            termos = self._termos(textos)
+            novos_itens[chave] = (rotulo, termos)
+            entradas.extend((termo, chave) for termo in termos)
+        entradas.sort()
+
+        with self._lock:
+            self._itens = novos_itens
+            self._entradas = entradas
+
+    def _faixa(self, prefixo):
+        """Posições (início, fim) das entradas cujo termo começa com o prefixo"""
+        inicio = bisect.bisect_left(self._entradas, (prefixo,))
+        fim = bisect.bisect_left(self._entradas, (prefixo + "\U0010ffff",), inicio)
+        return inicio, fim
+
+    def buscar(self, texto, limite=LIMITE_SUGESTOES):
+        """
+        Retorna até `limite` itens (chave, rótulo) que tenham um termo começando com
+        cada palavra digitada. Códigos/CPFs e nomes iguais ao texto vêm primeiro.
+        """
+        palavras = normalizar_busca(texto).split()
+        if not palavras:
+            return []
+
+        completo = " ".join(palavras)
+        with self._lock:
+            exatos = []
+            encontrados = []
+            vistos = set()
+
+            # Percorrer só a faixa da palavra com menos entradas; as outras são conferidas por item
+            inicio, fim = min((self._faixa(p) for p in palavras), key=lambda faixa: faixa[1] - faixa[0])
+            for posicao in range(inicio, fim):
+                chave = self._entradas[posicao][1]
+                if chave in vistos:
+                    continue
+                rotulo, termos = self._itens[chave]
+                if not all(any(t.startswith(p) for t in termos) for p in palavras):
+                    continue
+                vistos.add(chave)
+                (exatos if completo in termos else encontrados).append((chave, rotulo))
+                if len(exatos) >= limite:
+                    break
+                # Opções suficientes para escolher as melhores; o resto da faixa não é percorrido
+                if len(exatos) + len(encontrados) >= limite * 4:
+                    break
+
+        encontrados.sort(key=lambda item: normalizar_busca(item[1]))
+        return (exatos + encontrados)[:limite]
+
+    def rotulo(self, chave):
+        item = self._itens.get(chave)
+        return item[0] if item else None
+
+
+# Índices compartilhados do processo
+
+def rotulo_produto(produto):
+    return f"{produto.get('nome')} (Código: {produto.get('cod_produto')})"
+
+
+def rotulo_cliente(cliente):
+    return f"{cliente.get('nome')} (CPF: {cliente.get('cpf')})"
+
+
+class IndicesSistema:
+    """
+    Índices de produtos e clientes compartilhados pelo processo.
+    São montados na primeira busca, atualizados a cada cadastro feito pelo processo
+    e recarregados do banco depois de IDADE_MAXIMA_S (para incluir gravações de
+    outros processos).
+    """
+
+    def __init__(self, gerenciador_produtos, gerenciador_clientes, idade_maxima_s=IDADE_MAXIMA_S):
+        self._gerenciador_produtos = gerenciador_produtos
+        self._gerenciador_clientes = gerenciador_clientes
+        self._idade_maxima_s = idade_maxima_s
+        self._lock = threading.Lock()
+        self.produtos = IndiceBusca()
+        self.clientes = IndiceBusca()
+        self._carregado_em = None
+        registrar_ouvinte(self._ao_alterar)
+
+    def _ao_alterar(self, evento, dados):
+        if self._carregado_em is None:
+            return
+        if evento == "produtos":
+            self.produtos.adicionar_varios(
+                (p["cod_produto"], rotulo_produto(p), [p.get("nome"), p["cod_produto"]]) for p in dados["produtos"]
+            )
+        elif evento == "clientes":
+            self.clientes.adicionar_varios(
+                (c["cpf"], rotulo_cliente(c), [c.get("nome"), c["cpf"]]) for c in dados["clientes"]
+            )
+
+    def recarregar(self):
+        """
+        Monta os dois índices a partir do banco, lendo só os campos indexados direto das coleções:
+        o cache dos gerenciadores guardaria mais uma cópia do catálogo inteiro.
+        """
+        with self._lock:
+            produtos = self._gerenciador_produtos._colecao_produtos.find({}, {"_id": 0, "nome": 1, "cod_produto": 1})
+            self.produtos.carregar(
+                (p["cod_produto"], rotulo_produto(p), [p.get("nome"), p["cod_produto"]]) for p in produtos
+            )
+            clientes = self._gerenciador_clientes._colecao_clientes.find({}, {"_id": 0, "nome": 1, "cpf": 1})
+            self.clientes.carregar(
+                (c["cpf"], rotulo_cliente(c), [c.get("nome"), c["cpf"]]) for c in clientes
+            )
+            self._carregado_em = time.monotonic()
+
+    def _garantir_carregado(self):
+        if self._carregado_em is None or time.monotonic() - self._carregado_em > self._idade_maxima_s:
+            self.recarregar()
+
+    def buscar_produtos(self, texto, limite=LIMITE_SUGESTOES):
+        self._garantir_carregado()
+        return self.produtos.buscar(texto, limite)
+
+    def buscar_clientes(self, texto, limite=LIMITE_SUGESTOES):
+        self._garantir_carregado()
+        return self.clientes.buscar(texto, limite)
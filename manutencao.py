@@ -0,0 +1,266 @@
+"""
+Tarefas de manutenção do banco do sistema de varejo
+
+Uso:
+    python manutencao.py indices [--uri URI]
+    python manutencao.py reconstruir-resumo [--uri URI]
+    python manutencao.py verificar-resumo [--uri URI]
+    python manutencao.py campos-busca [--uri URI]
+    python manutencao.py reconstruir-agregados [--inicio AAAA-MM-DD] [--fim AAAA-MM-DD] [--uri URI]
+    python manutencao.py migrar-movimentacoes [--remover-antiga] [--uri URI]
+    python manutencao.py snapshot-estoque [--data "AAAA-MM-DD HH:MM"] [--uri URI]
+    python manutencao.py monitorar [--uri URI]
+    python manutencao.py promocoes [--uri URI]
+    python manutencao.py promocoes salvar CODIGO --tipo porcentagem|valor --desconto N [--descricao ...]
+        [--inicio AAAA-MM-DD] [--fim AAAA-MM-DD] [--categorias C ...] [--valor-minimo N] [--cumulativa]
+    python manutencao.py promocoes desativar CODIGO
+"""
+
+import argparse
+import datetime as dt
+import sys
+import time
+
+from dotenv import load_dotenv
+
+from monitor_alteracoes import MonitorAlteracoes
+from sistema_varejo import (
+    COLECAO_MOVIMENTACOES,
+    AgregadosVendas,
+    GerenciadorProdutos,
+    MotorPromocoes,
+    ResumoDashboard,
+    SnapshotsEstoque,
+    garantir_indices,
+    migrar_movimentacoes,
+    montar_promocao,
+    obter_banco,
+    verificar_indices,
+)
+
+
+def comando_indices(db):
+    """Cria os índices que faltam, remove os obsoletos e mostra o resultado"""
+    print("\n=== ÍNDICES ===")
+    try:
+        criados = garantir_indices(db)
+    except RuntimeError as e:
+        # Ex.: códigos ou CPFs duplicados já gravados impedem o índice único
+        print(e)
+        criados = {}
+    for colecao, nomes in criados.items():
+        print(f"{colecao}: criado(s) {', '.join(nomes)}")
+
+    problemas = verificar_indices(db)
+    if problemas:
+        for colecao, indice, problema in problemas:
+            print(f"{colecao}.{indice}: {problema}")
+        return False
+
+    print("Todos os índices estão criados.")
+    return True
+
+
+def comando_reconstruir_resumo(db):
+    """Recalcula o resumo do dashboard a partir das coleções"""
+    resumo = ResumoDashboard(db).reconstruir()
+
+    print("\n=== RESUMO DO DASHBOARD RECONSTRUÍDO ===")
+    print(f"Produtos: {resumo['total_produtos']}")
+    print(f"Clientes: {resumo['total_clientes']}")
+    print(f"Vendas: {resumo['total_vendas']} (R$ {resumo['valor_vendas']:.2f})")
+    print(f"Valor em estoque: R$ {resumo['valor_estoque']:.2f}")
+    print(f"Produtos com estoque baixo: {len(resumo['estoque_baixo'])}")
+    return True
+
+
+def comando_verificar_resumo(db):
+    """Compara o resumo gravado com um recálculo completo"""
+    diferencas = ResumoDashboard(db).verificar_consistencia()
+
+    print("\n=== CONFERÊNCIA DO RESUMO DO DASHBOARD ===")
+    if diferencas:
+        for campo, gravado, calculado in diferencas:
+            print(f"{campo}: gravado {gravado}, recalculado {calculado}")
+        print("Use 'reconstruir-resumo' para corrigir.")
+        return False
+
+    print("O resumo está consistente com as coleções.")
+    return True
+
+
+def comando_campos_busca(uri):
+    """Preenche o campo de busca dos produtos cadastrados antes da busca por prefixo"""
+    atualizados = GerenciadorProdutos(uri).preencher_campos_busca()
+
+    print("\n=== CAMPOS DE BUSCA DOS PRODUTOS ===")
+    print(f"Produtos atualizados: {atualizados}")
+    return True
+
+
+def comando_reconstruir_agregados(db, data_inicio=None, data_fim=None):
+    """Recalcula os totais de vendas por hora, dia e mês a partir das vendas"""
+    documentos = AgregadosVendas(db).reconstruir(data_inicio, data_fim)
+
+    print("\n=== TOTAIS AGREGADOS DE VENDAS RECONSTRUÍDOS ===")
+    print(f"Período: {data_inicio or 'início'} a {data_fim or 'hoje'}")
+    print(f"Documentos gravados: {documentos}")
+    return True
+
+
+def comando_migrar_movimentacoes(db, remover_antiga=False):
+    """Converte o histórico de movimentações em série temporal (executar com o sistema parado)"""
+    antes, migradas = migrar_movimentacoes(db)
+
+    print("\n=== MIGRAÇÃO DAS MOVIMENTAÇÕES PARA SÉRIE TEMPORAL ===")
+    print(f"Movimentações na coleção antiga: {antes}")
+    print(f"Movimentações na série temporal: {migradas}")
+    if antes != migradas:
+        print(f"As quantidades não conferem; a coleção {COLECAO_MOVIMENTACOES}_antiga foi mantida.")
+        return False
+
+    if remover_antiga:
+        db.drop_collection(f"{COLECAO_MOVIMENTACOES}_antiga")
+        print("Coleção antiga removida.")
+    return True
+
+
+def comando_snapshot_estoque(db, data=None):
+    """Grava a fotografia do estoque de todos os produtos (agendar, por exemplo, para todo fim de dia)"""
+    data = data or dt.datetime.now()
+    gravadas = SnapshotsEstoque(db).gerar(data)
+
+    print("\n=== FOTOGRAFIA DO ESTOQUE ===")
+    print(f"Instante: {data:%d/%m/%Y %H:%M:%S}")
+    print(f"Produtos fotografados: {gravadas}")
+    return True
+
+
+def comando_monitorar(db):
+    """Acompanha as alterações ao vivo e mostra as métricas a cada mudança (Ctrl+C encerra)"""
+    monitor = MonitorAlteracoes(db).iniciar()
+    if not monitor.ativo:
+        print(monitor.erro)
+        return False
+
+    print("\n=== MONITOR DE ALTERAÇÕES (Ctrl+C para sair) ===")
+    versao = None
+    try:
+        while True:
+            metricas = monitor.estado.metricas()
+            if metricas["versao"] != versao:
+                versao = metricas["versao"]
+                print(
+                    f"[{time.strftime('%H:%M:%S')}] vendas: {metricas['vendas']} "
+                    f"(R$ {metricas['valor_vendas']:.2f}) | valor em estoque: R$ {metricas['valor_estoque']:.2f} "
+                    f"| estoque baixo: {metricas['total_estoque_baixo']} | eventos: {monitor.eventos}"
+                )
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        monitor.parar()
+    return True
+
+
+def comando_promocoes(db, acao=None, args=None):
+    """Lista, grava ou desativa promoções (as telas passam a usar a alteração na próxima consulta)"""
+    motor = MotorPromocoes(db)
+
+    try:
+        if acao == "salvar":
+            motor.salvar(montar_promocao(
+                args.codigo, args.descricao, args.tipo, args.desconto,
+                inicio=args.inicio,
+                fim=dt.datetime.combine(args.fim, dt.time.max) if args.fim else None,
+                categorias=args.categorias,
+                valor_minimo=args.valor_minimo,
+                cumulativa=args.cumulativa
+            ))
+        elif acao == "desativar":
+            motor.desativar(args.codigo)
+    except ValueError as e:
+        print(e)
+        return False
+
+    print("\n=== PROMOÇÕES ===")
+    for promocao in motor.tabela().promocoes:
+        validade = " a ".join(
+            data.strftime("%d/%m/%Y") if data else "-" for data in (promocao.get("inicio"), promocao.get("fim"))
+        )
+        print(
+            f"{promocao['codigo']}: {promocao['descricao']} | {promocao['tipo']} {promocao['desconto']:g} "
+            f"| validade: {validade} | categorias: {', '.join(promocao.get('categorias') or []) or 'todas'} "
+            f"| mínimo: R$ {promocao.get('valor_minimo', 0):.2f} "
+            f"| {'cumulativa' if promocao.get('cumulativa') else 'não cumulativa'} "
+            f"| {'ativa' if promocao.get('ativa', True) else 'inativa'}"
+        )
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manutenção do banco do sistema de varejo")
+    parser.add_argument("--uri", default=None, help="URI do MongoDB (padrão: MONGO_URI do .env)")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    subparsers.add_parser("indices", help="Cria e verifica os índices das coleções (e preenche o campo de busca dos produtos)")
+    subparsers.add_parser("reconstruir-resumo", help="Recalcula o resumo do dashboard")
+    subparsers.add_parser("verificar-resumo", help="Confere o resumo do dashboard com as coleções")
+    subparsers.add_parser("campos-busca", help="Preenche o campo de busca por nome dos produtos")
+    agregados = subparsers.add_parser("reconstruir-agregados", help="Recalcula os totais de vendas por hora, dia e mês")
+    agregados.add_argument("--inicio", type=lambda t: dt.datetime.strptime(t, "%Y-%m-%d"), default=None,
+                           help="Primeiro mês a recalcular (AAAA-MM-DD)")
+    agregados.add_argument("--fim", type=lambda t: dt.datetime.strptime(t, "%Y-%m-%d"), default=None,
+                           help="Último mês a recalcular (AAAA-MM-DD)")
+    migrar = subparsers.add_parser("migrar-movimentacoes", help="Converte as movimentações em série temporal")
+    migrar.add_argument("--remover-antiga", action="store_true", help="Remove a coleção antiga após a conferência")
+    snapshot = subparsers.add_parser("snapshot-estoque", help="Grava a fotografia do estoque de todos os produtos")
+    snapshot.add_argument("--data", type=lambda t: dt.datetime.strptime(t, "%Y-%m-%d %H:%M"), default=None,
+                          help="Instante da fotografia (padrão: agora)")
+    subparsers.add_parser("monitorar", help="Mostra as métricas do dashboard ao vivo (change streams)")
+    promocoes = subparsers.add_parser("promocoes", help="Lista, grava ou desativa promoções")
+    acoes = promocoes.add_subparsers(dest="acao")
+    salvar = acoes.add_parser("salvar", help="Grava (ou substitui) uma promoção")
+    salvar.add_argument("codigo")
+    salvar.add_argument("--tipo", required=True, choices=["porcentagem", "valor"])
+    salvar.add_argument("--desconto", type=float, required=True, help="Porcentagem ou valor em R$")
+    salvar.add_argument("--descricao", default=None)
+    salvar.add_argument("--inicio", type=lambda t: dt.datetime.strptime(t, "%Y-%m-%d"), default=None,
+                        help="Primeiro dia de validade (AAAA-MM-DD)")
+    salvar.add_argument("--fim", type=lambda t: dt.datetime.strptime(t, "%Y-%m-%d"), default=None,
+                        help="Último dia de validade (AAAA-MM-DD)")
+    salvar.add_argument("--categorias", nargs="+", default=None, help="Categorias de produto em que vale (padrão: todas)")
+    salvar.add_argument("--valor-minimo", type=float, default=0.0, help="Valor elegível mínimo no carrinho")
+    salvar.add_argument("--cumulativa", action="store_true", help="Soma-se às outras promoções")
+    desativar = acoes.add_parser("desativar", help="Desativa uma promoção")
+    desativar.add_argument("codigo")
+
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+
+    # obter_banco só verifica os índices; quem cria é o comando "indices"
+    db = obter_banco(args.uri)
+
+    if args.comando == "indices":
+        ok = comando_indices(db)
+    elif args.comando == "reconstruir-resumo":
+        ok = comando_reconstruir_resumo(db)
+    elif args.comando == "verificar-resumo":
+        ok = comando_verificar_resumo(db)
+    elif args.comando == "campos-busca":
+        ok = comando_campos_busca(args.uri)
+    elif args.comando == "reconstruir-agregados":
+        ok = comando_reconstruir_agregados(db, args.inicio, args.fim)
+    elif args.comando == "migrar-movimentacoes":
+        ok = comando_migrar_movimentacoes(db, args.remover_antiga)
+    elif args.comando == "snapshot-estoque":
+        ok = comando_snapshot_estoque(db, args.data)
+    elif args.comando == "monitorar":
+        ok = comando_monitorar(db)
+    elif args.comando == "promocoes":
+        ok = comando_promocoes(db, args.acao, args)
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,287 @@
+"""
+Atualização ao vivo do dashboard com change streams do MongoDB
+
+Uma thread em segundo plano acompanha as alterações das coleções vendas,
+estoque_produtos e resumo_dashboard e aplica cada evento a um estado em
+memória (EstadoDashboard). As telas leem esse estado em vez de consultar o
+banco a cada atualização. O histórico de movimentações é uma série temporal,
+que não gera eventos de change stream: as últimas movimentações são lidas
+pela mesma thread a cada INTERVALO_MOVIMENTACOES_S.
+
+Change streams exigem replica set (o Atlas já é um). Para testar localmente,
+basta um replica set de um nó:
+
+    mongod --replSet rs0 --dbpath /tmp/rs0
+    mongosh --eval "rs.initiate()"
+    MONGO_URI="mongodb://localhost:27017/?directConnection=true"
+
+Em um servidor standalone o monitor fica inativo (ativo=False, erro
+preenchido) e as telas voltam a ler o resumo do dashboard do banco.
+"""
+
+import collections
+import copy
+import threading
+import time
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from sistema_varejo import COLECAO_MOVIMENTACOES, LIMITE_ESTOQUE_BAIXO, PROJECAO_MOVIMENTACAO, ResumoDashboard
+
+COLECOES_MONITORADAS = ["vendas", "estoque_produtos", "resumo_dashboard"]
+INTERVALO_MOVIMENTACOES_S = 2
+
+# Maior quantidade acompanhada para alertas de estoque (a tela de alerta filtra abaixo disso)
+LIMITE_ESTOQUE_MONITORADO = 100
+MAX_RECENTES = 20
+
+# Códigos de erro do servidor
+ERRO_SEM_REPLICA_SET = 40573
+ERRO_HISTORICO_PERDIDO = 286
+
+
+class EstadoDashboard:
+    """
+    Métricas do dashboard em memória, atualizadas evento a evento.
+    versao muda a cada alteração aplicada, para as telas saberem se há novidade.
+    """
+
+    def __init__(self, limite_estoque=LIMITE_ESTOQUE_MONITORADO, max_recentes=MAX_RECENTES):
+        self._lock = threading.Lock()
+        self.limite_estoque = limite_estoque
+        self.versao = 0
+        self.atualizado_em = None
+        self._metricas = {}
+        self._estoque = {}              # cod_produto -> produto com estoque abaixo de limite_estoque
+        self._cods_por_id = {}          # _id -> cod_produto (eventos de exclusão só trazem o _id)
+        self._ultimas_vendas = collections.deque(maxlen=max_recentes)
+        self._ultimas_movimentacoes = collections.deque(maxlen=max_recentes)
+        self._ids_movimentacoes = collections.deque(maxlen=max_recentes)
+
+    def _alterado(self):
+        self.versao += 1
+        self.atualizado_em = time.time()
+
+    def carregar(self, db):
+        """Monta o estado inicial: o documento de resumo e os produtos com estoque baixo"""
+        resumo = ResumoDashboard(db).obter()
+        produtos = db["estoque_produtos"].find(
+            {"qnt_estoque": {"$lt": self.limite_estoque}},
+            {"nome": 1, "cod_produto": 1, "categoria": 1, "qnt_estoque": 1}
+        )
+        with self._lock:
+            self._metricas = ResumoDashboard.metricas(resumo)
+            self._estoque = {}
+            self._cods_por_id = {}
+            for produto in produtos:
+                self._guardar_produto(produto)
+            self._ultimas_movimentacoes.clear()
+            self._ids_movimentacoes.clear()
+            self._alterado()
+
+        self.atualizar_movimentacoes(db)
+
+    def atualizar_movimentacoes(self, db):
+        """
+        Acrescenta as movimentações gravadas a partir da mais recente já conhecida.
+        Retorna True se alguma movimentação nova foi encontrada.
+        """
+        with self._lock:
+            desde = self._ultimas_movimentacoes[0]["data_movimentacao"] if self._ultimas_movimentacoes else None
+            conhecidas = set(self._ids_movimentacoes)
+
+        filtro = {"data_movimentacao": {"$gte": desde}} if desde else {}
+        novas = [
+            movimentacao
+            for movimentacao in db[COLECAO_MOVIMENTACOES].aggregate([
+                {"$match": filtro},
+                {"$sort": {"data_movimentacao": -1}},
+                {"$limit": self._ultimas_movimentacoes.maxlen},
+                {"$project": dict(PROJECAO_MOVIMENTACAO, _id=1)}
+            ])
+            if movimentacao["_id"] not in conhecidas
+        ]
+        if not novas:
+            return False
+
+        with self._lock:
+            for movimentacao in reversed(novas):
+                self._ids_movimentacoes.appendleft(movimentacao["_id"])
+                self._ultimas_movimentacoes.appendleft({
+                    "data_movimentacao": movimentacao.get("data_movimentacao"),
+                    "cod_produto": movimentacao.get("cod_produto"),
+                    "nome_produto": movimentacao.get("nome_produto", ""),
+                    "tipo_movimentacao": movimentacao.get("tipo_movimentacao"),
+                    "quantidade": movimentacao.get("quantidade", 0)
+                })
+            self._alterado()
+        return True
+
+    def _guardar_produto(self, produto):
+        cod_produto = produto["cod_produto"]
+        self._cods_por_id[produto["_id"]] = cod_produto
+        if produto.get("qnt_estoque", 0) < self.limite_estoque:
+            self._estoque[cod_produto] = {
+                "cod_produto": cod_produto,
+                "nome": produto.get("nome", ""),
+                "categoria": produto.get("categoria", ""),
+                "qnt_estoque": produto.get("qnt_estoque", 0)
+            }
+        else:
+            self._estoque.pop(cod_produto, None)
+
+    def aplicar(self, evento):
+        """Aplica um evento de change stream ao estado"""
+        colecao = evento["ns"]["coll"]
+        operacao = evento["operationType"]
+        documento = evento.get("fullDocument")
+
+        with self._lock:
+            if colecao == "resumo_dashboard" and documento:
+                self._metricas = ResumoDashboard.metricas(documento)
+
+            elif colecao == "estoque_produtos":
+                if operacao == "delete":
+                    cod_produto = self._cods_por_id.pop(evento["documentKey"]["_id"], None)
+                    self._estoque.pop(cod_produto, None)
+                elif documento:
+                    self._guardar_produto(documento)
+
+            elif colecao == "vendas" and operacao == "insert":
+                self._ultimas_vendas.appendleft({
+                    "data_venda": documento.get("data_venda"),
+                    "cpf_cliente": documento.get("cpf_cliente"),
+                    "qnt_vendida": documento.get("qnt_vendida", 0),
+                    "valor_total": documento.get("valor_total", 0)
+                })
+
+            else:
+                return
+
+            self._alterado()
+
+    def metricas(self, limite_estoque_baixo=LIMITE_ESTOQUE_BAIXO, max_itens_estoque_baixo=50):
+        """Cópia das métricas no formato de Dashboard.resumo, com os produtos abaixo do limite informado"""
+        if limite_estoque_baixo > self.limite_estoque:
+            raise ValueError(f"O estado acompanha apenas estoques abaixo de {self.limite_estoque}")
+
+        with self._lock:
+            metricas = copy.deepcopy(self._metricas)
+            estoque_baixo = sorted(
+                (dict(p) for p in self._estoque.values() if p["qnt_estoque"] < limite_estoque_baixo),
+                key=lambda p: p["qnt_estoque"]
+            )
+            metricas["ultimas_vendas"] = list(self._ultimas_vendas)
+            metricas["ultimas_movimentacoes"] = list(self._ultimas_movimentacoes)
+            metricas["versao"] = self.versao
+
+        metricas["estoque_baixo"] = estoque_baixo[:max_itens_estoque_baixo]
+        metricas["total_estoque_baixo"] = len(estoque_baixo)
+        return metricas
+
+
+class MonitorAlteracoes:
+    """
+    Thread que lê o change stream do banco e alimenta um EstadoDashboard.
+    Em falhas temporárias reconecta e continua do último evento (resume token);
+    se o histórico do oplog já não tem esse ponto, recarrega o estado do banco.
+    """
+
+    def __init__(self, db, estado=None, colecoes=COLECOES_MONITORADAS):
+        self._db = db
+        self.estado = estado or EstadoDashboard()
+        self._pipeline = [{"$match": {"ns.coll": {"$in": list(colecoes)}}}]
+        self._parar = threading.Event()
+        self._thread = None
+        self._token = None
+        self.ativo = False
+        self.erro = None
+        self.eventos = 0
+
+    def iniciar(self):
+        """Carrega o estado inicial e começa a acompanhar as alterações"""
+        if self._thread is not None and self._thread.is_alive():
+            return self
+
+        self._parar.clear()
+
+        # Abrir o stream antes de carregar o estado, para nenhuma alteração ficar entre os dois;
+        # em servidor standalone o erro aparece aqui
+        try:
+            stream = self._abrir()
+        except OperationFailure as e:
+            if e.code != ERRO_SEM_REPLICA_SET:
+                raise
+            self.erro = "Change streams exigem replica set; o dashboard será atualizado sob demanda."
+            self.estado.carregar(self._db)
+            return self
+
+        self.estado.carregar(self._db)
+
+        self.ativo = True
+        self.erro = None
+        self._thread = threading.Thread(target=self._executar, args=(stream,), name="monitor-alteracoes", daemon=True)
+        self._thread.start()
+        return self
+
+    def recarregar_estado(self):
+        """Relê o estado do banco (usado pelas telas quando o monitor está inativo)"""
+        self.estado.carregar(self._db)
+
+    def parar(self, timeout=5):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.ativo = False
+
+    def _abrir(self):
+        return self._db.watch(
+            self._pipeline,
+            full_document="updateLookup",
+            resume_after=self._token,
+            max_await_time_ms=1000
+        )
+
+    def _executar(self, stream):
+        espera = 1
+        recarregar = False
+        consulta_movimentacoes = time.monotonic()
+        while not self._parar.is_set():
+            try:
+                if stream is None:
+                    stream = self._abrir()
+                    self.erro = None
+                if recarregar:
+                    self.estado.carregar(self._db)
+                    recarregar = False
+                with stream:
+                    while not self._parar.is_set():
+                        evento = stream.try_next()
+                        if evento is not None:
+                            self.estado.aplicar(evento)
+                            self.eventos += 1
+                        self._token = stream.resume_token
+                        espera = 1
+                        if time.monotonic() - consulta_movimentacoes >= INTERVALO_MOVIMENTACOES_S:
+                            self.estado.atualizar_movimentacoes(self._db)
+                            consulta_movimentacoes = time.monotonic()
+                stream = None
+
+            except OperationFailure as e:
+                stream = None
+                if e.code == ERRO_HISTORICO_PERDIDO:
+                    # Eventos perdidos: recomeçar do estado atual do banco
+                    self._token = None
+                    recarregar = True
+                else:
+                    self.erro = str(e)
+                    self._parar.wait(espera)
+                    espera = min(espera * 2, 30)
+
+            except PyMongoError as e:
+                stream = None
+                self.erro = str(e)
+                self._parar.wait(espera)
+                espera = min(espera * 2, 30)
+
+        self.ativo = False
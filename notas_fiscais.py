@@ -0,0 +1,334 @@
+"""
+Emissão de notas fiscais em lote
+
+As vendas são escolhidas por período ou por uma lista de IDs e processadas em
+blocos: cada bloco lê as vendas, os produtos e os clientes com três consultas
+($in) e as notas são montadas por um pool de processos, com a mesma função da
+emissão individual (renderizar_nota_fiscal). O pool só é criado quando há mais
+de um bloco; lotes pequenos são montados no próprio processo. Os processos do
+pool são iniciados com "spawn": um fork copiaria as threads do MongoClient (e,
+no Streamlit, as do servidor) e pode travar. O aplicativo usa processos=1.
+
+Cada nota é identificada pelo ID da venda mais um hash do desconto aplicado
+(chave_nota). Antes de montar um bloco, as chaves já gravadas no destino
+(arquivo zip ou GridFS) são descartadas: uma nota nunca é gerada duas vezes.
+No GridFS, o índice único do nome do arquivo (notas_fiscais.files, ver INDICES)
+garante isso mesmo com duas emissões simultâneas.
+
+Uso:
+    python notas_fiscais.py --inicio 2025-01-01 --fim 2025-01-31 --zip notas.zip [--processos 4] [--uri URI]
+    python notas_fiscais.py --ids ID [ID ...] --gridfs
+"""
+
+import argparse
+import collections
+import concurrent.futures
+import datetime as dt
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import zipfile
+
+import gridfs
+from bson import ObjectId
+from dotenv import load_dotenv
+from pymongo.errors import DuplicateKeyError
+
+from sistema_varejo import itens_da_venda, obter_banco, renderizar_nota_fiscal
+
+TAMANHO_BLOCO_NOTAS = 500
+COLECAO_NOTAS = "notas_fiscais"
+
+# Campos do desconto que aparecem na nota (os demais são derivados da venda)
+CAMPOS_DESCONTO = ("desconto_aplicado", "valor_final", "tipo_desconto", "promocao")
+
+
+def chave_nota(id_venda, desconto=None):
+    """Identificador da nota: ID da venda mais o hash do desconto (ou "sem-desconto")"""
+    if not desconto:
+        return f"{id_venda}-sem-desconto"
+    conteudo = json.dumps({campo: desconto.get(campo) for campo in CAMPOS_DESCONTO}, sort_keys=True, default=str)
+    return f"{id_venda}-{hashlib.sha256(conteudo.encode('utf-8')).hexdigest()[:16]}"
+
+
+def nome_arquivo_nota(chave):
+    return f"nota_fiscal_{chave}.txt"
+
+
+# Destinos das notas
+
+class DestinoZip:
+    """Notas gravadas como arquivos de texto em um zip (acrescentadas se o zip já existir)"""
+
+    def __init__(self, caminho):
+        self._zip = zipfile.ZipFile(caminho, "a", compression=zipfile.ZIP_DEFLATED)
+        self._nomes = set(self._zip.namelist())
+
+    def existentes(self, chaves):
+        return {chave for chave in chaves if nome_arquivo_nota(chave) in self._nomes}
+
+    def gravar(self, notas):
+        """Grava as notas; retorna quantas foram gravadas"""
+        for chave, texto in notas:
+            nome = nome_arquivo_nota(chave)
+            self._zip.writestr(nome, texto)
+            self._nomes.add(nome)
+        return len(notas)
+
+    def close(self):
+        self._zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.close()
+
+
+class DestinoGridFS:
+    """Notas gravadas no GridFS do banco (bucket notas_fiscais), uma por arquivo"""
+
+    def __init__(self, db, colecao=COLECAO_NOTAS):
+        self._fs = gridfs.GridFS(db, collection=colecao)
+        self._arquivos = db[f"{colecao}.files"]
+        self._partes = db[f"{colecao}.chunks"]
+
+    def existentes(self, chaves):
+        nomes = {nome_arquivo_nota(chave): chave for chave in chaves}
+        return {
+            nomes[arquivo["filename"]]
+            for arquivo in self._arquivos.find({"filename": {"$in": list(nomes)}}, {"_id": 0, "filename": 1})
+        }
+
+    def gravar(self, notas):
+        """
+        Grava as notas; retorna quantas foram gravadas. Uma nota gravada por outra emissão
+        depois da consulta de existentes esbarra no índice único e é descartada.
+        """
+        gravadas = 0
+        for chave, texto in notas:
+            id_arquivo = ObjectId()
+            try:
+                self._fs.put(
+                    texto.encode("utf-8"),
+                    _id=id_arquivo,
+                    filename=nome_arquivo_nota(chave),
+                    contentType="text/plain",
+                    id_venda=chave.split("-", 1)[0]
+                )
+                gravadas += 1
+            except (DuplicateKeyError, gridfs.errors.FileExists):
+                # O GridFS grava as partes antes do documento do arquivo
+                self._partes.delete_many({"files_id": id_arquivo})
+        return gravadas
+
+    def compactar(self, arquivo, chaves, tamanho_bloco=TAMANHO_BLOCO_NOTAS):
+        """
+        Grava em `arquivo` (caminho ou arquivo aberto) um zip com as notas das chaves informadas.
+        As notas são lidas em blocos, duas consultas por bloco (arquivos e partes).
+        """
+        nomes = sorted(nome_arquivo_nota(chave) for chave in chaves)
+        with zipfile.ZipFile(arquivo, "w", compression=zipfile.ZIP_DEFLATED) as zip_notas:
+            for inicio in range(0, len(nomes), tamanho_bloco):
+                arquivos = {
+                    a["_id"]: a["filename"]
+                    for a in self._arquivos.find({"filename": {"$in": nomes[inicio:inicio + tamanho_bloco]}},
+                                                 {"filename": 1})
+                }
+                conteudos = collections.defaultdict(list)
+                for parte in self._partes.find({"files_id": {"$in": list(arquivos)}},
+                                               sort=[("files_id", 1), ("n", 1)]):
+                    conteudos[parte["files_id"]].append(parte["data"])
+                for id_arquivo, nome in sorted(arquivos.items(), key=lambda item: item[1]):
+                    zip_notas.writestr(nome, b"".join(conteudos[id_arquivo]))
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.close()
+
+
+# Montagem (executada nos processos do pool)
+
+def _renderizar_bloco(tarefas, produtos, clientes):
+    """tarefas: lista de (chave, venda, desconto); retorna lista de (chave, texto)"""
+    return [
+        (chave, renderizar_nota_fiscal(venda, produtos, clientes.get(venda.get("cpf_cliente")), desconto))
+        for chave, venda, desconto in tarefas
+    ]
+
+
+class EmissorNotasFiscais:
+    """Emite as notas fiscais de várias vendas de uma vez"""
+
+    def __init__(self, mongodb_uri=None):
+        self._db = obter_banco(mongodb_uri)
+        self._colecao_vendas = self._db["vendas"]
+        self._colecao_produtos = self._db["estoque_produtos"]
+        self._colecao_clientes = self._db["clientes"]
+
+    def destino_gridfs(self):
+        return DestinoGridFS(self._db)
+
+    def _blocos_por_ids(self, ids, tamanho_bloco):
+        ids = list(dict.fromkeys(ObjectId(id_venda) for id_venda in ids))
+        for inicio in range(0, len(ids), tamanho_bloco):
+            bloco = ids[inicio:inicio + tamanho_bloco]
+            yield bloco, self._colecao_vendas.find({"_id": {"$in": bloco}})
+
+    def _blocos_por_periodo(self, data_inicio, data_fim, tamanho_bloco):
+        cursor = self._colecao_vendas.find(
+            {"data_venda": {"$gte": data_inicio, "$lte": data_fim}},
+            sort=[("data_venda", 1), ("_id", 1)],
+            batch_size=tamanho_bloco
+        )
+        with cursor:
+            bloco = []
+            for venda in cursor:
+                bloco.append(venda)
+                if len(bloco) >= tamanho_bloco:
+                    yield None, bloco
+                    bloco = []
+            if bloco:
+                yield None, bloco
+
+    def _dados_do_bloco(self, vendas):
+        """Produtos e clientes das vendas do bloco, uma consulta para cada"""
+        cods = {item["cod_produto"] for venda in vendas for item in itens_da_venda(venda)}
+        cpfs = {venda.get("cpf_cliente") for venda in vendas}
+        produtos = {
+            p["cod_produto"]: p
+            for p in self._colecao_produtos.find({"cod_produto": {"$in": list(cods)}}, {"_id": 0, "cod_produto": 1, "nome": 1})
+        }
+        clientes = {
+            c["cpf"]: c
+            for c in self._colecao_clientes.find({"cpf": {"$in": list(cpfs)}}, {"_id": 0, "cpf": 1, "nome": 1})
+        }
+        return produtos, clientes
+
+    def emitir(self, destino, ids=None, data_inicio=None, data_fim=None, descontos=None, processos=None,
+               tamanho_bloco=TAMANHO_BLOCO_NOTAS):
+        """
+        Emite para `destino` (DestinoZip ou DestinoGridFS) as notas das vendas informadas por
+        `ids` ou pelo período [data_inicio, data_fim].
+        descontos: dicionário ID da venda -> desconto (resultado de Vendas.descontos ou aplicar_promocao).
+        processos: tamanho do pool de processos (padrão: número de CPUs; 1 monta tudo no próprio processo).
+        Retorna {"emitidas", "existentes", "nao_encontradas", "chaves"} (nao_encontradas: lista de IDs;
+        chaves: as notas de todas as vendas encontradas, emitidas agora ou antes).
+        """
+        if ids is None and (data_inicio is None or data_fim is None):
+            raise ValueError("Informe os IDs das vendas ou o período (data inicial e final)")
+
+        descontos = {str(id_venda): desconto for id_venda, desconto in (descontos or {}).items()}
+        processos = processos or os.cpu_count() or 1
+        blocos = self._blocos_por_ids(ids, tamanho_bloco) if ids is not None else \
+            self._blocos_por_periodo(data_inicio, data_fim, tamanho_bloco)
+
+        resultado = {"emitidas": 0, "existentes": 0, "nao_encontradas": [], "chaves": []}
+        pool = None
+        pendentes = collections.deque()
+
+        def _gravar(notas):
+            gravadas = destino.gravar(notas)
+            resultado["emitidas"] += gravadas
+            resultado["existentes"] += len(notas) - gravadas
+
+        try:
+            for pedidos, vendas in blocos:
+                vendas = list(vendas)
+                if pedidos is not None:
+                    encontrados = {venda["_id"] for venda in vendas}
+                    resultado["nao_encontradas"].extend(str(i) for i in pedidos if i not in encontrados)
+
+                # Descartar as notas que já estão no destino antes de ler produtos e clientes
+                tarefas = [(chave_nota(venda["_id"], descontos.get(str(venda["_id"]))), venda) for venda in vendas]
+                resultado["chaves"].extend(chave for chave, _ in tarefas)
+                existentes = destino.existentes([chave for chave, _ in tarefas])
+                resultado["existentes"] += len(existentes)
+                tarefas = [
+                    (chave, venda, descontos.get(str(venda["_id"])))
+                    for chave, venda in tarefas if chave not in existentes
+                ]
+                if not tarefas:
+                    continue
+
+                produtos, clientes = self._dados_do_bloco([venda for _, venda, _ in tarefas])
+
+                if processos == 1:
+                    _gravar(_renderizar_bloco(tarefas, produtos, clientes))
+                    continue
+
+                # O primeiro bloco espera na fila; o pool só é criado se vier um segundo
+                if pool is None and pendentes:
+                    pool = concurrent.futures.ProcessPoolExecutor(
+                        max_workers=processos, mp_context=multiprocessing.get_context("spawn")
+                    )
+                    anterior = pendentes.popleft()
+                    pendentes.append(pool.submit(_renderizar_bloco, *anterior))
+                if pool is None:
+                    pendentes.append((tarefas, produtos, clientes))
+                    continue
+
+                pendentes.append(pool.submit(_renderizar_bloco, tarefas, produtos, clientes))
+                # No máximo dois blocos por processo em andamento, para a memória não crescer com o lote
+                while len(pendentes) > processos * 2:
+                    _gravar(pendentes.popleft().result())
+
+            while pendentes:
+                pendente = pendentes.popleft()
+                _gravar(pendente.result() if pool is not None else _renderizar_bloco(*pendente))
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+        return resultado
+
+
+def _data(texto):
+    return dt.datetime.strptime(texto, "%Y-%m-%d")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Emissão de notas fiscais em lote")
+    parser.add_argument("--uri", default=None, help="URI do MongoDB (padrão: MONGO_URI do .env)")
+    vendas = parser.add_mutually_exclusive_group(required=True)
+    vendas.add_argument("--ids", nargs="+", help="IDs das vendas")
+    vendas.add_argument("--inicio", type=_data, help="Data inicial (AAAA-MM-DD); exige --fim")
+    parser.add_argument("--fim", type=_data, default=None, help="Data final (AAAA-MM-DD)")
+    saida = parser.add_mutually_exclusive_group(required=True)
+    saida.add_argument("--zip", default=None, help="Arquivo zip de destino (acrescenta se já existir)")
+    saida.add_argument("--gridfs", action="store_true", help="Grava as notas no GridFS do banco")
+    parser.add_argument("--processos", type=int, default=None, help="Processos para montar as notas (padrão: CPUs)")
+
+    args = parser.parse_args(argv)
+    if args.inicio and not args.fim:
+        parser.error("--inicio exige --fim")
+
+    load_dotenv()
+    emissor = EmissorNotasFiscais(args.uri)
+    destino = DestinoZip(args.zip) if args.zip else emissor.destino_gridfs()
+
+    with destino:
+        resultado = emissor.emitir(
+            destino,
+            ids=args.ids,
+            data_inicio=args.inicio,
+            data_fim=dt.datetime.combine(args.fim, dt.time.max) if args.fim else None,
+            processos=args.processos
+        )
+
+    print(f"Notas emitidas: {resultado['emitidas']}")
+    print(f"Já existentes (não geradas de novo): {resultado['existentes']}")
+    if resultado["nao_encontradas"]:
+        print(f"Vendas não encontradas: {', '.join(resultado['nao_encontradas'])}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
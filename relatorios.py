@@ -0,0 +1,114 @@
+"""
+Relatórios do sistema de varejo pela linha de comando
+
+Usa os mesmos métodos de Relatorios que a interface: as linhas são lidas do
+banco e impressas em lotes, sem carregar o relatório inteiro em memória.
+
+Uso:
+    python relatorios.py vendas --inicio 2025-01-01 --fim 2025-01-31 [--uri URI]
+    python relatorios.py estoque [--ordenar-por qnt_estoque|valor_estoque|nome|preco] [--decrescente] [--em AAAA-MM-DD]
+    python relatorios.py mais-vendidos [--limite 5] [--inicio ...] [--fim ...] [--ordenar-por quantidade|valor]
+    python relatorios.py clientes-top [--limite 5] [--inicio ...] [--fim ...] [--ordenar-por valor|compras]
+    python relatorios.py movimentacoes [--inicio ...] [--fim ...] [--produto COD] [--tipo entrada|saida|ajuste]
+
+Com --saida ARQUIVO.csv (ou .csv.gz, .xlsx) o relatório é gravado no arquivo, também em lotes.
+"""
+
+import argparse
+import datetime as dt
+import sys
+
+from dotenv import load_dotenv
+
+from exportacao import exportar_arquivo, formato_do_arquivo
+from sistema_varejo import Relatorios
+
+
+def _data(texto):
+    return dt.datetime.strptime(texto, "%Y-%m-%d")
+
+
+def _fim_do_dia(data):
+    return dt.datetime.combine(data, dt.time.max) if data else None
+
+
+def _formatar(valor):
+    if isinstance(valor, float):
+        return f"{valor:.2f}"
+    if isinstance(valor, dt.datetime):
+        return valor.strftime("%d/%m/%Y %H:%M")
+    return "" if valor is None else str(valor)
+
+
+def imprimir_relatorio(resultado, saida=sys.stdout):
+    """Imprime o resumo e as linhas de um ResultadoRelatorio; retorna o número de linhas"""
+    print(f"\n=== {resultado.titulo.upper()} ===", file=saida)
+    for campo, valor in resultado.resumo.items():
+        print(f"{campo}: {_formatar(valor)}", file=saida)
+
+    print("\n" + " | ".join(resultado.colunas), file=saida)
+    total = 0
+    for lote in resultado.em_lotes():
+        saida.write("".join(" | ".join(_formatar(linha.get(c)) for c in resultado.colunas) + "\n" for linha in lote))
+        total += len(lote)
+    print(f"\n{total} linha(s)", file=saida)
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Relatórios do sistema de varejo")
+    parser.add_argument("--uri", default=None, help="URI do MongoDB (padrão: MONGO_URI do .env)")
+    parser.add_argument("--saida", default=None, help="Grava o relatório em um arquivo .csv, .csv.gz ou .xlsx")
+    subparsers = parser.add_subparsers(dest="relatorio", required=True)
+
+    vendas = subparsers.add_parser("vendas", help="Vendas de um período, item a item")
+    vendas.add_argument("--inicio", type=_data, required=True, help="Data inicial (AAAA-MM-DD)")
+    vendas.add_argument("--fim", type=_data, required=True, help="Data final (AAAA-MM-DD)")
+
+    estoque = subparsers.add_parser("estoque", help="Estoque atual")
+    estoque.add_argument("--ordenar-por", default="qnt_estoque", choices=["qnt_estoque", "valor_estoque", "nome", "preco"])
+    estoque.add_argument("--decrescente", action="store_true")
+    estoque.add_argument("--em", type=_data, default=None, help="Estoque no fim do dia informado (AAAA-MM-DD)")
+
+    mais_vendidos = subparsers.add_parser("mais-vendidos", help="Produtos mais vendidos")
+    clientes_top = subparsers.add_parser("clientes-top", help="Clientes que mais compraram")
+    for sub, ordenacoes in ((mais_vendidos, ["quantidade", "valor"]), (clientes_top, ["valor", "compras"])):
+        sub.add_argument("--limite", type=int, default=5)
+        sub.add_argument("--inicio", type=_data, default=None, help="Data inicial (AAAA-MM-DD)")
+        sub.add_argument("--fim", type=_data, default=None, help="Data final (AAAA-MM-DD)")
+        sub.add_argument("--ordenar-por", default=ordenacoes[0], choices=ordenacoes)
+
+    movimentacoes = subparsers.add_parser("movimentacoes", help="Movimentações de estoque")
+    movimentacoes.add_argument("--inicio", type=_data, default=None, help="Data inicial (AAAA-MM-DD)")
+    movimentacoes.add_argument("--fim", type=_data, default=None, help="Data final (AAAA-MM-DD)")
+    movimentacoes.add_argument("--produto", default=None, help="Código do produto")
+    movimentacoes.add_argument("--tipo", default=None, choices=["entrada", "saida", "ajuste"])
+
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    relatorios = Relatorios(args.uri)
+
+    if args.relatorio == "vendas":
+        resultado = relatorios.relatorio_vendas_periodo(args.inicio, _fim_do_dia(args.fim))
+    elif args.relatorio == "estoque" and args.em:
+        resultado = relatorios.relatorio_estoque_em(_fim_do_dia(args.em), args.ordenar_por, args.decrescente)
+    elif args.relatorio == "estoque":
+        resultado = relatorios.relatorio_estoque(args.ordenar_por, args.decrescente)
+    elif args.relatorio == "mais-vendidos":
+        resultado = relatorios.relatorio_produtos_mais_vendidos(args.limite, args.inicio, _fim_do_dia(args.fim), args.ordenar_por)
+    elif args.relatorio == "clientes-top":
+        resultado = relatorios.relatorio_clientes_top(args.limite, args.inicio, _fim_do_dia(args.fim), args.ordenar_por)
+    elif args.relatorio == "movimentacoes":
+        resultado = relatorios.relatorio_movimentacoes(args.inicio, _fim_do_dia(args.fim), args.produto, args.tipo)
+
+    if args.saida:
+        caminho, linhas = exportar_arquivo(resultado, formato_do_arquivo(args.saida), args.saida)
+        print(f"{linhas} linha(s) gravada(s) em {caminho}")
+    else:
+        imprimir_relatorio(resultado)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""
+Fixtures dos testes
+
+Os testes usam o mongomock (servidor em memória), nunca o MONGO_URI do .env.
+O mongomock não implementa alguns recursos usados pelo sistema ($lookup com
+pipeline, $dateTrunc, transações); a fixture servidor cobre o que é preciso para os testes
+e conta os comandos enviados, como o ContadorComandos dos benchmarks; a fixture
+transacoes simula um replica set, marcando as operações feitas dentro de transações.
+"""
+
+import functools
+import types
+
+import mongomock
+import pytest
+from mongomock.collection import BulkOperationBuilder, Collection
+from mongomock.database import Database
+from pymongo.errors import OperationFailure
+
+import sistema_varejo
+from benchmark_varejo import ContadorComandos
+
+
+# O pymongo 4.9+ passa sort para UpdateOne/ReplaceOne em bulk_write; o mongomock não aceita o argumento
+
+def _sem_sort(metodo):
+    @functools.wraps(metodo)
+    def chamar(self, *args, sort=None, **kwargs):
+        return metodo(self, *args, **kwargs)
+    return chamar
+
+
+BulkOperationBuilder.add_update = _sem_sort(BulkOperationBuilder.add_update)
+BulkOperationBuilder.add_replace = _sem_sort(BulkOperationBuilder.add_replace)
+
+
+# Métodos de Collection e o comando que cada um envia ao servidor
+COMANDOS = {
+    "find": "find", "find_one": "find", "aggregate": "aggregate", "count_documents": "aggregate",
+    "distinct": "distinct", "insert_one": "insert", "insert_many": "insert", "update_one": "update",
+    "update_many": "update", "replace_one": "update", "delete_one": "delete", "delete_many": "delete",
+    "bulk_write": "bulkWrite", "find_one_and_update": "findAndModify", "find_one_and_delete": "findAndModify",
+}
+
+ORIGINAL_AGGREGATE = Collection.aggregate
+
+# Primeiro lote padrão de um cursor do servidor
+TAMANHO_PRIMEIRO_LOTE = 101
+
+
+def _sem_pipeline_lookup(pipeline):
+    """$lookup com localField e pipeline (MongoDB 5.0+) vira o $lookup simples; o pipeline só projeta campos"""
+    return [
+        {"$lookup": {k: v for k, v in estagio["$lookup"].items() if k != "pipeline"}}
+        if "$lookup" in estagio and "localField" in estagio["$lookup"] else estagio
+        for estagio in pipeline
+    ]
+
+
+# Campos de $dateFromParts mantidos por unidade de $dateTrunc
+_PARTES_DATA = {"month": ("year", "month"), "day": ("year", "month", "day"), "hour": ("year", "month", "day", "hour")}
+_OPERADORES_PARTES = {"year": "$year", "month": "$month", "day": "$dayOfMonth", "hour": "$hour"}
+
+
+def _sem_date_trunc(expressao):
+    """$dateTrunc (MongoDB 5.0+) vira o $dateFromParts equivalente"""
+    if isinstance(expressao, list):
+        return [_sem_date_trunc(item) for item in expressao]
+    if not isinstance(expressao, dict):
+        return expressao
+    if set(expressao) == {"$dateTrunc"}:
+        data = _sem_date_trunc(expressao["$dateTrunc"]["date"])
+        partes = _PARTES_DATA[expressao["$dateTrunc"]["unit"]]
+        return {"$dateFromParts": {parte: {_OPERADORES_PARTES[parte]: data} for parte in partes}}
+    return {chave: _sem_date_trunc(valor) for chave, valor in expressao.items()}
+
+
+class Servidor:
+    """Cliente mongomock com contagem de comandos (cada um é uma ida e volta)"""
+
+    def __init__(self):
+        self.cliente = mongomock.MongoClient()
+        self.contador = ContadorComandos()
+        self.em_comando = False
+        self.operacoes = []  # (coleção, comando, feito dentro de uma transação)
+
+    def registrar(self, colecao, comando, sessao=None, resultados=None, tamanho_lote=None):
+        self.contador.started(types.SimpleNamespace(command_name=comando))
+        self.operacoes.append((colecao, comando, bool(sessao is not None and sessao.em_transacao)))
+        # Cursor com mais documentos que o primeiro lote precisa de getMore
+        if resultados is not None and len(resultados) > (tamanho_lote or TAMANHO_PRIMEIRO_LOTE):
+            self.contador.started(types.SimpleNamespace(command_name="getMore"))
+
+    def comandos(self):
+        return list(self.contador.comandos)
+
+    def em_transacao(self, colecao):
+        """Comandos enviados à coleção dentro de transações"""
+        return [comando for nome, comando, transacao in self.operacoes if nome == colecao and transacao]
+
+
+class Cursor:
+    """Resultado de aggregate como o CommandCursor do pymongo: iterável e gerenciador de contexto"""
+
+    def __init__(self, resultados):
+        self._resultados = iter(resultados)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._resultados)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        pass
+
+
+class Sessao:
+    """Sessão falsa: executa a transação em sequência e marca as operações feitas dentro dela"""
+
+    def __init__(self):
+        self.em_transacao = False
+
+    def with_transaction(self, callback):
+        self.em_transacao = True
+        try:
+            return callback(self)
+        finally:
+            self.em_transacao = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        pass
+
+
+@pytest.fixture
+def servidor(monkeypatch):
+    """Aponta o registro de conexões do sistema para um servidor mongomock novo"""
+    servidor = Servidor()
+
+    for metodo, comando in COMANDOS.items():
+        original = getattr(Collection, metodo)
+
+        def contado(self, *args, _original=original, _comando=comando, **kwargs):
+            # Chamadas internas do mongomock (ex.: find_one usa find) não são comandos novos
+            if servidor.em_comando:
+                return _original(self, *args, **kwargs)
+            servidor.em_comando = True
+            sessao = kwargs.pop("session", None)
+            try:
+                if _original is ORIGINAL_AGGREGATE:
+                    kwargs.pop("allowDiskUse", None)
+                    tamanho_lote = kwargs.pop("batchSize", None)
+                    resultados = list(_original(self, _sem_date_trunc(_sem_pipeline_lookup(args[0])), *args[1:], **kwargs))
+                    servidor.registrar(self.name, _comando, sessao, resultados, tamanho_lote)
+                    return Cursor(resultados)
+                servidor.registrar(self.name, _comando, sessao)
+                return _original(self, *args, **kwargs)
+            finally:
+                servidor.em_comando = False
+
+        monkeypatch.setattr(Collection, metodo, contado)
+
+    # Como um servidor anterior ao 5.0: sem coleções de série temporal
+    criar_colecao = Database.create_collection
+
+    def create_collection(self, nome, **opcoes):
+        if "timeseries" in opcoes:
+            raise OperationFailure("time-series collections are not supported")
+        return criar_colecao(self, nome, **opcoes)
+
+    monkeypatch.setattr(Database, "create_collection", create_collection)
+
+    # O mongomock não implementa list_collections; aqui todas as coleções são comuns
+    def list_collections(self, filter=None, **opcoes):
+        nomes = self.list_collection_names()
+        if filter and "name" in filter:
+            nomes = [nome for nome in nomes if nome == filter["name"]]
+        return iter([{"name": nome, "type": "collection"} for nome in nomes])
+
+    monkeypatch.setattr(Database, "list_collections", list_collections)
+    # Cada teste tem um cliente novo: o formato das movimentações não pode vir de outro teste
+    monkeypatch.setattr(sistema_varejo, "_movimentacoes_em_serie", {})
+    monkeypatch.setattr(sistema_varejo.registro_conexoes, "obter_cliente", lambda uri=None: servidor.cliente)
+    monkeypatch.setattr(sistema_varejo.registro_conexoes, "_bancos_preparados", set())
+    monkeypatch.setattr(sistema_varejo, "suporta_transacoes", lambda cliente: False)
+    return servidor
+
+
+@pytest.fixture
+def db(servidor):
+    """Banco do sistema já instalado (com os índices criados pelo comando de manutenção)"""
+    db = sistema_varejo.obter_banco()
+    sistema_varejo.garantir_indices(db)
+    return db
+
+
+@pytest.fixture
+def transacoes(servidor, monkeypatch):
+    """Faz o sistema usar transações (como em um replica set) com sessões falsas"""
+    monkeypatch.setattr(sistema_varejo, "suporta_transacoes", lambda cliente: True)
+    monkeypatch.setattr(servidor.cliente, "start_session", lambda **opcoes: Sessao(), raising=False)
+    return servidor
+
+
+CPF_CLIENTE = "52998224725"
+
+
+@pytest.fixture
+def sistema(db):
+    """Gerenciadores do sistema com dois produtos (P1: 10 x R$ 5,00; P2: 3 x R$ 20,00) e um cliente"""
+    produtos = sistema_varejo.GerenciadorProdutos()
+    clientes = sistema_varejo.Cliente()
+    estoque = sistema_varejo.GestaoEstoque(produtos)
+    vendas = sistema_varejo.Vendas(produtos, clientes, estoque)
+
+    produtos.cadastrar_produto("Caneta", "P1", "Papelaria", 10, 5.0, "", "")
+    produtos.cadastrar_produto("Mochila", "P2", "Acessórios", 3, 20.0, "", "")
+    clientes.cadastro("Cliente Teste", CPF_CLIENTE, "cliente@exemplo.com", "(11) 91234-5678")
+
+    return types.SimpleNamespace(db=db, produtos=produtos, clientes=clientes, estoque=estoque, vendas=vendas)
@@ -0,0 +1,100 @@
+import datetime as dt
+
+import pytest
+
+from conftest import CPF_CLIENTE
+from sistema_varejo import GRANULARIDADES, AgregadosVendas
+
+INICIO = dt.datetime(2025, 1, 30, 22, 0)
+
+
+@pytest.fixture
+def vendas_antigas(db):
+    """Base sem agregados: 60 vendas de hora em hora, de dois formatos (produto único e carrinho)"""
+    vendas = []
+    for i in range(60):
+        data = INICIO + dt.timedelta(hours=i, minutes=15)
+        if i % 2:
+            vendas.append({"cod_produto": "P1", "cpf_cliente": "1", "qnt_vendida": 2, "valor_total": 10.0, "data_venda": data})
+        else:
+            vendas.append({
+                "cpf_cliente": "2",
+                "itens": [
+                    {"cod_produto": "P1", "qnt_vendida": 1, "valor_total": 5.0},
+                    {"cod_produto": "P2", "qnt_vendida": 1, "valor_total": 20.0}
+                ],
+                "qnt_vendida": 2,
+                "valor_total": 25.0,
+                "data_venda": data
+            })
+    db["vendas"].insert_many(vendas)
+    return vendas
+
+
+def _documentos_total(db, granularidade):
+    return list(db["vendas_agregadas"].find({"granularidade": granularidade, "dimensao": "total"}, {"_id": 0}))
+
+
+def test_reconstruir_sobre_vendas_existentes(db, vendas_antigas):
+    agregados = AgregadosVendas(db)
+
+    gravados = agregados.reconstruir()
+
+    assert gravados == db["vendas_agregadas"].count_documents({})
+    # A dimensão "total" não tem chave: um documento por intervalo, com chave nula
+    assert len(_documentos_total(db, "hora")) == 60
+    assert len(_documentos_total(db, "dia")) == 4       # 30/01 a 02/02
+    assert len(_documentos_total(db, "mes")) == 2       # janeiro e fevereiro
+    for granularidade in GRANULARIDADES:
+        documentos = _documentos_total(db, granularidade)
+        assert all(d["chave"] is None for d in documentos)
+        assert sum(d["vendas"] for d in documentos) == 60
+        assert sum(d["valor_total"] for d in documentos) == 30 * 10.0 + 30 * 25.0
+
+    # Reconstruir de novo não duplica nem soma em dobro
+    antes = sorted(map(repr, db["vendas_agregadas"].find({}, {"_id": 0})))
+    assert agregados.reconstruir() == gravados
+    assert sorted(map(repr, db["vendas_agregadas"].find({}, {"_id": 0}))) == antes
+
+
+def test_reconstruir_periodo_so_refaz_os_meses_do_periodo(db, vendas_antigas):
+    agregados = AgregadosVendas(db)
+    agregados.reconstruir()
+    db["vendas_agregadas"].update_many({"inicio": {"$lt": dt.datetime(2025, 2, 1)}}, {"$set": {"vendas": 0}})
+
+    agregados.reconstruir(dt.datetime(2025, 2, 10), dt.datetime(2025, 2, 20))
+
+    fevereiro = db["vendas_agregadas"].find_one({"granularidade": "mes", "dimensao": "total", "inicio": dt.datetime(2025, 2, 1)})
+    janeiro = db["vendas_agregadas"].find_one({"granularidade": "mes", "dimensao": "total", "inicio": dt.datetime(2025, 1, 1)})
+    assert fevereiro["vendas"] == 34
+    assert janeiro["vendas"] == 0
+
+
+def test_base_antiga_sem_agregados_soma_as_vendas(db, vendas_antigas, caplog):
+    agregados = AgregadosVendas(db)
+    fim = INICIO + dt.timedelta(days=5)
+
+    por_dia = agregados.totais(INICIO, fim, granularidade="dia")
+    produtos = agregados.totais(INICIO, fim, dimensao="produto")
+
+    # A consulta não reconstrói os agregados: soma as vendas e avisa para rodar a manutenção
+    assert db["vendas_agregadas"].count_documents({}) == 0
+    assert "reconstruir-agregados" in caplog.text
+    assert [(t["inicio"].day, t["vendas"]) for t in por_dia] == [(30, 2), (31, 24), (1, 24), (2, 10)]
+    assert {t["chave"]: t["qnt_vendida"] for t in produtos} == {"P1": 90, "P2": 30}
+
+    # Depois da reconstrução, os mesmos totais vêm dos agregados
+    agregados.reconstruir()
+    assert agregados.totais(INICIO, fim, granularidade="dia") == por_dia
+    assert agregados.totais(INICIO, fim, dimensao="produto") == produtos
+    assert agregados.verificar_consistencia(INICIO, fim) == []
+
+
+def test_venda_em_transacao_deixa_agregados_fora(transacoes, sistema):
+    venda = sistema.vendas.registrar_venda_carrinho([("P1", 2), ("P2", 1)], CPF_CLIENTE)
+
+    assert transacoes.em_transacao("vendas_agregadas") == []
+
+    data = venda["data_venda"]
+    totais = AgregadosVendas(sistema.db).totais(data - dt.timedelta(days=1), data + dt.timedelta(days=1))
+    assert [(t["vendas"], t["qnt_vendida"], t["valor_total"]) for t in totais] == [(1, 3, 30.0)]
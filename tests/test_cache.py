@@ -0,0 +1,101 @@
+import pytest
+
+import sistema_varejo
+from conftest import CPF_CLIENTE
+from sistema_varejo import CacheLRU
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    """Relógio controlado pelo teste no lugar de time.monotonic"""
+    agora = [1000.0]
+    monkeypatch.setattr(sistema_varejo.time, "monotonic", lambda: agora[0])
+    return agora
+
+
+def test_validade_e_contadores(relogio):
+    cache = CacheLRU(max_itens=10, ttl_s=60)
+    leituras = []
+
+    def carregar():
+        leituras.append(1)
+        return len(leituras)
+
+    assert cache.obter("a", carregar) == 1
+    relogio[0] += 59
+    assert cache.obter("a", carregar) == 1
+    relogio[0] += 1
+    assert cache.obter("a", carregar) == 2
+
+    estatisticas = cache.estatisticas()
+    assert (estatisticas["acertos"], estatisticas["falhas"]) == (1, 2)
+    assert estatisticas["taxa_acerto"] == pytest.approx(1 / 3)
+
+
+def test_remove_o_usado_ha_mais_tempo():
+    cache = CacheLRU(max_itens=2, ttl_s=60)
+    cache.obter("a", lambda: "A")
+    cache.obter("b", lambda: "B")
+    cache.obter("a", lambda: "outro")   # "a" passa a ser o mais recente
+    cache.obter("c", lambda: "C")       # sai "b"
+
+    assert list(cache._itens) == ["a", "c"]
+    assert cache.obter("b", lambda: "B2") == "B2"
+    assert cache.estatisticas()["itens"] == 2
+
+
+def test_invalidacao_durante_a_leitura_descarta_o_resultado():
+    cache = CacheLRU(max_itens=10, ttl_s=60)
+
+    def carregar():
+        cache.invalidar("a")
+        return "antigo"
+
+    assert cache.obter("a", carregar) == "antigo"
+    assert cache.obter("a", lambda: "novo") == "novo"
+
+
+def test_segunda_leitura_nao_vai_ao_banco(servidor, sistema):
+    sistema.produtos.obter_produto("P1")
+    sistema.produtos.obter_todos_produtos()
+    sistema.clientes.obter_cliente(CPF_CLIENTE)
+    sistema.clientes.obter_todos_clientes()
+    servidor.contador.zerar()
+
+    assert sistema.produtos.obter_produto("P1")["nome"] == "Caneta"
+    assert len(sistema.produtos.obter_todos_produtos()) == 2
+    assert sistema.clientes.obter_cliente(CPF_CLIENTE)["cpf"] == CPF_CLIENTE
+    assert len(sistema.clientes.obter_todos_clientes()) == 1
+
+    assert servidor.comandos().count("find") == 0
+
+
+def test_gravacoes_invalidam_os_produtos(servidor, sistema):
+    sistema.produtos.obter_produto("P1")
+    sistema.produtos.obter_todos_produtos()
+
+    sistema.estoque.adicionar_estoque("P1", 5)
+    assert sistema.produtos.obter_produto("P1")["qnt_estoque"] == 15
+
+    sistema.estoque.remover_estoque("P1", 3)
+    assert sistema.produtos.obter_produto("P1")["qnt_estoque"] == 12
+
+    sistema.produtos.cadastrar_produto("P3", "P3", "Papelaria", 1, 2.0, "", "")
+    assert [p["cod_produto"] for p in sistema.produtos.obter_todos_produtos()] == ["P1", "P2", "P3"]
+    assert sistema.produtos.obter_todos_produtos()[0]["qnt_estoque"] == 12
+
+    # O próprio objeto do cache não é entregue a quem chama
+    sistema.produtos.obter_produto("P1")["qnt_estoque"] = 0
+    servidor.contador.zerar()
+    assert sistema.produtos.obter_produto("P1")["qnt_estoque"] == 12
+    assert servidor.comandos().count("find") == 0
+
+
+def test_cadastro_invalida_os_clientes(sistema):
+    assert sistema.clientes.obter_cliente("11144477735") is None
+    assert len(sistema.clientes.obter_todos_clientes()) == 1
+
+    sistema.clientes.cadastro("Beatriz", "11144477735", "b@exemplo.com", "")
+
+    assert sistema.clientes.obter_cliente("11144477735")["nome"] == "Beatriz"
+    assert len(sistema.clientes.obter_todos_clientes()) == 2
@@ -0,0 +1,61 @@
+import mongomock
+import pytest
+
+import sistema_varejo
+from sistema_varejo import Cliente, GerenciadorProdutos, RegistroConexoes
+
+
+@pytest.fixture
+def clientes_criados(servidor, monkeypatch):
+    """
+    Registro de conexões novo, com o obter_cliente verdadeiro: só a criação do MongoClient é
+    trocada por um cliente do mongomock, guardando a URI e as opções recebidas.
+    """
+    criados = []
+
+    def mongo_client(uri, **opcoes):
+        criados.append((uri, opcoes))
+        return mongomock.MongoClient()
+
+    monkeypatch.setattr(sistema_varejo, "MongoClient", mongo_client)
+    monkeypatch.setenv("MONGO_MAX_POOL_SIZE", "7")
+    monkeypatch.setenv("MONGO_MIN_POOL_SIZE", "2")
+    monkeypatch.setenv("MONGO_TIMEOUT_SELECAO_MS", "1500")
+    monkeypatch.setenv("MONGO_MAX_IDLE_MS", "9000")
+    monkeypatch.setattr(sistema_varejo, "registro_conexoes", RegistroConexoes())
+    return criados
+
+
+def test_gerenciadores_compartilham_o_cliente_da_uri(clientes_criados):
+    produtos = GerenciadorProdutos("mongodb://servidor-a")
+    clientes = Cliente("mongodb://servidor-a")
+    outro = GerenciadorProdutos("mongodb://servidor-b")
+
+    assert produtos._client is clientes._client
+    assert outro._client is not produtos._client
+    assert [uri for uri, _ in clientes_criados] == ["mongodb://servidor-a", "mongodb://servidor-b"]
+
+
+def test_opcoes_de_pool_do_ambiente_chegam_ao_cliente(clientes_criados):
+    sistema_varejo.registro_conexoes.obter_cliente("mongodb://servidor-a")
+
+    _, opcoes = clientes_criados[0]
+    assert opcoes["maxPoolSize"] == 7
+    assert opcoes["minPoolSize"] == 2
+    assert opcoes["serverSelectionTimeoutMS"] == 1500
+    assert opcoes["maxIdleTimeMS"] == 9000
+    assert opcoes["connectTimeoutMS"] == 5000
+    assert len(opcoes["event_listeners"]) == 1
+
+    # Parâmetros explícitos têm prioridade sobre o ambiente
+    RegistroConexoes(max_pool_size=3).obter_cliente("mongodb://servidor-c")
+    assert clientes_criados[-1][1]["maxPoolSize"] == 3
+    assert clientes_criados[-1][1]["minPoolSize"] == 2
+
+
+def test_sem_uri_nao_cria_cliente(clientes_criados, monkeypatch):
+    monkeypatch.delenv("MONGO_URI", raising=False)
+
+    with pytest.raises(RuntimeError, match="MONGO_URI"):
+        sistema_varejo.registro_conexoes.obter_cliente()
+    assert clientes_criados == []
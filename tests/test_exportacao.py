@@ -0,0 +1,143 @@
+import csv
+import datetime as dt
+import gzip
+import os
+
+import pyarrow.parquet as pq
+import pytest
+from openpyxl import load_workbook
+
+import exportacao
+from exportacao import BOM_UTF8, exportar_arquivo, exportar_csv, exportar_parquet, exportar_xlsx, ler_estado
+from sistema_varejo import Relatorios, ResultadoRelatorio
+
+HA_UMA_HORA = dt.datetime.now().replace(microsecond=0) - dt.timedelta(hours=1)
+
+
+def _movimentacoes(db, quantidades, inicio=HA_UMA_HORA):
+    db["movimentacoes_estoque"].insert_many([
+        {"cod_produto": "P1", "nome_produto": "Caneta", "quantidade": quantidade, "tipo_movimentacao": "entrada",
+         "estoque_resultante": 10, "data_movimentacao": inicio + dt.timedelta(seconds=i), "motivo": "Teste"}
+        for i, quantidade in enumerate(quantidades)
+    ])
+
+
+def _arquivos(pasta):
+    return sorted(nome for _, _, nomes in os.walk(pasta) for nome in nomes if nome != exportacao.ARQUIVO_ESTADO)
+
+
+def test_exportacao_incremental(db, tmp_path):
+    _movimentacoes(db, [1, 2, 3])
+    assert exportar_parquet(db, "movimentacoes_estoque", tmp_path)["linhas"] == 3
+
+    _movimentacoes(db, [4], inicio=HA_UMA_HORA + dt.timedelta(minutes=1))
+    assert exportar_parquet(db, "movimentacoes_estoque", tmp_path)["linhas"] == 1
+
+    tabela = pq.read_table(tmp_path / "movimentacoes_estoque")
+    assert sorted(tabela["quantidade"].to_pylist()) == [1, 2, 3, 4]
+    assert set(tabela["cod_produto"].to_pylist()) == {"P1"}
+
+
+def test_execucao_interrompida_nao_duplica_linhas(db, tmp_path, monkeypatch):
+    _movimentacoes(db, [1, 2, 3])
+    substituir = os.replace
+
+    def interromper(origem, destino):
+        # O processo para depois de gravar o estado, antes de publicar os arquivos
+        if str(destino).endswith(".parquet"):
+            raise KeyboardInterrupt
+        substituir(origem, destino)
+
+    monkeypatch.setattr(exportacao.os, "replace", interromper)
+    with pytest.raises(KeyboardInterrupt):
+        exportar_parquet(db, "movimentacoes_estoque", tmp_path)
+    monkeypatch.setattr(exportacao.os, "replace", substituir)
+
+    pasta = tmp_path / "movimentacoes_estoque"
+    assert ler_estado(pasta)["linhas"] == 3
+    # Arquivo de uma execução que não chegou a gravar o estado
+    particao = next(p for p in pasta.iterdir() if p.is_dir())
+    (particao / ".part-20250101T000000-abandonada.parquet.tmp").write_bytes(b"")
+
+    assert exportar_parquet(db, "movimentacoes_estoque", tmp_path)["linhas"] == 0
+
+    assert pq.read_table(pasta).num_rows == 3
+    assert not any(nome.endswith(".tmp") for nome in _arquivos(pasta))
+
+
+def test_quantidade_fracionaria_interrompe_exportacao(db, tmp_path):
+    _movimentacoes(db, [1, 2.5])
+
+    with pytest.raises(ValueError, match="quantidade não inteiro \\(2.5\\)"):
+        exportar_parquet(db, "movimentacoes_estoque", tmp_path)
+
+    pasta = tmp_path / "movimentacoes_estoque"
+    assert ler_estado(pasta) is None
+    assert _arquivos(pasta) == []
+
+
+def _relatorio(quantidade=5):
+    linhas = [
+        {"data_venda": dt.datetime(2025, 1, 2, 10, 30) + dt.timedelta(days=i), "cod_produto": f"P{i}",
+         "nome_produto": "Pão de queijo", "qnt_vendida": i + 1, "valor_total": (i + 1) * 2.5}
+        for i in range(quantidade)
+    ]
+    return ResultadoRelatorio(
+        "Vendas por período", ["data_venda", "cod_produto", "nome_produto", "qnt_vendida", "valor_total"],
+        iter(linhas), {"total_vendas": quantidade, "valor_total": sum(l["valor_total"] for l in linhas)}
+    )
+
+
+@pytest.mark.parametrize("formato", ["csv", "csv.gz"])
+def test_exportar_csv_em_lotes(tmp_path, formato):
+    destino = tmp_path / f"vendas.{formato}"
+
+    caminho, linhas = exportar_csv(_relatorio(), str(destino), compactar=formato == "csv.gz", tamanho_lote=2)
+
+    abrir = gzip.open if formato == "csv.gz" else open
+    with abrir(caminho, "rt", encoding="utf-8-sig", newline="") as arquivo:
+        conteudo = list(csv.reader(arquivo))
+    assert linhas == 5
+    assert conteudo[0] == ["Data", "Código", "Produto", "Quantidade", "Valor Total"]
+    assert conteudo[1] == ["02/01/2025 10:30", "P0", "Pão de queijo", "1", "2.5"]
+    assert len(conteudo) == 6
+
+
+def test_exportar_csv_sem_linhas_mantem_cabecalho(tmp_path):
+    caminho, linhas = exportar_csv(_relatorio(0), str(tmp_path / "vazio.csv"))
+
+    with open(caminho, "rb") as arquivo:
+        conteudo = arquivo.read()
+    assert linhas == 0
+    assert conteudo.startswith(BOM_UTF8)
+    assert conteudo.decode("utf-8-sig").splitlines() == ['"Data","Código","Produto","Quantidade","Valor Total"']
+
+
+def test_exportar_relatorio_do_banco(sistema, tmp_path):
+    sistema.vendas.registrar_venda_carrinho([("P1", 2), ("P2", 1)], "52998224725")
+
+    caminho, linhas = exportar_arquivo(Relatorios().relatorio_movimentacoes(), "csv", str(tmp_path / "mov.csv"))
+
+    with open(caminho, encoding="utf-8-sig", newline="") as arquivo:
+        conteudo = list(csv.DictReader(arquivo))
+    assert linhas == 2
+    assert sorted((l["Código"], l["Quantidade"], l["Tipo"]) for l in conteudo) == [("P1", "-2", "saida"), ("P2", "-1", "saida")]
+
+
+def test_exportar_xlsx_divide_planilhas_e_resume(tmp_path):
+    caminho, linhas = exportar_xlsx(_relatorio(), str(tmp_path / "vendas.xlsx"), tamanho_lote=2, linhas_por_planilha=2)
+
+    pasta = load_workbook(caminho, read_only=True)
+    assert linhas == 5
+    assert pasta.sheetnames == ["Vendas por período", "Vendas por período (2)", "Vendas por período (3)", "Resumo"]
+
+    primeira = list(pasta["Vendas por período"].iter_rows())
+    assert [c.value for c in primeira[0]] == ["Data", "Código", "Produto", "Quantidade", "Valor Total"]
+    data, _, _, quantidade, valor = primeira[1]
+    # Valores numéricos com formato, não texto já formatado
+    assert (data.value, data.number_format) == (dt.datetime(2025, 1, 2, 10, 30), "DD/MM/YYYY HH:MM")
+    assert (quantidade.value, valor.value, valor.number_format) == (1, 2.5, '"R$" #,##0.00')
+    assert len(list(pasta["Vendas por período (3)"].iter_rows())) == 2
+
+    resumo = {linha[0]: linha[1] for linha in pasta["Resumo"].iter_rows(values_only=True)}
+    assert resumo == {"Total de Vendas": 5, "Valor Total": 37.5}
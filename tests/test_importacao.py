@@ -0,0 +1,77 @@
+import io
+
+import pytest
+from openpyxl import Workbook
+
+from importacao import converter_numero, importar_clientes, importar_produtos, resumir_importacao
+
+CSV_PRODUTOS = """nome;cod_produto;categoria;qnt_estoque;preco;descricao;fornecedor
+Lápis;L1;Papelaria;100;1,50;;
+Borracha;B1;;20;"1.234,50";;
+Caneta repetida;P1;Papelaria;5;2;;
+Régua;R1;Papelaria;2,5;3;;
+Lápis de novo;L1;Papelaria;1;1;;
+Estojo;E1;Papelaria;8;;;
+"""
+
+
+def _por_linha(resultados):
+    return {r["linha"]: (r["status"], r["mensagem"]) for r in resultados}
+
+
+def test_importar_produtos_csv(servidor, sistema):
+    servidor.operacoes.clear()
+
+    resultados = list(importar_produtos(sistema.produtos, io.BytesIO(CSV_PRODUTOS.encode("utf-8")), "produtos.csv",
+                                        tamanho_bloco=3))
+
+    linhas = _por_linha(resultados)
+    assert [linha for linha, (status, _) in linhas.items() if status == "ok"] == [2, 3]
+    assert "já cadastrado" in linhas[4][1]
+    assert linhas[5][1].startswith("Quantidade inválida")
+    assert "repetido no arquivo" in linhas[6][1]
+    assert linhas[7][1].startswith("Preço inválido")
+
+    # Só o primeiro bloco tem linhas válidas: uma consulta de duplicados e um insert_many
+    assert [comando for colecao, comando, _ in servidor.operacoes if colecao == "estoque_produtos"] == ["find", "insert"]
+
+    borracha = sistema.db["estoque_produtos"].find_one({"cod_produto": "B1"})
+    assert (borracha["preco"], borracha["categoria"]) == (1234.5, "Outros")
+
+
+def test_importar_produtos_xlsx(sistema, tmp_path):
+    planilha = Workbook()
+    aba = planilha.active
+    aba.append(["Nome", "Cod_Produto", "Categoria", "Qnt_Estoque", "Preco"])
+    aba.append(["Cola", "C1", "Papelaria", 12, 4.25])
+    aba.append([None, None, None, None, None])
+    aba.append(["Tesoura", "T1", "Papelaria", 3.0, 9])
+    caminho = tmp_path / "produtos.xlsx"
+    planilha.save(caminho)
+
+    with open(caminho, "rb") as arquivo:
+        importados, erros = resumir_importacao(importar_produtos(sistema.produtos, arquivo, "produtos.xlsx"))
+
+    assert (importados, erros) == (2, [])
+    assert sistema.db["estoque_produtos"].find_one({"cod_produto": "T1"})["qnt_estoque"] == 3
+
+
+def test_importar_clientes_csv(sistema):
+    arquivo = io.StringIO(
+        "nome,cpf,email,telefone\n"
+        "Ana,111.444.777-35,ana@exemplo.com,(11) 98765-4321\n"
+        "Bia,111.444.777-36,bia@exemplo.com,(11) 98765-4321\n"
+        "Caio,52998224725,caio@exemplo.com,(11) 98765-4321\n"
+        "Dani,11144477735,dani@exemplo.com,(11) 98765-4321\n"
+    )
+
+    importados, erros = resumir_importacao(importar_clientes(sistema.clientes, arquivo, "clientes.csv"))
+
+    assert importados == 1
+    assert [erro["linha"] for erro in erros] == [3, 4, 5]
+    assert sistema.db["clientes"].find_one({"cpf": "11144477735"})["nome"] == "Ana"
+
+
+@pytest.mark.parametrize("texto, esperado", [("1.234,56", 1234.56), ("1234.56", 1234.56), ("R$ 10", 10.0), (7, 7.0)])
+def test_converter_numero(texto, esperado):
+    assert converter_numero(texto) == esperado
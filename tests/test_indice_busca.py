@@ -0,0 +1,61 @@
+from conftest import CPF_CLIENTE
+from indice_busca import LIMITE_INSERCAO_INDIVIDUAL, IndiceBusca, IndicesSistema
+
+
+def _itens(inicio, quantidade, prefixo="Produto"):
+    return [(f"P{i:05d}", f"{prefixo} {i}", [f"{prefixo} {i}", f"P{i:05d}"]) for i in range(inicio, inicio + quantidade)]
+
+
+def test_lote_grande_equivale_a_carga_completa():
+    quantidade = LIMITE_INSERCAO_INDIVIDUAL * 3
+    antigos, novos = _itens(0, quantidade), _itens(quantidade, quantidade)
+
+    incremental = IndiceBusca()
+    incremental.carregar(antigos)
+    incremental.adicionar_varios(novos)
+
+    completo = IndiceBusca()
+    completo.carregar(antigos + novos)
+
+    assert incremental._entradas == completo._entradas
+    assert len(incremental) == 2 * quantidade
+    assert incremental.buscar(f"P{quantidade:05d}") == [(f"P{quantidade:05d}", f"Produto {quantidade}")]
+
+
+def test_lote_grande_reindexa_itens_existentes():
+    quantidade = LIMITE_INSERCAO_INDIVIDUAL * 2
+    indice = IndiceBusca()
+    indice.carregar(_itens(0, quantidade))
+
+    indice.adicionar_varios(_itens(0, quantidade, prefixo="Caderno"))
+
+    # Os termos antigos saem do índice; cada item aparece uma vez com o rótulo novo
+    assert indice.buscar("produto") == []
+    assert indice.buscar("P00001") == [("P00001", "Caderno 1")]
+    assert len(indice._entradas) == len(set(indice._entradas))
+
+
+def test_lote_pequeno_insere_item_a_item():
+    indice = IndiceBusca()
+    indice.carregar(_itens(0, 10))
+
+    indice.adicionar_varios([("P00003", "Mochila", ["Mochila", "P00003"]), ("X1", "Estojo", ["Estojo", "X1"])])
+
+    assert indice.buscar("mochila") == [("P00003", "Mochila")]
+    assert indice.buscar("estojo") == [("X1", "Estojo")]
+    assert indice.buscar("produto 3") == []
+    assert len(indice) == 11
+
+
+def test_recarregar_le_as_colecoes_sem_passar_pelo_cache(servidor, sistema):
+    indices = IndicesSistema(sistema.produtos, sistema.clientes)
+    servidor.contador.zerar()
+
+    indices.recarregar()
+
+    assert servidor.comandos() == ["find", "find"]
+    assert indices.buscar_produtos("cane") == [("P1", "Caneta (Código: P1)")]
+    assert indices.buscar_clientes("52998") == [(CPF_CLIENTE, f"Cliente Teste (CPF: {CPF_CLIENTE})")]
+    # Nenhuma cópia do catálogo ou dos clientes fica no cache dos gerenciadores
+    assert sistema.produtos.estatisticas_cache()["itens"] == 0
+    assert sistema.clientes.estatisticas_cache()["itens"] == 0
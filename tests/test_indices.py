@@ -0,0 +1,81 @@
+import logging
+
+import manutencao
+import sistema_varejo
+from sistema_varejo import indices_esperados, obter_banco, verificar_indices
+
+
+def _nomes_indices(db, colecao):
+    return set(db[colecao].index_information())
+
+
+def test_inicializacao_nao_cria_indices_e_avisa(servidor, caplog):
+    # Base antiga: CPFs duplicados impediriam o índice único
+    servidor.cliente[sistema_varejo.NOME_BANCO]["clientes"].insert_many([
+        {"nome": "A", "cpf": "52998224725"}, {"nome": "B", "cpf": "52998224725"}
+    ])
+
+    with caplog.at_level(logging.WARNING, logger="sistema_varejo"):
+        db = obter_banco()
+
+    assert "cpf_unico" not in _nomes_indices(db, "clientes")
+    assert any("clientes.cpf_unico" in mensagem for mensagem in caplog.messages)
+
+
+def test_inicializacao_nao_remove_indices_obsoletos(servidor):
+    colecao = servidor.cliente[sistema_varejo.NOME_BANCO]["vendas"]
+    colecao.create_index([("data_venda", 1)], name="data_venda")
+
+    db = obter_banco()
+
+    assert "data_venda" in _nomes_indices(db, "vendas")
+
+
+def test_comando_indices_cria_e_remove(servidor, capsys):
+    db = obter_banco()
+    db["vendas"].create_index([("data_venda", 1)], name="data_venda")
+
+    assert manutencao.comando_indices(db)
+
+    assert verificar_indices(db) == []
+    assert "data_venda" not in _nomes_indices(db, "vendas")
+    for colecao, indices in indices_esperados(db).items():
+        assert {opcoes["name"] for _, opcoes in indices} <= _nomes_indices(db, colecao)
+
+
+def test_comando_indices_informa_duplicados(servidor, capsys):
+    db = obter_banco()
+    db["clientes"].insert_many([{"nome": "A", "cpf": "52998224725"}, {"nome": "B", "cpf": "52998224725"}])
+
+    assert not manutencao.comando_indices(db)
+
+    saida = capsys.readouterr().out
+    assert "clientes" in saida and "cpf_unico: ausente" in saida
+
+
+def test_comando_indices_mantem_formato_plano_da_colecao_comum(servidor, capsys):
+    # Servidor sem séries temporais: as movimentações ficam numa coleção comum, no formato plano
+    db = obter_banco()
+    db["movimentacoes_estoque"].create_index([("meta.cod_produto", 1), ("data_movimentacao", 1)],
+                                             name="meta_cod_produto_data_movimentacao")
+
+    assert manutencao.comando_indices(db)
+
+    nomes = _nomes_indices(db, "movimentacoes_estoque")
+    assert {"cod_produto_data_movimentacao", "tipo_data_movimentacao"} <= nomes
+    assert not any(nome.startswith("meta_") for nome in nomes)
+
+
+def test_comando_indices_preenche_nome_busca_dos_produtos_antigos(servidor, capsys):
+    db = obter_banco()
+    db["estoque_produtos"].insert_many([
+        {"nome": "Caneta Azul", "cod_produto": "A1", "categoria": "Papelaria", "qnt_estoque": 1, "preco": 2.0},
+        {"nome": "Ábaco", "cod_produto": "A2", "categoria": "Escola", "qnt_estoque": 1, "preco": 9.0},
+    ])
+
+    assert manutencao.comando_indices(db)
+
+    nomes = {p["cod_produto"]: p["nome_busca"] for p in db["estoque_produtos"].find()}
+    assert nomes == {"A1": "caneta azul", "A2": "abaco"}
+    resultado = sistema_varejo.GerenciadorProdutos().buscar_produtos("aba")
+    assert [p["cod_produto"] for p in resultado["produtos"]] == ["A2"]
@@ -0,0 +1,169 @@
+import time
+
+import pytest
+from pymongo.errors import AutoReconnect, OperationFailure
+
+from monitor_alteracoes import ERRO_HISTORICO_PERDIDO, ERRO_SEM_REPLICA_SET, EstadoDashboard, MonitorAlteracoes
+
+
+def _evento(colecao, operacao, documento=None, _id=None, token=None):
+    evento = {"_id": token or {"_data": f"{colecao}-{operacao}"}, "ns": {"db": "teste", "coll": colecao},
+              "operationType": operacao}
+    if documento is not None:
+        evento["fullDocument"] = documento
+        _id = documento.get("_id", _id)
+    evento["documentKey"] = {"_id": _id}
+    return evento
+
+
+class Stream:
+    """Change stream falso: entrega os itens na ordem (eventos, None ou exceções a lançar)"""
+
+    def __init__(self, itens, ao_terminar=None):
+        self._itens = list(itens)
+        self._ao_terminar = ao_terminar
+        self.resume_token = None
+        self.fechado = False
+
+    def try_next(self):
+        if not self._itens:
+            if self._ao_terminar:
+                self._ao_terminar()
+            return None
+        item = self._itens.pop(0)
+        if isinstance(item, Exception):
+            raise item
+        if item is not None:
+            self.resume_token = item["_id"]
+        return item
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.fechado = True
+
+
+@pytest.fixture
+def aberturas(sistema, monkeypatch):
+    """Substitui db.watch: cada abertura registra o resume_after e entrega o próximo stream da lista"""
+    aberturas = {"streams": [], "resume_after": []}
+
+    def watch(pipeline, resume_after=None, **opcoes):
+        aberturas["resume_after"].append(resume_after)
+        item = aberturas["streams"].pop(0)
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+    monkeypatch.setattr(sistema.db, "watch", watch, raising=False)
+    return aberturas
+
+
+def test_estado_aplica_eventos(sistema):
+    estado = EstadoDashboard()
+    estado.carregar(sistema.db)
+    assert [p["cod_produto"] for p in estado.metricas()["estoque_baixo"]] == ["P2", "P1"]
+    versao = estado.versao
+
+    p1 = sistema.db["estoque_produtos"].find_one({"cod_produto": "P1"})
+    p2 = sistema.db["estoque_produtos"].find_one({"cod_produto": "P2"})
+    estado.aplicar(_evento("estoque_produtos", "update", dict(p1, qnt_estoque=150)))
+    estado.aplicar(_evento("estoque_produtos", "delete", _id=p2["_id"]))
+    estado.aplicar(_evento("estoque_produtos", "insert", {"_id": 1, "cod_produto": "P3", "nome": "Lápis",
+                                                          "categoria": "Papelaria", "qnt_estoque": 50}))
+    estado.aplicar(_evento("vendas", "insert", {"_id": 2, "cpf_cliente": "52998224725", "qnt_vendida": 2,
+                                                "valor_total": 10.0, "data_venda": None}))
+
+    metricas = estado.metricas()
+    # P1 passou do limite acompanhado, P2 foi excluído; P3 está abaixo de 100, mas não abaixo de 20
+    assert metricas["estoque_baixo"] == []
+    assert estado.metricas(limite_estoque_baixo=60)["estoque_baixo"][0]["cod_produto"] == "P3"
+    assert [v["valor_total"] for v in metricas["ultimas_vendas"]] == [10.0]
+    assert estado.versao == versao + 4
+
+
+def test_estado_aplica_resumo_e_ignora_o_resto(sistema):
+    estado = EstadoDashboard()
+    estado.carregar(sistema.db)
+    versao = estado.versao
+
+    estado.aplicar(_evento("resumo_dashboard", "update", {"_id": "geral", "total_produtos": 7, "total_vendas": 3,
+                                                          "valor_vendas": 90.0}))
+    assert (estado.metricas()["produtos"], estado.metricas()["vendas"]) == (7, 3)
+
+    estado.aplicar(_evento("vendas", "update", {"_id": 2}))
+    estado.aplicar(_evento("clientes", "insert", {"_id": 3}))
+    assert estado.versao == versao + 1
+
+    with pytest.raises(ValueError):
+        estado.metricas(limite_estoque_baixo=estado.limite_estoque + 1)
+
+
+def test_sem_replica_set_carrega_o_estado_e_fica_inativo(sistema, aberturas):
+    aberturas["streams"].append(OperationFailure("not a replica set", code=ERRO_SEM_REPLICA_SET))
+
+    monitor = MonitorAlteracoes(sistema.db).iniciar()
+
+    assert not monitor.ativo and "replica set" in monitor.erro
+    assert monitor._thread is None
+    assert monitor.estado.metricas()["produtos"] == 2
+
+    aberturas["streams"].append(OperationFailure("outra falha", code=13))
+    with pytest.raises(OperationFailure):
+        MonitorAlteracoes(sistema.db).iniciar()
+
+
+def test_monitor_aplica_eventos_em_segundo_plano(sistema, aberturas):
+    p1 = sistema.db["estoque_produtos"].find_one({"cod_produto": "P1"})
+    aberturas["streams"].append(Stream([None, _evento("estoque_produtos", "update", dict(p1, qnt_estoque=1))]))
+
+    monitor = MonitorAlteracoes(sistema.db).iniciar()
+    limite = time.monotonic() + 5
+    while monitor.eventos < 1 and time.monotonic() < limite:
+        time.sleep(0.01)
+    monitor.parar()
+
+    assert monitor.eventos == 1 and not monitor.ativo
+    assert monitor.estado.metricas()["estoque_baixo"][0] == {"cod_produto": "P1", "nome": "Caneta",
+                                                             "categoria": "Papelaria", "qnt_estoque": 1}
+
+
+def test_historico_perdido_recarrega_o_estado_sem_token(sistema, aberturas):
+    monitor = MonitorAlteracoes(sistema.db)
+    p2 = sistema.db["estoque_produtos"].find_one({"cod_produto": "P2"})
+    primeiro = Stream([
+        _evento("estoque_produtos", "delete", _id=p2["_id"], token={"_data": "1"}),
+        OperationFailure("resume point lost", code=ERRO_HISTORICO_PERDIDO)
+    ])
+    aberturas["streams"].append(Stream([], ao_terminar=monitor._parar.set))
+    monitor.estado.carregar(sistema.db)
+
+    monitor._executar(primeiro)
+
+    # O stream é reaberto do início e o estado volta a ser o do banco (P2 não foi excluído)
+    assert primeiro.fechado
+    assert aberturas["resume_after"] == [None]
+    assert [p["cod_produto"] for p in monitor.estado.metricas()["estoque_baixo"]] == ["P2", "P1"]
+    assert monitor.erro is None
+
+
+def test_falha_temporaria_continua_do_ultimo_evento(sistema, aberturas):
+    monitor = MonitorAlteracoes(sistema.db)
+    monitor.estado.carregar(sistema.db)
+    primeiro = Stream([
+        _evento("vendas", "insert", {"_id": 1, "valor_total": 5.0}, token={"_data": "1"}),
+        _evento("vendas", "insert", {"_id": 2, "valor_total": 7.0}, token={"_data": "2"}),
+        AutoReconnect("conexão perdida")
+    ])
+    aberturas["streams"].append(Stream(
+        [_evento("vendas", "insert", {"_id": 3, "valor_total": 9.0}, token={"_data": "3"})],
+        ao_terminar=monitor._parar.set
+    ))
+
+    monitor._executar(primeiro)
+
+    assert aberturas["resume_after"] == [{"_data": "2"}]
+    assert monitor._token == {"_data": "3"}
+    assert monitor.eventos == 3
+    assert [v["valor_total"] for v in monitor.estado.metricas()["ultimas_vendas"]] == [9.0, 7.0, 5.0]
@@ -0,0 +1,139 @@
+import datetime as dt
+
+from sistema_varejo import Relatorios
+
+ONTEM = dt.datetime.now() - dt.timedelta(days=1)
+# O servidor guarda datas com precisão de milissegundos
+BASE = ONTEM.replace(microsecond=0)
+HORA = dt.timedelta(hours=1)
+
+
+def _movimentacao_antiga(cod_produto, quantidade, tipo_movimentacao):
+    """Movimentação gravada antes da série temporal: produto e tipo no formato plano"""
+    return {
+        "cod_produto": cod_produto, "nome_produto": cod_produto, "quantidade": quantidade,
+        "tipo_movimentacao": tipo_movimentacao, "estoque_resultante": 0, "data_movimentacao": ONTEM, "motivo": "Legado"
+    }
+
+
+def test_colecao_comum_mantem_movimentacoes_antigas(sistema):
+    sistema.db["movimentacoes_estoque"].insert_many([
+        _movimentacao_antiga("P1", 4, "entrada"), _movimentacao_antiga("P2", -1, "saida")
+    ])
+    sistema.vendas.registrar_venda_carrinho([("P1", 2)], "52998224725")
+
+    resultado = Relatorios().relatorio_movimentacoes(cod_produto="P1")
+    linhas = list(resultado)
+
+    assert sorted((l["tipo_movimentacao"], l["quantidade"]) for l in linhas) == [("entrada", 4), ("saida", -2)]
+    assert all(l["cod_produto"] == "P1" for l in linhas)
+    assert resultado.resumo["total_entradas"] == 4 and resultado.resumo["total_saidas"] == 2
+
+    saidas = Relatorios().relatorio_movimentacoes(tipo_movimentacao="saida")
+    assert sorted(l["cod_produto"] for l in saidas) == ["P1", "P2"]
+
+
+def test_estoque_em_soma_movimentacoes_antigas(sistema):
+    sistema.db["movimentacoes_estoque"].insert_one(_movimentacao_antiga("P1", 4, "entrada"))
+
+    # Fotografia do cadastro (10 unidades) anterior à entrada antiga de 4 unidades
+    sistema.db["estoque_snapshots"].update_many({}, {"$set": {"data_snapshot": ONTEM - dt.timedelta(days=1)}})
+    assert sistema.estoque.estoque_em(dt.datetime.now(), "P1") == 14
+
+
+def _movimentar(db, cod_produto, quantidade, data):
+    db["movimentacoes_estoque"].insert_one({
+        "cod_produto": cod_produto, "nome_produto": cod_produto, "quantidade": quantidade,
+        "tipo_movimentacao": "entrada" if quantidade > 0 else "saida", "estoque_resultante": 0,
+        "data_movimentacao": data, "motivo": "Teste"
+    })
+
+
+def _fotografar(db, cod_produto, data, qnt_estoque, origem="periodica"):
+    """Troca as fotografias do produto por uma única, no instante informado"""
+    db["estoque_snapshots"].delete_many({"cod_produto": cod_produto})
+    db["estoque_snapshots"].insert_one(
+        {"cod_produto": cod_produto, "data_snapshot": data, "qnt_estoque": qnt_estoque, "origem": origem}
+    )
+
+
+def test_estoque_antes_da_primeira_fotografia_parte_da_seguinte(sistema):
+    _fotografar(sistema.db, "P1", BASE, 10)
+    _movimentar(sistema.db, "P1", 3, BASE - 2 * HORA)
+    _movimentar(sistema.db, "P1", -1, BASE - 5 * HORA)
+
+    # Da fotografia para trás, desfazendo as movimentações entre a data e ela
+    assert sistema.estoque.estoque_em(BASE - HORA, "P1") == 10
+    assert sistema.estoque.estoque_em(BASE - 4 * HORA, "P1") == 7
+    assert sistema.estoque.estoque_em(BASE - 6 * HORA, "P1") == 8
+
+
+def test_limites_das_faixas_de_movimentacoes(sistema):
+    _fotografar(sistema.db, "P1", BASE, 10)
+    _movimentar(sistema.db, "P1", 5, BASE)           # já está na fotografia
+    _movimentar(sistema.db, "P1", 2, BASE + HORA)
+    _movimentar(sistema.db, "P1", -4, BASE - HORA)
+
+    # Uma movimentação faz parte do estoque do próprio instante em que foi registrada:
+    # para frente a faixa é ($gt fotografia, $lte data), para trás ($gt data, $lte fotografia)
+    assert sistema.estoque.estoque_em(BASE, "P1") == 10
+    assert sistema.estoque.estoque_em(BASE + HORA - dt.timedelta(milliseconds=1), "P1") == 10
+    assert sistema.estoque.estoque_em(BASE + HORA, "P1") == 12
+    assert sistema.estoque.estoque_em(BASE - HORA, "P1") == 5
+    assert sistema.estoque.estoque_em(BASE - HORA - dt.timedelta(milliseconds=1), "P1") == 9
+
+
+def test_produto_cadastrado_depois_da_data_fica_de_fora(sistema):
+    # As fotografias do cadastro (fixture) são de agora
+    assert sistema.estoque.estoque_em(BASE) == {}
+    assert sistema.estoque.estoque_em(BASE, "P1") is None
+
+    # Uma fotografia periódica posterior não indica cadastro: o produto já existia
+    _fotografar(sistema.db, "P2", BASE + HORA, 3)
+    assert sistema.estoque.estoque_em(BASE) == {"P2": 3}
+    assert sistema.estoque.estoque_em(dt.datetime.now()) == {"P1": 10, "P2": 3}
+
+
+def test_gerar_fotografia_no_passado(sistema):
+    _fotografar(sistema.db, "P1", BASE - 2 * HORA, 12, origem="cadastro")
+    _movimentar(sistema.db, "P1", -2, BASE + HORA)
+
+    # P1: estoque atual (10) sem a saída posterior; P2 foi cadastrado depois da data
+    assert sistema.estoque.registrar_snapshot(BASE) == 1
+    fotografia = sistema.db["estoque_snapshots"].find_one({"data_snapshot": BASE}, {"_id": 0})
+    assert fotografia == {"cod_produto": "P1", "data_snapshot": BASE, "qnt_estoque": 12, "origem": "periodica"}
+    assert sistema.estoque.estoque_em(BASE) == {"P1": 12}
+
+
+def test_gerar_de_novo_mantem_as_fotografias_existentes(sistema):
+    _fotografar(sistema.db, "P1", BASE - HORA, 10, origem="cadastro")
+    assert sistema.estoque.registrar_snapshot(BASE) == 1
+
+    _fotografar(sistema.db, "P2", BASE - HORA, 3, origem="cadastro")
+    # P1 já tem fotografia no instante (chave duplicada ignorada); só a de P2 é gravada
+    assert sistema.estoque.registrar_snapshot(BASE) == 1
+    assert sistema.db["estoque_snapshots"].count_documents({"data_snapshot": BASE}) == 2
+
+
+class _LeituraSeguidaDeVenda:
+    """Coleção de produtos em que uma venda é confirmada logo depois da leitura do estoque"""
+
+    def __init__(self, colecao, db):
+        self._colecao = colecao
+        self._db = db
+
+    def find(self, *args, **kwargs):
+        produtos = list(self._colecao.find(*args, **kwargs))
+        self._db["estoque_produtos"].update_one({"cod_produto": "P1"}, {"$inc": {"qnt_estoque": -4}})
+        _movimentar(self._db, "P1", -4, dt.datetime.now() + dt.timedelta(seconds=1))
+        return produtos
+
+
+def test_gerar_ignora_venda_posterior_a_leitura_do_estoque(sistema):
+    _fotografar(sistema.db, "P1", BASE - HORA, 10, origem="cadastro")
+    snapshots = sistema.estoque._snapshots
+    snapshots._colecao_produtos = _LeituraSeguidaDeVenda(snapshots._colecao_produtos, sistema.db)
+
+    # A venda não está no estoque lido (10); descontá-la daria 14
+    assert snapshots.gerar(BASE) == 1
+    assert sistema.db["estoque_snapshots"].find_one({"data_snapshot": BASE})["qnt_estoque"] == 10
@@ -0,0 +1,43 @@
+import datetime as dt
+import zipfile
+
+from conftest import CPF_CLIENTE
+from notas_fiscais import DestinoZip, EmissorNotasFiscais, chave_nota, nome_arquivo_nota
+
+
+class DestinoConcorrido(DestinoZip):
+    """Zip em que outra emissão grava as mesmas notas entre a consulta de existentes e a gravação"""
+
+    def gravar(self, notas):
+        return 0
+
+
+def _periodo():
+    agora = dt.datetime.now()
+    return {"data_inicio": agora - dt.timedelta(days=1), "data_fim": agora + dt.timedelta(days=1)}
+
+
+def test_emissao_repetida_nao_gera_notas_de_novo(sistema, tmp_path):
+    ids = [sistema.vendas.registrar_venda_carrinho([("P1", 1)], CPF_CLIENTE)["_id"] for _ in range(3)]
+    emissor = EmissorNotasFiscais()
+    caminho = tmp_path / "notas.zip"
+
+    with DestinoZip(caminho) as destino:
+        primeira = emissor.emitir(destino, processos=1, **_periodo())
+    with DestinoZip(caminho) as destino:
+        segunda = emissor.emitir(destino, processos=1, **_periodo())
+
+    assert (primeira["emitidas"], primeira["existentes"]) == (3, 0)
+    assert (segunda["emitidas"], segunda["existentes"]) == (0, 3)
+    assert sorted(segunda["chaves"]) == sorted(chave_nota(i) for i in ids)
+    with zipfile.ZipFile(caminho) as arquivo:
+        assert sorted(arquivo.namelist()) == sorted(nome_arquivo_nota(chave_nota(i)) for i in ids)
+
+
+def test_nota_gravada_por_outra_emissao_conta_como_existente(sistema, tmp_path):
+    sistema.vendas.registrar_venda_carrinho([("P1", 1)], CPF_CLIENTE)
+
+    with DestinoConcorrido(tmp_path / "notas.zip") as destino:
+        resultado = EmissorNotasFiscais().emitir(destino, processos=1, **_periodo())
+
+    assert (resultado["emitidas"], resultado["existentes"]) == (0, 1)
@@ -0,0 +1,79 @@
+import gc
+import weakref
+
+import sistema_varejo
+from indice_busca import IndicesSistema
+from sistema_varejo import notificar_alteracao, registrar_ouvinte, remover_ouvinte
+
+
+class Ouvinte:
+    def __init__(self):
+        self.eventos = []
+
+    def ao_alterar(self, evento, dados):
+        self.eventos.append(evento)
+
+
+def test_metodo_registrado_nao_mantem_instancia_viva():
+    gc.collect()
+    antes = len(sistema_varejo._ouvintes_alteracoes)
+    ouvinte = Ouvinte()
+    registrar_ouvinte(ouvinte.ao_alterar)
+    registrar_ouvinte(ouvinte.ao_alterar)
+
+    notificar_alteracao("estoque", cods_produto=["P1"])
+    assert ouvinte.eventos == ["estoque"]
+    assert len(sistema_varejo._ouvintes_alteracoes) == antes + 1
+
+    referencia = weakref.ref(ouvinte)
+    del ouvinte
+    gc.collect()
+    assert referencia() is None
+    assert len(sistema_varejo._ouvintes_alteracoes) == antes
+
+
+def test_funcao_registrada_continua_ate_ser_removida():
+    eventos = []
+    registrar_ouvinte(lambda evento, dados: eventos.append(evento))
+    ouvinte = sistema_varejo._ouvintes_alteracoes[-1]()
+
+    gc.collect()
+    notificar_alteracao("vendas", venda={})
+    assert eventos == ["vendas"]
+
+    remover_ouvinte(ouvinte)
+    notificar_alteracao("vendas", venda={})
+    assert eventos == ["vendas"]
+
+
+def test_gerenciadores_e_indices_sao_liberados(sistema):
+    gc.collect()
+    antes = len(sistema_varejo._ouvintes_alteracoes)
+    indices = IndicesSistema(sistema.produtos, sistema.clientes)
+    vendas = sistema_varejo.Vendas(sistema.produtos, sistema.clientes, sistema.estoque)
+    assert len(sistema_varejo._ouvintes_alteracoes) == antes + 2
+
+    referencias = [weakref.ref(indices), weakref.ref(vendas), weakref.ref(vendas.promocoes)]
+    del indices, vendas
+    gc.collect()
+
+    assert [referencia() for referencia in referencias] == [None, None, None]
+    assert len(sistema_varejo._ouvintes_alteracoes) == antes
+
+
+def test_falha_em_um_ouvinte_e_registrada_e_nao_interrompe_os_demais(caplog):
+    def falhar(evento, dados):
+        raise RuntimeError("ouvinte quebrado")
+
+    eventos = []
+    registrar_ouvinte(falhar)
+    registrar_ouvinte(lambda evento, dados: eventos.append(evento))
+    ouvinte = sistema_varejo._ouvintes_alteracoes[-1]()
+
+    notificar_alteracao("clientes", clientes=[])
+
+    remover_ouvinte(falhar)
+    remover_ouvinte(ouvinte)
+    assert eventos == ["clientes"]
+    assert "Falha no ouvinte de alterações (clientes)" in caplog.text
+    assert "ouvinte quebrado" in caplog.text
@@ -0,0 +1,100 @@
+import datetime as dt
+
+import pytest
+from bson import ObjectId
+
+from conftest import CPF_CLIENTE
+from sistema_varejo import GerenciadorProdutos
+
+INICIO = dt.datetime(2025, 1, 1, 9, 0)
+
+
+def _paginas(consultar, chave, **filtros):
+    """Percorre todas as páginas; retorna os documentos na ordem em que vieram"""
+    documentos, cursor = [], None
+    while True:
+        pagina = consultar(cursor=cursor, **filtros)
+        documentos.extend(pagina[chave])
+        cursor = pagina["proximo_cursor"]
+        if cursor is None:
+            return documentos, pagina["total"]
+
+
+@pytest.fixture
+def vendas(sistema):
+    """Vendas nos dois formatos (um produto ou itens), várias no mesmo instante"""
+    documentos = []
+    for i in range(11):
+        venda = {"_id": ObjectId(), "cpf_cliente": CPF_CLIENTE, "valor_total": 10.0,
+                 "data_venda": INICIO + dt.timedelta(hours=i // 3)}
+        if i % 2:
+            venda["itens"] = [{"cod_produto": "P1", "qnt_vendida": 1, "valor_total": 5.0},
+                              {"cod_produto": "P2", "qnt_vendida": 1, "valor_total": 5.0}]
+        else:
+            venda.update(cod_produto="P1" if i % 4 == 0 else "P2", qnt_vendida=1)
+        documentos.append(venda)
+    sistema.db["vendas"].insert_many(documentos)
+    return documentos
+
+
+@pytest.mark.parametrize("ordem", ["asc", "desc"])
+def test_vendas_em_paginas_sem_repetir_nem_pular(sistema, vendas, ordem):
+    encontradas, total = _paginas(sistema.vendas.consultar_vendas, "vendas", ordem=ordem, tamanho_pagina=4)
+
+    esperadas = sorted(vendas, key=lambda v: (v["data_venda"], v["_id"]), reverse=ordem == "desc")
+    assert [v["_id"] for v in encontradas] == [v["_id"] for v in esperadas]
+    assert total == 11
+
+
+def test_vendas_filtradas_no_banco(sistema, vendas):
+    encontradas, total = _paginas(sistema.vendas.consultar_vendas, "vendas", cod_produto="P1", tamanho_pagina=2,
+                                  data_inicio=INICIO + dt.timedelta(hours=1))
+
+    # Vendas com itens contam para os dois produtos
+    esperadas = {v["_id"] for v in vendas[3:] if v.get("cod_produto") == "P1" or "itens" in v}
+    assert {v["_id"] for v in encontradas} == esperadas
+    assert total == len(esperadas)
+
+
+def test_consulta_de_vendas_valida_os_parametros(sistema):
+    with pytest.raises(ValueError):
+        sistema.vendas.consultar_vendas(ordem="crescente")
+    with pytest.raises(ValueError):
+        sistema.vendas.consultar_vendas(tamanho_pagina=0)
+
+
+@pytest.fixture
+def catalogo(sistema):
+    nomes = ["Ábaco", "abajur", "Abacate", "Caderno", "Caderno", "Caderneta", "Cola", "Lápis", "Lapiseira"]
+    sistema.db["estoque_produtos"].insert_many([
+        GerenciadorProdutos.montar_produto(nome, f"X{i:02d}", "Escola" if i % 2 else "Casa", i, 1.0 + i % 3, "", "")
+        for i, nome in enumerate(nomes)
+    ])
+    return sistema.produtos
+
+
+@pytest.mark.parametrize("ordenar_por", ["nome", "cod_produto", "preco"])
+@pytest.mark.parametrize("ordem", ["asc", "desc"])
+def test_catalogo_em_paginas(catalogo, ordenar_por, ordem):
+    produtos, total = _paginas(catalogo.buscar_produtos, "produtos", ordenar_por=ordenar_por, ordem=ordem,
+                               tamanho_pagina=2)
+
+    campos = GerenciadorProdutos.ORDENACOES_BUSCA[ordenar_por]
+    chaves = [tuple(p[campo] for campo in campos) for p in produtos]
+    assert chaves == sorted(chaves, reverse=ordem == "desc")
+    assert len({p["_id"] for p in produtos}) == len(produtos) == total == 11
+
+
+def test_catalogo_busca_por_prefixo_sem_acentos(catalogo):
+    produtos, total = _paginas(catalogo.buscar_produtos, "produtos", termo="aba", tamanho_pagina=2)
+    assert [p["nome"] for p in produtos] == ["Abacate", "Ábaco", "abajur"]
+    assert total == 3
+
+    lapis = catalogo.buscar_produtos("lápis", categoria="Casa", projecao={"nome": 1})
+    assert [p["nome"] for p in lapis["produtos"]] == ["Lapiseira"]
+    assert catalogo.buscar_produtos("X0")["total"] == 9
+
+
+def test_catalogo_valida_a_ordenacao(catalogo):
+    with pytest.raises(ValueError, match="Ordenação inválida"):
+        catalogo.buscar_produtos(ordenar_por="fornecedor")
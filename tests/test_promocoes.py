@@ -0,0 +1,87 @@
+import datetime as dt
+
+import pytest
+
+from conftest import CPF_CLIENTE
+from sistema_varejo import TabelaPromocoes, montar_promocao
+
+AGORA = dt.datetime(2025, 3, 10, 12, 0)
+
+
+@pytest.fixture
+def tabela():
+    return TabelaPromocoes([
+        montar_promocao("DEZ", "10% em tudo", "porcentagem", 10),
+        montar_promocao("PAPEL", "20% em papelaria", "porcentagem", 20, categorias=["Papelaria"]),
+        montar_promocao("CINCO", "R$ 5,00 acima de R$ 50,00", "valor", 5, valor_minimo=50, cumulativa=True),
+        montar_promocao("VENCIDA", "50% até fevereiro", "porcentagem", 50, fim=dt.datetime(2025, 2, 28)),
+        montar_promocao("MOCHILA", "R$ 100,00 em acessórios", "valor", 100, categorias=["Acessórios"]),
+    ])
+
+
+def test_nao_cumulativas_vale_a_de_maior_desconto(tabela):
+    itens = [("Papelaria", 30.0), ("Acessórios", 20.0), (None, 10.0)]
+
+    avaliacao = tabela.avaliar(itens, ["dez", "papel", "cinco"], AGORA)
+
+    # DEZ: 10% de 60 = 6; PAPEL: 20% de 30 = 6 (empate: a primeira); CINCO soma-se por ser cumulativa
+    assert avaliacao["valor_original"] == 60.0
+    assert [p["codigo"] for p in avaliacao["aplicadas"]] == ["CINCO", "DEZ"]
+    assert avaliacao["desconto_aplicado"] == pytest.approx(11.0)
+    assert avaliacao["elegiveis"] == ["CINCO", "DEZ", "PAPEL"]
+
+
+def test_categoria_valor_minimo_e_validade(tabela):
+    itens = [("Papelaria", 30.0), ("Outros", 10.0)]
+
+    avaliacao = tabela.avaliar(itens, ["PAPEL", "CINCO", "VENCIDA", "MOCHILA"], AGORA)
+
+    # CINCO exige R$ 50,00, VENCIDA já acabou e o carrinho não tem acessórios
+    assert avaliacao["elegiveis"] == ["PAPEL"]
+    assert avaliacao["desconto_aplicado"] == pytest.approx(6.0)
+    assert tabela.avaliar(itens, ["VENCIDA"], dt.datetime(2025, 2, 1))["desconto_aplicado"] == pytest.approx(20.0)
+
+
+def test_desconto_em_valor_limitado_ao_valor_elegivel(tabela):
+    avaliacao = tabela.avaliar([("Acessórios", 40.0), ("Papelaria", 5.0)], ["MOCHILA"], AGORA)
+
+    assert avaliacao["desconto_aplicado"] == pytest.approx(40.0)
+    assert avaliacao["valor_final"] == pytest.approx(5.0)
+
+
+def test_carrinho_vazio(tabela):
+    avaliacao = tabela.avaliar([], ["DEZ"], AGORA)
+
+    assert (avaliacao["valor_original"], avaliacao["desconto_aplicado"], avaliacao["aplicadas"]) == (0.0, 0.0, [])
+
+
+def test_montar_promocao_valida_os_campos():
+    with pytest.raises(ValueError):
+        montar_promocao("", "Sem código", "valor", 5)
+    with pytest.raises(ValueError):
+        montar_promocao("X", "Tipo", "brinde", 5)
+    with pytest.raises(ValueError):
+        montar_promocao("X", "Demais", "porcentagem", 150)
+    with pytest.raises(ValueError):
+        montar_promocao("X", "Datas", "valor", 5, inicio=AGORA, fim=AGORA - dt.timedelta(days=1))
+
+
+def test_promocao_salva_vale_para_as_vendas(sistema):
+    venda = sistema.vendas.registrar_venda_carrinho([("P1", 2), ("P2", 1)], CPF_CLIENTE)
+    with pytest.raises(ValueError, match="inválido"):
+        sistema.vendas.aplicar_promocao(venda["_id"], "PAPEL")
+
+    sistema.vendas.promocoes.salvar(montar_promocao("PAPEL", "20% em papelaria", "porcentagem", 20,
+                                                    categorias=["Papelaria"]))
+
+    resultado = sistema.vendas.aplicar_promocao(venda["_id"], ["PAPEL", "FRETE_GRATIS"])
+    # PAPEL: 20% de R$ 10,00 (canetas) = 2; FRETE_GRATIS (padrão): R$ 20,00, maior, e não cumulativa
+    assert resultado["valor_original"] == 30.0
+    assert resultado["promocao"]["codigo"] == "FRETE_GRATIS"
+    assert resultado["valor_final"] == pytest.approx(10.0)
+
+    carrinho = sistema.vendas.avaliar_carrinho({"P1": 2}, sistema.produtos.obter_produtos(["P1"]), ["PAPEL"])
+    assert carrinho["desconto_aplicado"] == pytest.approx(2.0)
+
+    sistema.vendas.promocoes.desativar("papel")
+    assert "PAPEL" not in [p["codigo"] for p in sistema.vendas.promocoes_disponiveis()]
@@ -0,0 +1,73 @@
+import datetime as dt
+
+import pytest
+
+from benchmark_varejo import IDAS_RELATORIOS_RANKING
+from sistema_varejo import GerenciadorProdutos, Relatorios
+
+AGORA = dt.datetime(2025, 3, 10, 15, 30)
+
+
+@pytest.fixture
+def vendas(db):
+    """250 produtos e clientes, com vendas decrescentes: o produto/cliente i vende 250 - i unidades"""
+    total = 250
+    db["estoque_produtos"].insert_many([
+        GerenciadorProdutos.montar_produto(f"Produto {i}", f"P{i:03d}", "Outros", 10, 2.0, "", "") for i in range(total)
+    ])
+    db["clientes"].insert_many([{"nome": f"Cliente {i}", "cpf": f"{i:011d}"} for i in range(total)])
+    db["vendas"].insert_many([
+        {
+            "cod_produto": f"P{i:03d}",
+            "cpf_cliente": f"{i:011d}",
+            "qnt_vendida": total - i,
+            "valor_total": (total - i) * 2.0,
+            "data_venda": AGORA - dt.timedelta(hours=i)
+        }
+        for i in range(total)
+    ])
+    return total
+
+
+@pytest.mark.parametrize("metodo", sorted(IDAS_RELATORIOS_RANKING))
+@pytest.mark.parametrize("limite", [5, 200])
+def test_ranking_em_uma_ida_ao_banco(servidor, vendas, metodo, limite):
+    relatorios = Relatorios()
+    servidor.contador.zerar()
+
+    resultado = getattr(relatorios, metodo)(limite, data_fim=AGORA)
+    linhas = list(resultado)
+
+    # Nenhuma consulta por linha e nenhum getMore, mesmo com o ranking maior que o primeiro lote padrão
+    assert servidor.comandos() == ["aggregate"] * IDAS_RELATORIOS_RANKING[metodo]
+    assert len(linhas) == limite
+    assert [linha["posicao"] for linha in linhas] == list(range(1, limite + 1))
+
+
+def test_ranking_traz_nomes_e_ordem(servidor, vendas):
+    relatorios = Relatorios()
+
+    produtos = list(relatorios.relatorio_produtos_mais_vendidos(3))
+    clientes = list(relatorios.relatorio_clientes_top(3, ordenar_por="valor"))
+
+    assert [(p["cod_produto"], p["nome_produto"], p["qnt_vendida"]) for p in produtos] == [
+        ("P000", "Produto 0", 250), ("P001", "Produto 1", 249), ("P002", "Produto 2", 248)
+    ]
+    assert produtos[0]["preco_medio"] == 2.0
+    assert [(c["cpf_cliente"], c["nome_cliente"], c["valor_total"]) for c in clientes] == [
+        ("00000000000", "Cliente 0", 500.0), ("00000000001", "Cliente 1", 498.0), ("00000000002", "Cliente 2", 496.0)
+    ]
+
+
+def test_ranking_filtra_periodo(servidor, vendas):
+    relatorios = Relatorios()
+
+    # Só as vendas das últimas 10 horas (produtos P000 a P009)
+    linhas = list(relatorios.relatorio_produtos_mais_vendidos(50, AGORA - dt.timedelta(hours=9), AGORA))
+
+    assert [linha["cod_produto"] for linha in linhas] == [f"P{i:03d}" for i in range(10)]
+
+
+def test_ordenacao_invalida(db):
+    with pytest.raises(ValueError):
+        Relatorios().relatorio_clientes_top(5, ordenar_por="nome")
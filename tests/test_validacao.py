@@ -0,0 +1,58 @@
+import random
+
+import pandas as pd
+
+from validacao import (
+    validar_clientes,
+    validar_cpf,
+    validar_cpfs,
+    validar_email,
+    validar_emails,
+    validar_telefone,
+    validar_telefones,
+)
+
+
+def _cpf_valido(gerador):
+    digitos = [gerador.randrange(10) for _ in range(9)]
+    for pesos in (range(10, 1, -1), range(11, 1, -1)):
+        digitos.append(sum(d * p for d, p in zip(digitos, pesos)) * 10 % 11 % 10)
+    return "".join(map(str, digitos))
+
+
+def test_cpfs_em_lote_iguais_aos_individuais():
+    gerador = random.Random(7)
+    validos = [_cpf_valido(gerador) for _ in range(200)]
+    cpfs = (
+        validos
+        + [cpf[:-1] + str((int(cpf[-1]) + 1) % 10) for cpf in validos[:50]]
+        + [f"{cpf[:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:]}" for cpf in validos[:20]]
+        + ["11111111111", "123", "", "abc", "529982247250"]
+    )
+
+    assert list(validar_cpfs(cpfs)) == [validar_cpf(cpf) for cpf in cpfs]
+    assert validar_cpfs(validos).all()
+
+
+def test_cpfs_em_lote_com_valores_ausentes():
+    assert list(validar_cpfs(pd.Series(["52998224725", None, float("nan")]))) == [True, False, False]
+    assert list(validar_cpfs([])) == []
+
+
+def test_emails_e_telefones_em_lote_iguais_aos_individuais():
+    emails = ["ana@exemplo.com", "sem-arroba.com", "a@b", "x@y.com.br", ""]
+    telefones = ["(11) 98765-4321", "11987654321", "1198765-432", "(11)3456-7890", "telefone"]
+
+    assert list(validar_emails(emails)) == [bool(validar_email(e)) for e in emails]
+    assert list(validar_telefones(telefones)) == [bool(validar_telefone(t)) for t in telefones]
+
+
+def test_validar_clientes_informa_o_erro_mais_importante():
+    df = pd.DataFrame({
+        "nome": ["Ana", "", "Caio", "Dani"],
+        "cpf": ["52998224725", "123", "52998224725", "52998224725"],
+        "email": ["ana@exemplo.com", "x", "caio", "dani@exemplo.com"],
+        "telefone": ["(11) 98765-4321", "x", "x", "123"],
+    })
+
+    assert list(validar_clientes(df)) == ["", "Nome é obrigatório", "E-mail inválido", "Telefone inválido"]
@@ -0,0 +1,184 @@
+import datetime as dt
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import PyMongoError
+
+from conftest import CPF_CLIENTE
+from sistema_varejo import ResumoDashboard
+
+
+def test_carrinho_em_transacao_deixa_resumo_fora(transacoes, sistema):
+    sistema.vendas.registrar_venda_carrinho([("P1", 2), ("P2", 1)], CPF_CLIENTE)
+
+    # O documento único do resumo não entra na transação (seria disputado por todas as vendas)
+    assert transacoes.em_transacao("vendas") == ["insert"]
+    assert transacoes.em_transacao("resumo_dashboard") == []
+
+    resumo = ResumoDashboard(sistema.db).obter()
+    assert resumo["total_vendas"] == 1
+    assert resumo["valor_vendas"] == 30.0
+    assert ResumoDashboard(sistema.db).verificar_consistencia() == []
+
+
+def _estoque(db, cod_produto):
+    return db["estoque_produtos"].find_one({"cod_produto": cod_produto})["qnt_estoque"]
+
+
+def _comandos_estoque(servidor, desde):
+    return [comando for colecao, comando, _ in servidor.operacoes[desde:] if colecao == "estoque_produtos"]
+
+
+def test_venda_baixa_estoque_com_um_comando(servidor, sistema):
+    servidor.contador.zerar()
+
+    venda = sistema.vendas.registrar_venda("P1", CPF_CLIENTE, 3)
+
+    assert venda["valor_total"] == 15.0
+    assert _estoque(sistema.db, "P1") == 7
+    # Uma só atualização condicional no estoque, sem releituras do produto
+    assert servidor.comandos().count("findAndModify") == 1
+    movimentacao = sistema.db["movimentacoes_estoque"].find_one({"id_venda": venda["_id"]})
+    assert (movimentacao["quantidade"], movimentacao["estoque_resultante"]) == (-3, 7)
+
+
+def test_venda_sem_estoque_nao_altera_nada(sistema):
+    with pytest.raises(ValueError, match="Estoque insuficiente"):
+        sistema.vendas.registrar_venda("P2", CPF_CLIENTE, 4)
+    with pytest.raises(ValueError, match="não encontrado"):
+        sistema.vendas.registrar_venda("P9", CPF_CLIENTE, 1)
+
+    assert _estoque(sistema.db, "P2") == 3
+    assert sistema.db["vendas"].count_documents({}) == 0
+
+
+def test_venda_nao_gravada_devolve_estoque(sistema, monkeypatch):
+    def falhar(*args, **kwargs):
+        raise PyMongoError("falha de rede")
+
+    monkeypatch.setattr(sistema.vendas._colecao_vendas, "insert_one", falhar)
+
+    with pytest.raises(RuntimeError, match="Falha ao registrar venda"):
+        sistema.vendas.registrar_venda("P1", CPF_CLIENTE, 2)
+
+    assert _estoque(sistema.db, "P1") == 10
+
+
+def test_carrinho_soma_itens_repetidos_em_uma_venda(servidor, sistema):
+    servidor.contador.zerar()
+    inicio = len(servidor.operacoes)
+
+    venda = sistema.vendas.registrar_venda_carrinho(
+        [("P1", 2), {"cod_produto": "P2", "qnt_vendida": 1}, ("P1", 1)], CPF_CLIENTE
+    )
+
+    assert [(item["cod_produto"], item["qnt_vendida"]) for item in venda["itens"]] == [("P1", 3), ("P2", 1)]
+    assert venda["valor_total"] == 35.0
+    # Estoque conferido com uma consulta, baixado com um bulk_write e lido de volta com outra consulta
+    assert _comandos_estoque(servidor, inicio) == ["find", "bulkWrite", "find"]
+    assert (_estoque(sistema.db, "P1"), _estoque(sistema.db, "P2")) == (7, 2)
+    assert sistema.db["vendas"].count_documents({}) == 1
+    # Uma movimentação por produto, gravadas juntas depois da venda, com o estoque após a venda
+    movimentacoes = sistema.db["movimentacoes_estoque"].find({"id_venda": venda["_id"]})
+    assert sorted((m["cod_produto"], m["estoque_resultante"]) for m in movimentacoes) == [("P1", 7), ("P2", 2)]
+
+
+def _concorrencia_na_mochila(sistema, monkeypatch):
+    """Outro caixa vende a última mochila entre a conferência do carrinho e a baixa"""
+    conferir = sistema.vendas._produtos_do_carrinho
+
+    def conferir_com_concorrencia(quantidades, sessao=None):
+        produtos = conferir(quantidades, sessao)
+        sistema.db["estoque_produtos"].update_one({"cod_produto": "P2"}, {"$set": {"qnt_estoque": 0}})
+        return produtos
+
+    monkeypatch.setattr(sistema.vendas, "_produtos_do_carrinho", conferir_com_concorrencia)
+
+
+def test_carrinho_com_item_sem_estoque_devolve_os_ja_baixados(servidor, sistema, monkeypatch):
+    sistema.produtos.cadastrar_produto("Lápis", "P3", "Papelaria", 5, 2.0, "", "")
+    _concorrencia_na_mochila(sistema, monkeypatch)
+    inicio = len(servidor.operacoes)
+
+    with pytest.raises(ValueError, match="Estoque insuficiente para: P2"):
+        sistema.vendas.registrar_venda_carrinho([("P1", 4), ("P2", 1), ("P3", 1)], CPF_CLIENTE)
+
+    # Uma baixa e uma devolução, cada uma com um bulk_write
+    assert _comandos_estoque(servidor, inicio).count("bulkWrite") == 2
+    assert [_estoque(sistema.db, cod) for cod in ("P1", "P2", "P3")] == [10, 0, 5]
+    assert sistema.db["estoque_produtos"].count_documents({}) == 3
+    assert sistema.db["vendas"].count_documents({}) == 0
+    assert sistema.db["movimentacoes_estoque"].count_documents({}) == 0
+
+
+def test_carrinho_sem_indice_unico_nao_deixa_produto_inserido(sistema, monkeypatch):
+    sistema.db["estoque_produtos"].drop_index("cod_produto_unico")
+    _concorrencia_na_mochila(sistema, monkeypatch)
+
+    with pytest.raises(ValueError, match="Estoque insuficiente para: P2"):
+        sistema.vendas.registrar_venda_carrinho([("P1", 4), ("P2", 1)], CPF_CLIENTE)
+
+    assert sistema.db["estoque_produtos"].count_documents({"cod_produto": "P2"}) == 1
+    assert (_estoque(sistema.db, "P1"), _estoque(sistema.db, "P2")) == (10, 0)
+
+
+def test_carrinho_nao_gravado_devolve_estoque(sistema, monkeypatch):
+    def falhar(*args, **kwargs):
+        raise PyMongoError("falha de rede")
+
+    monkeypatch.setattr(sistema.vendas._colecao_vendas, "insert_one", falhar)
+
+    with pytest.raises(RuntimeError, match="Falha ao registrar venda"):
+        sistema.vendas.registrar_venda_carrinho([("P1", 4), ("P2", 1)], CPF_CLIENTE)
+
+    assert (_estoque(sistema.db, "P1"), _estoque(sistema.db, "P2")) == (10, 3)
+
+
+def test_carrinho_invalido_nao_baixa_estoque(sistema):
+    with pytest.raises(ValueError, match="P9"):
+        sistema.vendas.registrar_venda_carrinho([("P1", 1), ("P9", 1)], CPF_CLIENTE)
+    with pytest.raises(ValueError, match="disponível: 3"):
+        sistema.vendas.registrar_venda_carrinho([("P1", 1), ("P2", 5)], CPF_CLIENTE)
+    with pytest.raises(ValueError, match="vazio"):
+        sistema.vendas.registrar_venda_carrinho([], CPF_CLIENTE)
+
+    assert (_estoque(sistema.db, "P1"), _estoque(sistema.db, "P2")) == (10, 3)
+
+
+def test_carrinho_em_transacao_baixa_estoque_com_bulk_write(transacoes, sistema):
+    sistema.vendas.registrar_venda_carrinho([("P1", 2), ("P2", 1)], CPF_CLIENTE)
+
+    assert transacoes.em_transacao("estoque_produtos").count("bulkWrite") == 1
+    assert (_estoque(sistema.db, "P1"), _estoque(sistema.db, "P2")) == (8, 2)
+
+
+def _vendas_gravadas(quantidade):
+    """Vendas nos dois formatos: produto único (pares) e carrinho (ímpares)"""
+    vendas = []
+    for i in range(quantidade):
+        if i % 2:
+            venda = {"itens": [{"cod_produto": "P1", "qnt_vendida": 1, "valor_total": 5.0},
+                               {"cod_produto": "P2", "qnt_vendida": 1, "valor_total": 20.0}]}
+        else:
+            venda = {"cod_produto": "P1", "qnt_vendida": 2, "valor_total": 10.0}
+        venda.update(_id=ObjectId(), cpf_cliente=CPF_CLIENTE, data_venda=dt.datetime(2025, 1, 1) + dt.timedelta(hours=i))
+        vendas.append(venda)
+    return vendas
+
+
+def test_linhas_itens_busca_os_nomes_com_numero_fixo_de_comandos(servidor, sistema):
+    idas = []
+    for quantidade in (4, 300):
+        vendas = _vendas_gravadas(quantidade)
+        servidor.contador.zerar()
+
+        linhas = sistema.vendas.linhas_itens(vendas)
+
+        idas.append(sorted(servidor.comandos()))
+        assert len(linhas) == quantidade // 2 * 3
+        assert {(l["nome_produto"], l["nome_cliente"]) for l in linhas} == {
+            ("Caneta", "Cliente Teste"), ("Mochila", "Cliente Teste")
+        }
+
+    # Uma consulta de produtos e uma de clientes, qualquer que seja o número de vendas
+    assert idas == [["find", "find"], ["find", "find"]]
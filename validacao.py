@@ -0,0 +1,103 @@
+"""
+Validação de CPF, e-mail e telefone
+
+As funções validar_* checam um valor por vez (formulários). As funções
+validar_*s checam colunas inteiras de uma vez: os dígitos verificadores dos
+CPFs são calculados com NumPy sobre uma matriz de dígitos e e-mails e
+telefones usam as operações vetorizadas de texto do pandas.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+REGEX_EMAIL = r"[^@]+@[^@]+\.[^@]+"
+REGEX_TELEFONE = r"^\(?\d{2}\)?\s?\d{4,5}\-?\d{4}$"
+
+# Pesos dos dígitos verificadores: 10..2 para o primeiro e 11..2 para o segundo
+_PESOS_DIGITO_1 = np.arange(10, 1, -1)
+_PESOS_DIGITO_2 = np.arange(11, 1, -1)
+
+
+# Um valor por vez
+
+def validar_cpf(cpf):
+    cpf = re.sub(r'[^0-9]', '', cpf)
+    if len(cpf) != 11 or cpf == cpf[0] * 11:
+        return False
+    soma = sum(int(cpf[i]) * (10 - i) for i in range(9))
+    dig1 = (soma * 10 % 11) % 10
+    soma = sum(int(cpf[i]) * (11 - i) for i in range(10))
+    dig2 = (soma * 10 % 11) % 10
+    return cpf[-2:] == f"{dig1}{dig2}"
+
+
+def validar_email(email):
+    return re.match(REGEX_EMAIL, email)
+
+
+def validar_telefone(telefone):
+    return re.match(REGEX_TELEFONE, telefone)
+
+
+# Colunas inteiras
+
+def _como_texto(valores):
+    return pd.Series(valores, dtype="object").fillna("").astype(str)
+
+
+def normalizar_cpfs(cpfs):
+    """Remove pontuação de uma coluna de CPFs, mantendo só os dígitos"""
+    return _como_texto(cpfs).str.replace(r"[^0-9]", "", regex=True)
+
+
+def validar_cpfs(cpfs):
+    """Valida uma coluna de CPFs; retorna um array booleano do mesmo tamanho"""
+    cpfs = normalizar_cpfs(cpfs)
+    validos = np.zeros(len(cpfs), dtype=bool)
+
+    com_11_digitos = (cpfs.str.len() == 11).to_numpy()
+    if not com_11_digitos.any():
+        return validos
+
+    # Matriz N x 11 com os dígitos, montada direto dos bytes ASCII
+    texto = "".join(cpfs[com_11_digitos]).encode("ascii")
+    digitos = (np.frombuffer(texto, dtype=np.uint8) - ord("0")).reshape(-1, 11).astype(np.int64)
+
+    digito_1 = (digitos[:, :9] @ _PESOS_DIGITO_1) * 10 % 11 % 10
+    digito_2 = (digitos[:, :10] @ _PESOS_DIGITO_2) * 10 % 11 % 10
+    todos_iguais = (digitos == digitos[:, :1]).all(axis=1)
+
+    validos[com_11_digitos] = (digito_1 == digitos[:, 9]) & (digito_2 == digitos[:, 10]) & ~todos_iguais
+    return validos
+
+
+def validar_emails(emails):
+    """Valida uma coluna de e-mails; retorna um array booleano do mesmo tamanho"""
+    return _como_texto(emails).str.match(REGEX_EMAIL).to_numpy(dtype=bool)
+
+
+def validar_telefones(telefones):
+    """Valida uma coluna de telefones; retorna um array booleano do mesmo tamanho"""
+    return _como_texto(telefones).str.strip().str.match(REGEX_TELEFONE).to_numpy(dtype=bool)
+
+
+def validar_clientes(df):
+    """
+    Valida um DataFrame com as colunas nome, cpf, email e telefone em uma única passada.
+    Retorna uma Series com a mensagem de erro de cada linha ("" quando a linha é válida).
+    """
+    erros = pd.Series("", index=df.index, dtype="object")
+
+    # Do menos para o mais importante: a última mensagem aplicada prevalece
+    checagens = [
+        (~validar_telefones(df["telefone"]), "Telefone inválido"),
+        (~validar_emails(df["email"]), "E-mail inválido"),
+        (~validar_cpfs(df["cpf"]), "CPF inválido"),
+        (_como_texto(df["nome"]).str.strip().eq("").to_numpy(), "Nome é obrigatório"),
+    ]
+    for invalidos, mensagem in checagens:
+        erros[invalidos] = mensagem
+
+    return erros